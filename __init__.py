@@ -11,10 +11,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from . import usd_hook, props, ops, ui
+from . import usd_hook, props, ops, ui, dirty_tracking, library_index
 
 
-import_order = [props, ops, usd_hook, ui]
+import_order = [props, ops, usd_hook, ui, dirty_tracking, library_index]
 
 def register():
     for module in import_order:
@@ -0,0 +1,113 @@
+"""Microbenchmark for `utils.compare_usd_values` against the previous hasattr based implementation.
+
+Run with any Python that provides `pxr` and `numpy`, eg. Blender's bundled Python
+or the `bpy` PIP package:
+
+    python benchmarks/bench_compare_values.py
+"""
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+from pxr import Gf, Vt
+
+# Import utils directly so the add-on (and bpy) doesn't need to be registered
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import utils  # noqa: E402
+
+
+def legacy_compare_usd_values(value1: Any, value2: Any, precision: int = 2) -> bool:
+    """Previous implementation of compare_usd_values, kept as the benchmark baseline."""
+    if value1 is None and value2 is None:
+        return True
+    if value1 is None or value2 is None:
+        return False
+
+    if type(value1) != type(value2):
+        return False
+
+    if value1 == value2:
+        return True
+
+    if hasattr(value1, '__class__') and 'Array' in str(type(value1)):
+        try:
+            if len(value1) != len(value2):
+                return False
+            for i in range(len(value1)):
+                if not legacy_compare_usd_values(value1[i], value2[i], precision):
+                    return False
+            return True
+        except (TypeError, IndexError, AttributeError):
+            pass
+
+    if hasattr(value1, '__len__') and hasattr(value1, '__getitem__'):
+        try:
+            if len(value1) != len(value2):
+                return False
+            for i in range(len(value1)):
+                if isinstance(value1[i], (float, int)):
+                    if round(float(value1[i]), precision) != round(
+                        float(value2[i]), precision
+                    ):
+                        return False
+                else:
+                    if value1[i] != value2[i]:
+                        return False
+            return True
+        except (TypeError, IndexError):
+            pass
+
+    if hasattr(value1, 'GetReal') and hasattr(value1, 'GetImaginary'):
+        try:
+            real_equal = round(float(value1.GetReal()), precision) == round(
+                float(value2.GetReal()), precision
+            )
+            imag_equal = legacy_compare_usd_values(
+                value1.GetImaginary(), value2.GetImaginary(), precision
+            )
+            return real_equal and imag_equal
+        except (TypeError, AttributeError):
+            pass
+
+    if isinstance(value1, (float, int)) and isinstance(value2, (float, int)):
+        return round(float(value1), precision) == round(float(value2), precision)
+
+    return value1 == value2
+
+
+def build_cases() -> dict[str, tuple[Any, Any, int]]:
+    """Build pairs of equal values, the common case when diffing unchanged properties,
+    and pairs of nearly equal values, the expensive case for both implementations.
+
+    Returns:
+        dict[str, tuple[Any, Any, int]]: Case name mapped to (value1, value2, iterations)
+    """
+    num_points = 100_000
+    points1 = Vt.Vec3fArray([Gf.Vec3f(i, i * 0.5, i * 0.25) for i in range(num_points)])
+    points2 = Vt.Vec3fArray([Gf.Vec3f(i, i * 0.5, i * 0.25 + 1e-4) for i in range(num_points)])
+    return {
+        "vec3f_equal": (Gf.Vec3f(1, 2, 3), Gf.Vec3f(1, 2, 3), 100_000),
+        "matrix4d_equal": (Gf.Matrix4d(1.0), Gf.Matrix4d(1.0), 100_000),
+        "float": (1.0, 1.0001, 200_000),
+        "vec3f": (Gf.Vec3f(1, 2, 3), Gf.Vec3f(1, 2, 3.0001), 100_000),
+        "matrix4d": (Gf.Matrix4d(1.0), Gf.Matrix4d(1.0001), 50_000),
+        "quatf": (Gf.Quatf(1, 0, 0, 0), Gf.Quatf(1, 0.0001, 0, 0), 100_000),
+        "vec3f_array_100k": (points1, points2, 3),
+    }
+
+
+def main() -> None:
+    print(f"{'case':<20}{'legacy (s)':>14}{'registry (s)':>14}{'speedup':>10}")
+    for name, (value1, value2, iterations) in build_cases().items():
+        legacy = timeit.timeit(
+            lambda: legacy_compare_usd_values(value1, value2), number=iterations
+        )
+        current = timeit.timeit(
+            lambda: utils.compare_usd_values(value1, value2), number=iterations
+        )
+        print(f"{name:<20}{legacy:>14.4f}{current:>14.4f}{legacy / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Generate synthetic USD source stages to benchmark USD Connector at different scales.
+
+Only requires `pxr` and `numpy`:
+
+    python benchmarks/generate_scene.py scene.usda --prims 10000 --depth 3 --vertices 1024
+"""
+import argparse
+import math
+from pathlib import Path
+
+import numpy
+from pxr import Gf, Sdf, Usd, UsdGeom, UsdShade, Vt
+
+
+def create_grid_mesh_data(num_vertices: int) -> dict:
+    """Create the attribute values of a flat grid mesh with roughly num_vertices points.
+
+    Returns:
+        dict: Values for points, normals, faceVertexCounts, faceVertexIndices and extent
+    """
+    side = max(2, math.ceil(math.sqrt(num_vertices)))
+    grid = numpy.linspace(-1.0, 1.0, side, dtype=numpy.float32)
+    xs, ys = numpy.meshgrid(grid, grid)
+    points = numpy.stack([xs.ravel(), ys.ravel(), numpy.zeros(side * side, numpy.float32)], axis=1)
+
+    # One quad per grid cell, indices of its four corners
+    rows, cols = numpy.meshgrid(numpy.arange(side - 1), numpy.arange(side - 1), indexing="ij")
+    corners = rows * side + cols
+    indices = numpy.stack(
+        [corners, corners + 1, corners + side + 1, corners + side], axis=-1
+    ).reshape(-1)
+    num_faces = (side - 1) ** 2
+
+    normals = numpy.zeros_like(points)
+    normals[:, 2] = 1.0
+
+    return {
+        "points": Vt.Vec3fArray.FromNumpy(points),
+        "normals": Vt.Vec3fArray.FromNumpy(normals),
+        "faceVertexCounts": Vt.IntArray.FromNumpy(numpy.full(num_faces, 4, numpy.int32)),
+        "faceVertexIndices": Vt.IntArray.FromNumpy(indices.astype(numpy.int32)),
+        "extent": Vt.Vec3fArray([Gf.Vec3f(-1, -1, 0), Gf.Vec3f(1, 1, 0)]),
+    }
+
+
+def get_group_path(root: Sdf.Path, index: int, depth: int, branching: int) -> Sdf.Path:
+    """Get the group prim an object is placed under, distributing objects evenly over depth levels."""
+    path = root
+    for level in reversed(range(depth)):
+        group = (index // branching ** (level + 1)) % branching
+        path = path.AppendChild(f"group_{depth - level}_{group}")
+    return path
+
+
+def generate_scene(
+    file_path: Path,
+    num_prims: int,
+    depth: int = 2,
+    num_vertices: int = 64,
+    num_materials: int = 4,
+    num_time_samples: int = 0,
+) -> Usd.Stage:
+    """Write a synthetic source stage in the layout Blender's USD importer expects.
+
+    Args:
+        file_path (Path): File to write the stage to, format follows the extension
+        num_prims (int): Number of mesh objects, each is an Xform with a Mesh child
+        depth (int): Number of group Xform levels between the root prim and the objects
+        num_vertices (int): Approximate number of vertices per mesh
+        num_materials (int): Number of UsdPreviewSurface materials bound round robin to the meshes
+        num_time_samples (int): Number of animated translate samples per object, 0 for static objects
+
+    Returns:
+        Usd.Stage: The saved stage
+    """
+    stage = Usd.Stage.CreateNew(file_path.as_posix())
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
+    UsdGeom.SetStageMetersPerUnit(stage, 1.0)
+
+    root = UsdGeom.Xform.Define(stage, "/root").GetPrim()
+    stage.SetDefaultPrim(root)
+    if num_time_samples:
+        stage.SetStartTimeCode(1)
+        stage.SetEndTimeCode(num_time_samples)
+
+    materials = []
+    if num_materials:
+        UsdGeom.Scope.Define(stage, "/root/_materials")
+    for material_index in range(num_materials):
+        material = UsdShade.Material.Define(stage, f"/root/_materials/Material_{material_index}")
+        shader = UsdShade.Shader.Define(stage, material.GetPath().AppendChild("Principled_BSDF"))
+        shader.CreateIdAttr("UsdPreviewSurface")
+        color = Gf.Vec3f(*(((material_index * 0.37 + offset) % 1.0) for offset in (0.1, 0.4, 0.7)))
+        shader.CreateInput("diffuseColor", Sdf.ValueTypeNames.Color3f).Set(color)
+        shader.CreateInput("roughness", Sdf.ValueTypeNames.Float).Set(0.5)
+        material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "surface")
+        materials.append(material)
+
+    mesh_data = create_grid_mesh_data(num_vertices)
+    branching = max(1, math.ceil(num_prims ** (1 / depth))) if depth else 1
+
+    for index in range(num_prims):
+        group_path = get_group_path(root.GetPath(), index, depth, branching)
+        if not stage.GetPrimAtPath(group_path):
+            for prefix in group_path.GetPrefixes():
+                UsdGeom.Xform.Define(stage, prefix)
+        xform = UsdGeom.Xform.Define(stage, group_path.AppendChild(f"Object_{index}"))
+        translate = xform.AddTranslateOp()
+        position = Gf.Vec3d(index % 100 * 3.0, index // 100 % 100 * 3.0, index // 10000 * 3.0)
+        if num_time_samples:
+            for frame in range(1, num_time_samples + 1):
+                translate.Set(position + Gf.Vec3d(0, 0, frame * 0.1), frame)
+        else:
+            translate.Set(position)
+
+        mesh = UsdGeom.Mesh.Define(stage, xform.GetPath().AppendChild(f"Mesh_{index}"))
+        for attr_name, value in mesh_data.items():
+            mesh.GetPrim().GetAttribute(attr_name).Set(value)
+        mesh.GetSubdivisionSchemeAttr().Set(UsdGeom.Tokens.none)
+
+        if materials:
+            UsdShade.MaterialBindingAPI.Apply(mesh.GetPrim()).Bind(
+                materials[index % len(materials)]
+            )
+
+    stage.Save()
+    return stage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path, help="USD file to write")
+    parser.add_argument("--prims", type=int, default=1000, help="Number of mesh objects")
+    parser.add_argument("--depth", type=int, default=2, help="Levels of group prims")
+    parser.add_argument("--vertices", type=int, default=64, help="Vertices per mesh")
+    parser.add_argument("--materials", type=int, default=4, help="Number of materials")
+    parser.add_argument("--time-samples", type=int, default=0, help="Animated samples per object")
+    args = parser.parse_args()
+
+    generate_scene(
+        args.output,
+        num_prims=args.prims,
+        depth=args.depth,
+        num_vertices=args.vertices,
+        num_materials=args.materials,
+        num_time_samples=args.time_samples,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Time USD Connector's import, export, refresh and override generation on synthetic scenes.
+
+Runs with the `bpy` PIP package. Source stages are created with generate_scene.py
+at each of the given sizes and the results are written as JSON, so runs can be compared:
+
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000 --output results/after.json
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000 --compare results/after.json
+"""
+import argparse
+import importlib.util
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import bpy
+
+# Make `pxr` module available, for running as `bpy` PIP package.
+bpy.utils.expose_bundled_modules()
+
+from pxr import Gf, Sdf, Usd, UsdGeom  # noqa: E402
+
+from generate_scene import generate_scene  # noqa: E402
+
+ADDON_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent.joinpath("results")
+
+# Benchmarked functions, in the order they run for each scene size
+PHASES = [
+    "import_usd_reference",
+    "wait_for_snapshot",
+    "export_usd_layer",
+    "generate_usd_overrides_for_prims",
+    "refresh_usd_library",
+    "refresh_usd_library_incremental",
+]
+
+
+def load_addon() -> Any:
+    """Import and register the add-on as a package, independent of the name of its directory."""
+    spec = importlib.util.spec_from_file_location(
+        "usd_connector",
+        ADDON_DIR.joinpath("__init__.py"),
+        submodule_search_locations=[ADDON_DIR.as_posix()],
+    )
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+
+@contextmanager
+def timed(timings: Dict[str, float], phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    timings[phase] = time.perf_counter() - start
+
+
+def modify_library_objects(core: Any, fraction: float) -> int:
+    """Move a fraction of the imported objects, so export has overrides to generate."""
+    library = bpy.context.scene.usd_connect_libraries[0]
+    objects = [obj for obj in core.get_library_objects(library) if obj.type == "MESH"]
+    step = max(1, round(1 / fraction)) if fraction else 0
+    modified = objects[::step] if step else []
+    for obj in modified:
+        obj.location.x += 1.0
+    bpy.context.view_layer.update()
+    return len(modified)
+
+
+def modify_source_prims(source_path: Path, fraction: float) -> int:
+    """Move a fraction of the objects in the source file, as an upstream change to refresh."""
+    stage = Usd.Stage.Open(source_path.as_posix())
+    objects = [prim for prim in stage.Traverse() if prim.GetName().startswith("Object_")]
+    step = max(1, round(1 / fraction)) if fraction else 0
+    modified = objects[::step] if step else []
+    for prim in modified:
+        UsdGeom.XformCommonAPI(prim).SetTranslate(Gf.Vec3d(0, 0, -10))
+    stage.Save()
+    return len(modified)
+
+
+def run_refresh(core: Any, incremental: bool) -> None:
+    # Run the reimport the refresh chains through a timer right away
+    reimport = core.refresh_export_usd_layer(
+        Path(tempfile.mkdtemp(prefix="usd_refresh_")), incremental=incremental
+    )
+    if reimport:
+        bpy.app.timers.unregister(reimport)
+        reimport()
+
+
+def run_scene_benchmark(core: Any, source_path: Path, modify_fraction: float) -> Dict[str, float]:
+    """Run every phase once against a freshly opened, empty Blender file.
+
+    Timers don't fire without Blender's event loop, so the refresh's reimport, which core
+    chains through bpy.app.timers, is called directly.
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    timings: Dict[str, float] = {}
+
+    source_path.parent.joinpath("usd_snapshots").mkdir(exist_ok=True)
+    with timed(timings, "import_usd_reference"):
+        core.import_usd_reference(source_path.as_posix())
+    library = bpy.context.scene.usd_connect_libraries[0]
+    # Only the part of snapshot creation that didn't overlap with the import
+    with timed(timings, "wait_for_snapshot"):
+        core.wait_for_snapshot(library)
+
+    modify_library_objects(core, modify_fraction)
+    layer_path = Path(library.export_path)
+
+    with timed(timings, "export_usd_layer"):
+        core.export_usd_layer(layer_path)
+
+    # Diff a plain Blender export outside of the export hook, to time override generation alone
+    bl_stage_path = source_path.parent.joinpath("blender_export.usdc")
+    with core.override_usd_session_state(active=False):
+        bpy.ops.wm.usd_export(filepath=bl_stage_path.as_posix())
+    bl_stage = Usd.Stage.Open(bl_stage_path.as_posix())
+    source_stage = Usd.Stage.Open(library.ref_file_path)
+    override_layer = Sdf.Layer.CreateAnonymous()
+    override_layer.subLayerPaths.append(library.ref_file_path)
+    with timed(timings, "generate_usd_overrides_for_prims"):
+        change_set = core.generate_usd_overrides_for_prims(
+            source_stage=source_stage,
+            bl_stage=bl_stage,
+            library=library,
+        )
+        change_set.author_into(override_layer)
+
+    with timed(timings, "refresh_usd_library"):
+        run_refresh(core, incremental=False)
+
+    # The snapshot of the initial import is kept, so only the upstream change is reimported
+    modify_source_prims(source_path, modify_fraction / 10)
+    with timed(timings, "refresh_usd_library_incremental"):
+        run_refresh(core, incremental=True)
+
+    return timings
+
+
+def run_benchmarks(
+    sizes: List[int],
+    depth: int,
+    num_vertices: int,
+    num_materials: int,
+    num_time_samples: int,
+    modify_fraction: float,
+    repeat: int,
+) -> Dict[str, Any]:
+    """Benchmark all phases at each scene size, keeping the fastest of the repeated runs.
+
+    Returns:
+        Dict[str, Any]: Machine readable results with the environment they were measured in
+    """
+    addon = load_addon()
+    core = sys.modules[f"{addon.__name__}.core"]
+
+    results = []
+    for num_prims in sizes:
+        work_dir = Path(tempfile.mkdtemp(prefix="usd_connector_bench_"))
+        try:
+            source_path = work_dir.joinpath("source.usdc")
+            timings: Dict[str, float] = {}
+            for _ in range(repeat):
+                # Regenerated for each run, the incremental refresh modifies the source
+                start = time.perf_counter()
+                generate_scene(
+                    source_path,
+                    num_prims=num_prims,
+                    depth=depth,
+                    num_vertices=num_vertices,
+                    num_materials=num_materials,
+                    num_time_samples=num_time_samples,
+                )
+                generate_seconds = time.perf_counter() - start
+
+                for phase, seconds in run_scene_benchmark(
+                    core, source_path, modify_fraction
+                ).items():
+                    timings[phase] = min(seconds, timings.get(phase, seconds))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        results.append(
+            {"prims": num_prims, "generate_seconds": generate_seconds, "timings": timings}
+        )
+        print(f"{num_prims} prims: " + ", ".join(f"{k} {v:.3f}s" for k, v in timings.items()))
+
+    addon.unregister()
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "blender": bpy.app.version_string,
+            "usd": ".".join(str(part) for part in Usd.GetVersion()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scene": {
+            "depth": depth,
+            "vertices": num_vertices,
+            "materials": num_materials,
+            "time_samples": num_time_samples,
+            "modify_fraction": modify_fraction,
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> bool:
+    """Print the change of every phase against a baseline run.
+
+    Returns:
+        bool: True if any phase got slower than the threshold allows
+    """
+    baseline_by_size = {result["prims"]: result["timings"] for result in baseline["results"]}
+    regressed = False
+    print(f"{'prims':>8}  {'phase':<34}{'baseline':>10}{'current':>10}{'change':>9}")
+    for result in current["results"]:
+        baseline_timings = baseline_by_size.get(result["prims"])
+        if not baseline_timings:
+            continue
+        for phase in PHASES:
+            if phase not in baseline_timings or phase not in result["timings"]:
+                continue
+            before = baseline_timings[phase]
+            after = result["timings"][phase]
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  SLOWER"
+                regressed = True
+            print(
+                f"{result['prims']:>8}  {phase:<34}{before:>9.3f}s{after:>9.3f}s{change:>+9.1%}{flag}"
+            )
+    return regressed
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Numbers of mesh objects"
+    )
+    parser.add_argument("--depth", type=int, default=2, help="Levels of group prims")
+    parser.add_argument("--vertices", type=int, default=64, help="Vertices per mesh")
+    parser.add_argument("--materials", type=int, default=4, help="Number of materials")
+    parser.add_argument("--time-samples", type=int, default=0, help="Animated samples per object")
+    parser.add_argument(
+        "--modify", type=float, default=0.1, help="Fraction of objects moved before export"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size, the fastest is kept")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="JSON file to write the results to, defaults to a timestamped file in benchmarks/results",
+    )
+    parser.add_argument("--compare", type=Path, default=None, help="Results of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown against --compare that counts as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes,
+        depth=args.depth,
+        num_vertices=args.vertices,
+        num_materials=args.materials,
+        num_time_samples=args.time_samples,
+        modify_fraction=args.modify,
+        repeat=args.repeat,
+    )
+
+    output = args.output
+    if not output:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR.joinpath(f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to '{output}'")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            if compare_results(json.load(baseline_file), results, args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+from pxr import Sdf, Usd, Vt
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import logging
+from . import instrumentation
+from . import layer_format
+from .utils import compare_usd_values
+
+# Overrides and new prims found while diffing are collected here instead of being authored one
+# by one, each of which would send change notices and recompose the override stage. The whole
+# change set is written straight into the override layer inside a single Sdf.ChangeBlock.
+# Change sets can be saved to disk and loaded again, so the changes of an export can be
+# reviewed before they are published and published without diffing again.
+
+# customLayerData key of a saved change set, holding its library and new prim paths
+CHANGE_SET_KEY = "usdConnectChangeSet"
+
+logger = logging.getLogger(__name__)
+
+
+def define_ancestors(
+    layer: Sdf.Layer, prim_path: Sdf.Path, source_stage: Optional[Usd.Stage] = None
+) -> None:
+    """Author def on the ancestors of a new prim that aren't defined in the source, like Usd.Stage.DefinePrim.
+
+    Sdf.CreatePrimInLayer creates missing ancestors as overs, which aren't traversed or rendered.
+    """
+    for ancestor_path in prim_path.GetParentPath().GetPrefixes():
+        if source_stage:
+            source_prim = source_stage.GetPrimAtPath(ancestor_path)
+            if source_prim and source_prim.IsDefined():
+                continue
+        ancestor_spec = Sdf.CreatePrimInLayer(layer, ancestor_path)
+        ancestor_spec.specifier = Sdf.SpecifierDef
+
+
+class TimeSampledValue(NamedTuple):
+    """Value of an animated attribute, its default along with its time samples."""
+
+    default: Any
+    time_samples: Dict[float, Any]
+
+    @classmethod
+    def from_value(cls, value: Any) -> "TimeSampledValue":
+        """Wrap a default value without time samples, values already time sampled are returned as is."""
+        if isinstance(value, cls):
+            return value
+        return cls(value, {})
+
+
+def compare_property_values(src_value: Any, trg_value: Any, tolerance: Optional[float]) -> bool:
+    """Compare two property values along with their time samples, if either is a TimeSampledValue."""
+    if not isinstance(src_value, TimeSampledValue) and not isinstance(
+        trg_value, TimeSampledValue
+    ):
+        return compare_usd_values(src_value, trg_value, tolerance=tolerance)
+
+    src_value = TimeSampledValue.from_value(src_value)
+    trg_value = TimeSampledValue.from_value(trg_value)
+    if src_value.time_samples.keys() != trg_value.time_samples.keys():
+        return False
+    if not compare_usd_values(src_value.default, trg_value.default, tolerance=tolerance):
+        return False
+    return all(
+        compare_usd_values(src_sample, trg_value.time_samples[time], tolerance=tolerance)
+        for time, src_sample in src_value.time_samples.items()
+    )
+
+
+class PropertyOverride(NamedTuple):
+    name: str
+    value: Any
+    # Value type of attributes, None for relationships whose value is a list of target paths
+    type_name: Optional[Sdf.ValueTypeName]
+    variability: Sdf.Variability = Sdf.VariabilityVarying
+    custom: bool = False
+    # Time samples of animated attributes, authored along with the default value
+    time_samples: Optional[Dict[float, Any]] = None
+
+
+def author_property(override_spec: Sdf.PrimSpec, override: PropertyOverride) -> None:
+    """Author an override on a prim spec, creating the property with the source's type if needed."""
+    if override.type_name is None:
+        override_prop = override_spec.relationships.get(override.name)
+        if not override_prop:
+            override_prop = Sdf.RelationshipSpec(
+                override_spec, override.name, override.custom
+            )
+        override_prop.targetPathList.ClearEditsAndMakeExplicit()
+        override_prop.targetPathList.explicitItems = override.value
+        return
+
+    override_prop = override_spec.attributes.get(override.name)
+    if not override_prop:
+        override_prop = Sdf.AttributeSpec(
+            override_spec,
+            override.name,
+            override.type_name,
+            override.variability,
+            override.custom,
+        )
+    if override.value is not None:
+        override_prop.default = override.value
+    for time, value in (override.time_samples or {}).items():
+        override_spec.layer.SetTimeSample(override_prop.path, time, value)
+
+
+def read_property_override(prop_spec: Sdf.PropertySpec) -> PropertyOverride:
+    """Read an override authored by author_property back from its property spec."""
+    if isinstance(prop_spec, Sdf.RelationshipSpec):
+        return PropertyOverride(
+            prop_spec.name,
+            list(prop_spec.targetPathList.explicitItems),
+            None,
+            custom=prop_spec.custom,
+        )
+    time_samples = None
+    if prop_spec.HasInfo("timeSamples"):
+        time_samples = dict(prop_spec.GetInfo("timeSamples"))
+    return PropertyOverride(
+        prop_spec.name,
+        prop_spec.default,
+        prop_spec.typeName,
+        prop_spec.variability,
+        prop_spec.custom,
+        time_samples,
+    )
+
+
+class ChangeSet:
+    """Property overrides and new prims of one library, authored together by author_into.
+
+    Property values are kept as the Vt values read from the Blender export and new prims as
+    references to the layer holding their specs, nothing is copied until the set is authored.
+    """
+
+    __slots__ = ("library_name", "overrides", "new_prims")
+
+    def __init__(self, library_name: str = "") -> None:
+        self.library_name: str = library_name
+        # Overrides keyed by prim path, in the order the prims were diffed
+        self.overrides: Dict[Sdf.Path, List[PropertyOverride]] = {}
+        # Layer and path of each prim copied as a whole, eg. prims added in Blender
+        self.new_prims: List[Tuple[Sdf.Layer, Sdf.Path]] = []
+
+    def add_overrides(
+        self, prim_path: Sdf.Path, overrides: List[PropertyOverride]
+    ) -> None:
+        """Queue overrides of a prim, like Usd.Stage.OverridePrim no over is authored without any."""
+        if overrides:
+            self.overrides.setdefault(prim_path, []).extend(overrides)
+
+    def add_new_prim(self, src_layer: Sdf.Layer, prim_path: Sdf.Path) -> None:
+        """Queue copying a prim spec that doesn't exist in the source, along with its descendants."""
+        self.new_prims.append((src_layer, prim_path))
+
+    def get_num_overrides(self) -> int:
+        return sum(len(overrides) for overrides in self.overrides.values())
+
+    def get_summary(self) -> Dict[str, int]:
+        """Count the changed prims, changed properties and new prims, eg. to report a preview."""
+        return {
+            "changed_prims": len(self.overrides),
+            "changed_properties": self.get_num_overrides(),
+            "new_prims": len(self.new_prims),
+        }
+
+    def write(self, layer: Sdf.Layer, source_stage: Optional[Usd.Stage] = None) -> int:
+        """Write all queued overrides and new prims into the layer, sending change notices once.
+
+        Args:
+            layer (Sdf.Layer): Layer to write into
+            source_stage (Optional[Usd.Stage]): Source the layer overrides, ancestors of new prims
+                defined in it are left as overs. Without it all their ancestors are defined
+
+        Returns:
+            int: Number of new prims copied
+        """
+        num_created = 0
+        with Sdf.ChangeBlock():
+            for prim_path, overrides in self.overrides.items():
+                override_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+                for override in overrides:
+                    author_property(override_spec, override)
+
+            for src_layer, prim_path in self.new_prims:
+                define_ancestors(layer, prim_path, source_stage)
+                Sdf.CreatePrimInLayer(layer, prim_path)
+                try:
+                    Sdf.CopySpec(src_layer, prim_path, layer, prim_path)
+                except Exception as e:
+                    logger.error("Error copying spec for new prim %s: %s", prim_path, e)
+                    continue
+                num_created += 1
+                logger.info("PRIM: Created New Prim: %s", prim_path)
+        return num_created
+
+    def author_into(
+        self, override_layer: Sdf.Layer, source_stage: Optional[Usd.Stage] = None
+    ) -> None:
+        """Author the change set into the override layer of its library, see write."""
+        num_created = self.write(override_layer, source_stage)
+        instrumentation.count(instrumentation.OVERRIDES_AUTHORED, self.get_num_overrides())
+        instrumentation.count(instrumentation.PRIMS_CREATED, num_created)
+
+    def save(self, file_path: str) -> str:
+        """Save the change set as a layer, which can be reviewed in any USD tool.
+
+        Overrides are stored as overs and new prims are copied in full, the library and the paths
+        of the new prims are kept in the layer's customLayerData.
+
+        Returns:
+            str: The file format written, see layer_format.save_layer
+        """
+        layer = Sdf.Layer.CreateAnonymous()
+        self.write(layer)
+        layer.customLayerData = {
+            CHANGE_SET_KEY: {
+                "library": self.library_name,
+                "newPrims": Vt.StringArray(
+                    [str(prim_path) for _, prim_path in self.new_prims]
+                ),
+            }
+        }
+        return layer_format.save_layer(layer, file_path, "AUTO")
+
+    @classmethod
+    def load(cls, file_path: str) -> "ChangeSet":
+        """Load a change set saved with save, raises ValueError if the file isn't one."""
+        layer = Sdf.Layer.OpenAsAnonymous(file_path)
+        if not layer or CHANGE_SET_KEY not in layer.customLayerData:
+            raise ValueError(f"'{file_path}' is not a USD Connect change set")
+        data = layer.customLayerData[CHANGE_SET_KEY]
+
+        change_set = cls(data.get("library", ""))
+        new_prim_paths = [Sdf.Path(prim_path) for prim_path in data.get("newPrims", [])]
+        change_set.new_prims = [(layer, prim_path) for prim_path in new_prim_paths]
+        new_prim_path_set = set(new_prim_paths)
+
+        # Everything outside of the new prims are overrides
+        stack = list(reversed(layer.rootPrims))
+        while stack:
+            prim_spec = stack.pop()
+            if prim_spec.path in new_prim_path_set:
+                continue
+            change_set.add_overrides(
+                prim_spec.path,
+                [read_property_override(prop_spec) for prop_spec in prim_spec.properties],
+            )
+            stack.extend(reversed(prim_spec.nameChildren))
+        return change_set
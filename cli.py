@@ -0,0 +1,152 @@
+"""Headless batch publishing of USD override layers from many .blend files.
+
+Runs with the `bpy` PIP package, with the directory containing this add-on on the Python path:
+
+    python -m usd_connector.cli manifest.json --workers 8 --summary summary.json
+
+The manifest is a JSON list of jobs (or an object with a "jobs" list), each job being:
+
+    {"blend": "shot_010.blend", "library": "set.usda", "output": "layer_set.usda"}
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+
+import bpy
+
+
+def _init_worker() -> None:
+    # Register the add-on once per worker, the interpreter is reused for all its jobs
+    importlib.import_module(__package__).register()
+
+
+def load_manifest(manifest_path: Path) -> List[Dict[str, str]]:
+    """Load publishing jobs from a manifest file.
+
+    Args:
+        manifest_path (Path): JSON file listing jobs with "blend", "library" and "output" keys
+
+    Returns:
+        List[Dict[str, str]]: Jobs to run, relative paths resolved against the manifest's directory
+    """
+    with open(manifest_path) as manifest_file:
+        data = json.load(manifest_file)
+
+    jobs = data["jobs"] if isinstance(data, dict) else data
+    for job in jobs:
+        for key in ("blend", "library", "output"):
+            if key not in job:
+                raise ValueError(f"Job {job} is missing '{key}'")
+        for key in ("blend", "output"):
+            job[key] = manifest_path.parent.joinpath(job[key]).as_posix()
+    return jobs
+
+
+def run_job(job: Dict[str, str]) -> Dict[str, Any]:
+    """Open a .blend file and export the override layer of one of its libraries.
+
+    Returns:
+        Dict[str, Any]: The job along with its "status", "seconds", the "instrumentation"
+            summary of its phases and counters, or the "error" if it failed
+    """
+    from . import core, instrumentation
+
+    result: Dict[str, Any] = dict(job)
+    start = time.perf_counter()
+    try:
+        bpy.ops.wm.open_mainfile(filepath=job["blend"])
+
+        library = bpy.context.scene.usd_connect_libraries.get(job["library"])
+        if not library:
+            raise ValueError(f"USD Library '{job['library']}' not found in {job['blend']}")
+
+        instrumentation.reset()
+        with instrumentation.span("export_usd_layer", filepath=job["output"]):
+            core.export_usd_layer(Path(job["output"]), library=library)
+        result["status"] = "ok"
+        result["instrumentation"] = instrumentation.to_dict()
+    except Exception:
+        result["status"] = "failed"
+        result["error"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def get_failed_result(job: Dict[str, str], exc: BaseException, seconds: float) -> Dict[str, Any]:
+    """Get the result of a job whose worker process failed before returning one."""
+    result: Dict[str, Any] = dict(job)
+    result["status"] = "failed"
+    result["error"] = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    result["seconds"] = seconds
+    return result
+
+
+def run_jobs(jobs: List[Dict[str, str]], workers: int) -> Dict[str, Any]:
+    """Run publishing jobs across a pool of worker processes.
+
+    Args:
+        jobs (List[Dict[str, str]]): Jobs to run, see load_manifest
+        workers (int): Number of worker processes
+
+    Returns:
+        Dict[str, Any]: Machine readable summary with per job results and totals,
+            jobs whose worker process crashed are reported as failed
+    """
+    start = time.perf_counter()
+    # Spawn fresh interpreters, bpy doesn't support being forked
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=_init_worker
+    ) as executor:
+        futures = {executor.submit(run_job, job): index for index, job in enumerate(jobs)}
+        results: List[Dict[str, Any]] = [{} for _ in jobs]
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as exc:
+                # The worker crashed or the pool broke, run_job itself never raises
+                results[index] = get_failed_result(jobs[index], exc, time.perf_counter() - start)
+
+    return {
+        "jobs": results,
+        "succeeded": sum(result["status"] == "ok" for result in results),
+        "failed": sum(result["status"] != "ok" for result in results),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", type=Path, help="JSON manifest of publishing jobs")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--summary",
+        type=Path,
+        default=None,
+        help="Write the JSON summary to this file instead of stdout",
+    )
+    args = parser.parse_args(argv)
+
+    summary = run_jobs(load_manifest(args.manifest), args.workers)
+
+    if args.summary:
+        with open(args.summary, "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
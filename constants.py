@@ -3,22 +3,41 @@ import bpy
 # TODO Verify all types that should be supported
 # TODO Espcially cube, and other special types in USD
 
+# Name of the bpy.data collection holding the data block for each prim type
+PRIM_TO_DATABLOCK_COLLECTION = {
+    "Mesh": "meshes",
+    "Xform": "objects",
+    "Camera": "cameras",
+    "Light": "lights",
+    "SphereLight": "lights",
+    "DistantLight": "lights",
+    "DiskLight": "lights",
+    "CylinderLight": "lights",
+    "RectLight": "lights",
+    "BasisCurves": "curves",
+    "NurbsCurves": "curves",
+    "Points": "pointclouds",
+    "Volume": "volumes",
+    "Material": "materials",
+}
+
+# bpy.data collections of object data, which Blender exports once under every object using it
+SHARED_DATABLOCK_COLLECTIONS = [
+    "meshes",
+    "materials",
+    "lights",
+    "cameras",
+    "curves",
+    "pointclouds",
+    "volumes",
+]
+
+# bpy.data collections whose library data blocks are replaced by their reimported version on refresh
+REFRESH_REMAP_COLLECTIONS = ["objects", "meshes", "materials", "lights", "cameras"]
+
     
 def get_datablock_type(prim_type:str) -> list[str]:
-    prim_to_data_block_types = {
-        "Mesh": bpy.data.meshes,
-        "Xform": bpy.data.objects,
-        "Camera": bpy.data.cameras,
-        "Light": bpy.data.lights,
-        "SphereLight": bpy.data.lights,
-        "DistantLight": bpy.data.lights,
-        "DiskLight": bpy.data.lights,
-        "CylinderLight": bpy.data.lights,
-        "RectLight": bpy.data.lights,
-        "BasisCurves": bpy.data.curves,
-        "NurbsCurves": bpy.data.curves,
-        "Points": bpy.data.pointclouds,
-        "Volume": bpy.data.volumes,
-        "Material": bpy.data.materials
-    }
-    return prim_to_data_block_types.get(prim_type, None)
\ No newline at end of file
+    collection_name = PRIM_TO_DATABLOCK_COLLECTION.get(prim_type)
+    if collection_name:
+        return getattr(bpy.data, collection_name)
+    return None
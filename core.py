@@ -5,52 +5,96 @@ from pathlib import Path
 bpy.utils.expose_bundled_modules()
 
 from pxr import Usd, UsdGeom, Sdf, Gf
-from typing import List, Any, Union
+from typing import Callable, Iterable, Iterator, List, Any, NamedTuple, Tuple, Union
 from . import constants
 import math
 import os
 import shutil
 import tempfile
 import contextlib
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
 from bpy.types import Object, ViewLayer
 from .prim_transfer import PrimTransfer
+from .change_set import ChangeSet
+from . import layer_diff
+from . import prim_hash
+from . import dirty_tracking
+from . import parallel_diff
+from . import instrumentation
+from . import snapshot_store
+from . import library_index
+from . import stage_cache
+from . import mesh_fingerprint
+from . import layer_format
+from .property_filter import DEFAULT_PROPERTY_FILTER, PropertyFilter, PropertyRule, compile_rules
+
+logger = logging.getLogger(__name__)
 
 ###############################################################
 # Export / Import Operations
 ###############################################################
-def import_usd_reference(ref_file_path: str, ref_stage=None):
+def import_usd_reference(ref_file_path: str, ref_stage=None, prim_path_mask: str = ""):
     """Import a USD reference file and set up the library and prim mappings.
 
+    Importing a file that is already a library of the scene updates that library,
+    any other file is added as a new library next to the existing ones.
+
+    Args:
+        prim_path_mask (str): Comma separated prim paths, only these prims, their descendants
+            and their ancestors are imported. Imports all prims if empty
+
     NOTE: Must be called with hook registered, similar to direct operator call"""
     if not ref_stage:
         ref_stage = ref_file_path
 
     ref_pathlib = Path(ref_file_path)
-    libraries = bpy.context.scene.usd_connect_libraries
-
-    # TODO Due to exporter limitations we only support one library for now
-    libraries.clear()
-    library = libraries.add()
+    library = get_or_add_library(ref_file_path)
 
-    # Setup Basic Library Info
-    library.name = ref_pathlib.name
-    library.ref_file_path = ref_file_path
+    # Snapshot Path is set once the snapshot is stored, see wait_for_snapshot
+    library.snapshot_file_path = ""
+    start_snapshot(library)
 
-    # Set Snapshot Path
-    snapshot_dir = ref_pathlib.parent.joinpath("usd_snapshots")
-    library.snapshot_file_path = snapshot_dir.joinpath(
-        "snapshot_" + ref_pathlib.name
-    ).as_posix()
-
-    # Set Export Path
+    # Set Export Path, the extension allows writing the layer in any format
     library.export_path = ref_pathlib.parent.joinpath(
-        "layer_" + ref_pathlib.name
+        layer_format.get_layer_file_name("layer_" + ref_pathlib.stem)
     ).as_posix()
 
-    with override_usd_session_state(active=True):
-        bpy.ops.wm.usd_import("EXEC_DEFAULT", filepath=ref_stage)
+    with override_usd_session_state(active=True, libraries=[library]):
+        with instrumentation.span("blender_import", filepath=str(ref_stage)):
+            bpy.ops.wm.usd_import(
+                "EXEC_DEFAULT", filepath=ref_stage, prim_path_mask=prim_path_mask
+            )
+    library_index.invalidate()
 
-    bpy.app.timers.register(import_create_usd_snapshot, first_interval=1.0)
+    # Changes are tracked from the state of the import onwards
+    dirty_tracking.reset(library.name)
+
+
+def get_or_add_library(ref_file_path: str) -> bpy.types.PropertyGroup:
+    """Get the library of the scene imported from the given file, adding one if there is none.
+
+    New libraries are named after the file, with a numeric suffix if another file of the
+    same name was already imported from a different directory.
+    """
+    libraries = bpy.context.scene.usd_connect_libraries
+    for library in libraries:
+        if library.ref_file_path == ref_file_path:
+            return library
+
+    ref_pathlib = Path(ref_file_path)
+    name = ref_pathlib.name
+    suffix = 1
+    while name in libraries:
+        name = f"{ref_pathlib.stem}_{suffix}{ref_pathlib.suffix}"
+        suffix += 1
+
+    # NOTE Adding to the collection invalidates references to its other items
+    library = libraries.add()
+    library.name = name
+    library.ref_file_path = ref_file_path
+    return library
 
 
 def export_usd_layer(
@@ -58,35 +102,255 @@ def export_usd_layer(
     selected_objects_only: bool = False,
     session_active: bool = True,
     session_refresh: bool = False,
-) -> None:
-    """Export the current scene to a USD file and generate overrides for the current library.
+    session_incremental: bool = False,
+    library: bpy.types.PropertyGroup | None = None,
+) -> int:
+    """Export the current scene to a USD file and generate overrides for a library.
 
-    NOTE: Must be called with hook registered, similar to direct operator call"""
+    NOTE: Must be called with hook registered, similar to direct operator call
 
-    library = bpy.context.scene.usd_connect_libraries[0]
+    Args:
+        library (bpy.types.PropertyGroup | None): Library to generate overrides for,
+            defaults to the only library of the scene
+
+    Returns:
+        int: Bytes of the intermediate export kept out of the target directory, see library.export_staging
+    """
+    if library is None:
+        library = get_default_library()
 
     # Store Actual Export Path in Library
     library.export_path = target_filepath.as_posix()
 
-    # Pass Temp Path to Operator, to generate full USD file first
-    # Hook will execute to generate override file at target filepath
-    tmp_filepath = target_filepath.parent.joinpath("tmp_" + target_filepath.name)
+    return export_usd_layers(
+        [library],
+        selected_objects_only=selected_objects_only,
+        session_active=session_active,
+        session_refresh=session_refresh,
+        session_incremental=session_incremental,
+    )
 
-    with override_usd_session_state(active=session_active, refresh=session_refresh):
 
-        bpy.ops.wm.usd_export(
-            filepath=tmp_filepath.as_posix(),
-            selected_objects_only=selected_objects_only,
-        )
+def export_usd_layers(
+    libraries: List[bpy.types.PropertyGroup],
+    selected_objects_only: bool = False,
+    session_active: bool = True,
+    session_refresh: bool = False,
+    session_incremental: bool = False,
+    session_dry_run: bool = False,
+) -> int:
+    """Export the current scene to USD once and generate the override layer of each library from it.
+
+    Each library's overrides are written to its export_path. The libraries are diffed concurrently,
+    see hook_export_overrides. If the scene is unchanged since the libraries were previewed, their
+    change sets are written instead, without exporting or diffing again, see preview_usd_layers.
+
+    NOTE: Must be called with hook registered, similar to direct operator call
+
+    Returns:
+        int: Bytes of the intermediate export kept out of the target directories, see library.export_staging
+    """
+    # Previews export and diff the whole scene, so only a full export can publish them
+    if (
+        session_active
+        and not session_refresh
+        and not session_dry_run
+        and not session_incremental
+        and not selected_objects_only
+    ):
+        change_sets = take_pending_change_sets(libraries)
+        if change_sets:
+            publish_change_sets(libraries, change_sets)
+            for library in libraries:
+                dirty_tracking.reset(library.name, export_path=library.export_path)
+            return 0
+
+    # The intermediate export is staged according to the first library
+    first_library = libraries[0]
+    target_filepath = Path(first_library.export_path)
+
+    # Pass Temp Path to Operator, to generate full USD file first
+    # Hook will execute to generate override files at the library export paths
+    staging_dir = None
+    export_options = {}
+    if first_library.export_staging == "MEMORY":
+        staging_dir = Path(tempfile.mkdtemp(prefix="usd_export_", dir=get_memory_temp_dir()))
+        tmp_filepath = staging_dir.joinpath("tmp_" + target_filepath.name)
+        # Relative asset paths would point from the staging directory
+        export_options["relative_paths"] = False
+    else:
+        tmp_filepath = target_filepath.parent.joinpath("tmp_" + target_filepath.name)
+
+    with override_usd_session_state(
+        active=session_active,
+        refresh=session_refresh,
+        incremental=session_incremental,
+        libraries=libraries,
+        dry_run=session_dry_run,
+    ):
+
+        # Includes generating overrides, which runs in the export hook
+        with instrumentation.span("blender_export", filepath=tmp_filepath.as_posix()):
+            bpy.ops.wm.usd_export(
+                filepath=tmp_filepath.as_posix(),
+                selected_objects_only=selected_objects_only,
+                **export_options,
+            )
 
     # Delete Temp File after Layer is generated
-    if tmp_filepath.exists():
+    bytes_saved = 0
+    if staging_dir:
+        bytes_saved = get_directory_size(staging_dir)
+        shutil.rmtree(staging_dir)
+        logger.info("Kept %d bytes of export I/O out of '%s'", bytes_saved, target_filepath.parent)
+    elif tmp_filepath.exists():
         tmp_filepath.unlink()
 
+    # Following exports only need to cover what changed after this one
+    if session_active and not session_refresh and not session_dry_run:
+        for library in libraries:
+            dirty_tracking.reset(library.name, export_path=library.export_path)
+
+    return bytes_saved
+
 
-def import_create_usd_snapshot():
-    library = bpy.context.scene.usd_connect_libraries[-1]
-    shutil.copy(library.ref_file_path, library.snapshot_file_path)
+def export_usd_layer_incremental(
+    target_filepath: Path, library: bpy.types.PropertyGroup | None = None
+) -> int:
+    """Export only data blocks changed since the last export and merge their overrides
+    into the existing layer at the target filepath.
+
+    Falls back to a full export if changes weren't tracked since the last export to this file.
+
+    NOTE: Must be called with hook registered, similar to direct operator call"""
+    if library is None:
+        library = get_default_library()
+
+    if not dirty_tracking.can_export_incremental(
+        library.name, target_filepath.as_posix()
+    ):
+        return export_usd_layer(target_filepath, library=library)
+
+    dirty_objects = dirty_tracking.get_dirty_objects(library.name, bpy.context.scene)
+    if not dirty_objects:
+        logger.info("No changes to export for library '%s'", library.name)
+        return 0
+
+    with override_object_selection(
+        objects=dirty_objects, view_layer=bpy.context.view_layer
+    ):
+        return export_usd_layer(
+            target_filepath,
+            selected_objects_only=True,
+            session_incremental=True,
+            library=library,
+        )
+
+
+##############################################################
+# Snapshots
+##############################################################
+
+# Snapshots are created on a worker thread while Blender imports the source,
+# pending snapshots are keyed by library name
+_snapshot_executor: ThreadPoolExecutor | None = None
+_snapshot_futures: dict[str, Future] = {}
+
+
+def import_create_usd_snapshot(ref_file_path: str, referrer: str) -> str:
+    """Store the snapshot of a source along with its prim hashes.
+
+    NOTE: Runs on the snapshot worker thread, so it must not access any Blender data
+
+    Args:
+        ref_file_path (str): Source file of the library
+        referrer (str): User of the snapshot, see snapshot_store.store_snapshot
+
+    Returns:
+        str: Path of the stored snapshot
+    """
+    with instrumentation.span("store_snapshot", filepath=ref_file_path):
+        snapshot = snapshot_store.store_snapshot(
+            ref_file_path,
+            Path(ref_file_path).parent.joinpath("usd_snapshots"),
+            referrer=referrer,
+        )
+    snapshot_file_path = snapshot.path.as_posix()
+
+    # Store prim hashes next to the snapshot, so export can skip unchanged prims
+    with instrumentation.span("hash_snapshot"):
+        hash_file_path = prim_hash.get_hash_file_path(snapshot_file_path)
+        hashes = None
+        if snapshot.reused:
+            hashes = prim_hash.load_prim_hashes(hash_file_path, snapshot_file_path)
+        if hashes is None:
+            snapshot_stage = Usd.Stage.Open(snapshot_file_path)
+            hashes = prim_hash.compute_prim_hashes(snapshot_stage)
+        prim_hash.save_prim_hashes(
+            hashes,
+            hash_file_path,
+            valid_for=[ref_file_path, snapshot_file_path],
+        )
+    return snapshot_file_path
+
+
+def start_snapshot(library: bpy.types.PropertyGroup) -> Future:
+    """Start creating the snapshot of a library's source in the background.
+
+    Returns:
+        Future: Resolves to the snapshot's path, see wait_for_snapshot
+    """
+    global _snapshot_executor
+    if _snapshot_executor is None:
+        _snapshot_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="usd_connect_snapshot"
+        )
+
+    referrer = snapshot_store.get_referrer(bpy.data.filepath, library.name)
+    future = _snapshot_executor.submit(
+        import_create_usd_snapshot, library.ref_file_path, referrer
+    )
+    _snapshot_futures[library.name] = future
+
+    # Store the path as soon as Blender is idle, in case nothing waits for it before saving
+    if not bpy.app.timers.is_registered(apply_finished_snapshots):
+        bpy.app.timers.register(apply_finished_snapshots, first_interval=0.1)
+    return future
+
+
+def get_snapshot_future(library: bpy.types.PropertyGroup) -> Future | None:
+    """Get the pending snapshot of a library, None if its snapshot was already stored."""
+    return _snapshot_futures.get(library.name)
+
+
+def wait_for_snapshot(library: bpy.types.PropertyGroup) -> None:
+    """Block until the library's snapshot is stored and set its snapshot_file_path.
+
+    Raises the snapshot's exception if creating it failed.
+    """
+    future = _snapshot_futures.pop(library.name, None)
+    if future is None:
+        return
+    with instrumentation.span("wait_for_snapshot"):
+        library.snapshot_file_path = future.result()
+
+
+def apply_finished_snapshots() -> float | None:
+    pending = False
+    for library in bpy.context.scene.usd_connect_libraries:
+        future = get_snapshot_future(library)
+        if not future:
+            continue
+        if not future.done():
+            pending = True
+            continue
+        try:
+            wait_for_snapshot(library)
+        except Exception as e:
+            logger.error("Failed to create snapshot of '%s': %s", library.ref_file_path, e)
+
+    # Keep polling while snapshots are pending
+    return 0.1 if pending else None
 
 
 ##############################################################
@@ -94,23 +358,64 @@ def import_create_usd_snapshot():
 ##############################################################
 
 
-def refresh_usd_library() -> Path:
-    workspace = Path(tempfile.mkdtemp(prefix="usd_refresh_"))
-    refresh_export_usd_layer(workspace)
+def refresh_usd_library(
+    incremental: bool = True, library_names: List[str] | None = None
+) -> None:
+    """Refresh the given libraries of the scene, all of them by default."""
+    if library_names is None:
+        library_names = [library.name for library in bpy.context.scene.usd_connect_libraries]
+    for library_name in library_names:
+        workspace = Path(tempfile.mkdtemp(prefix="usd_refresh_"))
+        refresh_export_usd_layer(
+            workspace, incremental=incremental, library_name=library_name
+        )
 
 
-def refresh_export_usd_layer(tmp_dir: Path) -> None:
+def refresh_export_usd_layer(
+    tmp_dir: Path, incremental: bool = True, library_name: str | None = None
+) -> functools.partial | None:
     """Import a USD reference file and set up the library and prim mappings.
 
     Args:
-        source_filepath (str): The file path of the source USD file to be used for overriding.
-        file_to_load (str | None, optional): Override the USD file to load. Defaults to None.
+        tmp_dir (Path): Directory for the intermediate export, removed once the refresh is done
+        incremental (bool): Only reexport and reimport the prims whose upstream content changed
+            since the snapshot. Falls back to a full refresh if the snapshot's hashes are missing
+        library_name (str | None): Library to refresh, defaults to the only library of the scene
+
+    Returns:
+        functools.partial | None: The reimport registered as a timer, None if nothing changed upstream
     """
-    library = bpy.context.scene.usd_connect_libraries[0]
+    if library_name is None:
+        library = get_default_library()
+    else:
+        library = bpy.context.scene.usd_connect_libraries[library_name]
+    wait_for_snapshot(library)
+
+    changed_roots = None
+    if incremental:
+        with instrumentation.span("diff_upstream"):
+            changed_roots = get_upstream_changes(library)
+
+    if changed_roots is not None and not changed_roots:
+        logger.info("Library '%s' is up to date, nothing to refresh", library.name)
+        shutil.rmtree(tmp_dir)
+        return None
 
     library_objects = get_library_objects(library)
+    prim_path_mask = ""
+    if changed_roots is not None:
+        logger.info(
+            "Refreshing %d changed subtrees of library '%s'", len(changed_roots), library.name
+        )
+        library_objects = get_objects_in_subtrees(library_objects, set(changed_roots))
+        prim_path_mask = ",".join(
+            str(path)
+            for path in get_refresh_prim_mask(
+                stage_cache.open_stage(library.ref_file_path), changed_roots
+            )
+        )
 
-    export_path = tmp_dir.joinpath("refresh_export.usda")
+    export_path = tmp_dir.joinpath(layer_format.get_layer_file_name("refresh_export"))
 
     # Create an export aginst the snapshot file as opposed to the actual source file
     # This way we can detect what changed since the last refresh and later
@@ -120,12 +425,13 @@ def refresh_export_usd_layer(tmp_dir: Path) -> None:
     with override_library_filepaths(library, library.snapshot_file_path):
         with override_object_selection(
             objects=library_objects, view_layer=bpy.context.view_layer
-        ):
+        ), instrumentation.span("refresh_export"):
             export_usd_layer(
                 export_path,
                 selected_objects_only=True,
                 session_active=True,
                 session_refresh=True,
+                library=library,
             )
 
     export_stage = Usd.Stage.Open(export_path.as_posix())
@@ -135,227 +441,1130 @@ def refresh_export_usd_layer(tmp_dir: Path) -> None:
     export_stage.Save()
 
     # Use timer to chain operators together and properly refresh depsgraph
-    bpy.app.timers.register(lambda: refresh_library_import(tmp_dir))
+    # Libraries are passed by name, references to them don't survive adding libraries
+    reimport = functools.partial(
+        refresh_library_import, tmp_dir, changed_roots, prim_path_mask, library.name
+    )
+    bpy.app.timers.register(reimport)
+    return reimport
+
+
+def refresh_library_import(
+    tmp_dir: Path,
+    changed_roots: List[Sdf.Path] | None = None,
+    prim_path_mask: str = "",
+    library_name: str | None = None,
+) -> None:
+    """Reimport the library with the refreshed overrides, replacing the previously imported data blocks.
 
+    Args:
+        tmp_dir (Path): Directory of the refresh export, removed once done
+        changed_roots (List[Sdf.Path] | None): Only replace data blocks of prims in these subtrees,
+            None replaces all data blocks of the library
+        prim_path_mask (str): Prims to reimport, see import_usd_reference
+        library_name (str | None): Library to reimport, defaults to the only library of the scene
+    """
+    if library_name is None:
+        library = get_default_library()
+    else:
+        library = bpy.context.scene.usd_connect_libraries[library_name]
+    changed_root_set = set(changed_roots) if changed_roots is not None else None
+
+    # Rename old data blocks, so the reimported ones get their original names
+    old_datablocks = {}
+    kept_datablocks = {}
+    for collection_name in constants.REFRESH_REMAP_COLLECTIONS:
+        old_datablocks[collection_name] = []
+        kept_datablocks[collection_name] = []
+        for data_block in get_library_datablocks(library, collection_name):
+            if changed_root_set is None or is_in_subtrees(
+                data_block.usd_connect_props.prim_path, changed_root_set
+            ):
+                data_block.name = "OLD_" + data_block.name
+                old_datablocks[collection_name].append(data_block)
+            else:
+                kept_datablocks[collection_name].append(data_block)
+
+    with override_usd_session_state(active=True), instrumentation.span("refresh_import"):
+        import_usd_reference(
+            library.ref_file_path, library.export_path, prim_path_mask=prim_path_mask
+        )
 
-def refresh_library_import(tmp_dir: Path) -> None:
-    """Remove all objects associated with a given library name"""
-    library = bpy.context.scene.usd_connect_libraries[-1]
+    with instrumentation.span("remap_datablocks"):
+        remap_stats = remap_library_datablocks(library, old_datablocks, kept_datablocks)
+    library_index.invalidate()
+
+    for collection_name, stats in remap_stats.items():
+        logger.info(
+            "Refreshed %s: %d remapped, %d created, %d removed",
+            collection_name,
+            stats.remapped,
+            stats.created,
+            stats.removed,
+        )
 
-    old_objs = []
-    for obj in bpy.context.scene.objects:
-        if obj.usd_connect_props.library_name == library.name:
-            obj.name = "OLD_" + obj.name
-            old_objs.append(obj)
+    shutil.rmtree(tmp_dir)
 
-    with override_usd_session_state(active=True):
-        import_usd_reference(library.ref_file_path, library.export_path)
 
-    new_objs = [
-        obj for obj in get_library_objects(library) if not obj.name.startswith("OLD_")
-    ]
+class RemapStats(NamedTuple):
+    """Number of reimported data blocks that replaced an old one, that are new and of old ones removed."""
 
-    # # Remap old objects to new objects based on root prim path
-    remap_dict = {}
-    unmapped_objs = []
-    for old_obj in old_objs:
-        matched = False
-        for new_obj in new_objs:
-            if (
-                old_obj.usd_connect_props.prim_path
-                == new_obj.usd_connect_props.prim_path
-            ):
-                remap_dict[old_obj] = new_obj
-                matched = True
-                break
-        if not matched:
-            unmapped_objs.append(old_obj)
+    remapped: int
+    created: int
+    removed: int
 
-    for old_obj, new_obj in remap_dict.items():
-        old_obj.user_remap(new_obj)
 
-    # Remove Unused Objects
-    for unmapped_obj in unmapped_objs:
-        bpy.data.objects.remove(unmapped_obj, do_unlink=True)
+def remap_library_datablocks(
+    library: bpy.types.PropertyGroup,
+    old_datablocks: dict[str, List[bpy.types.ID]],
+    kept_datablocks: dict[str, List[bpy.types.ID]] | None = None,
+) -> dict[str, RemapStats]:
+    """Replace old library data blocks with the reimported data blocks of the same prim.
 
-    shutil.rmtree(tmp_dir)
+    Users of each old data block are remapped to the new one found through a prim path index.
+    All old data blocks are then removed at once, those without a new counterpart included.
+
+    Args:
+        library (bpy.types.PropertyGroup): The reimported library
+        old_datablocks (dict[str, List[bpy.types.ID]]): Data blocks imported before the refresh,
+            keyed by their bpy.data collection name
+        kept_datablocks (dict[str, List[bpy.types.ID]] | None): Data blocks left out of a partial refresh.
+            Reimported copies of these, like ancestors of masked prims, are merged back into them
+
+    Returns:
+        dict[str, RemapStats]: Counts of remapped, created and removed data blocks per collection
+    """
+    remap_stats = {}
+    to_remove = []
+    for collection_name, old_items in old_datablocks.items():
+        kept_items = kept_datablocks.get(collection_name, []) if kept_datablocks else []
+        kept_index = {
+            data_block.usd_connect_props.prim_path: data_block for data_block in kept_items
+        }
+        existing_pointers = {
+            data_block.as_pointer() for data_block in old_items + kept_items
+        }
+
+        new_index = {}
+        for data_block in get_library_datablocks(library, collection_name):
+            if data_block.as_pointer() in existing_pointers:
+                continue
+            kept_data_block = kept_index.get(data_block.usd_connect_props.prim_path)
+            if kept_data_block:
+                data_block.user_remap(kept_data_block)
+                to_remove.append(data_block)
+            else:
+                new_index[data_block.usd_connect_props.prim_path] = data_block
+
+        num_remapped = 0
+        remapped_pointers = set()
+        for old_data_block in old_items:
+            new_data_block = new_index.get(old_data_block.usd_connect_props.prim_path)
+            if new_data_block:
+                old_data_block.user_remap(new_data_block)
+                remapped_pointers.add(new_data_block.as_pointer())
+                num_remapped += 1
+
+        to_remove.extend(old_items)
+        stats = RemapStats(
+            remapped=num_remapped,
+            created=len(new_index) - len(remapped_pointers),
+            removed=len(old_items) - num_remapped,
+        )
+        for field, value in stats._asdict().items():
+            instrumentation.count(f"{collection_name}_{field}", value)
+        remap_stats[collection_name] = stats
+
+    # Removing all at once avoids a full ID relations lookup per data block
+    bpy.data.batch_remove(to_remove)
+    return remap_stats
 
 
 ##############################################################
 # Hook Core Operations
 ##############################################################
-def hook_export_overrides(bl_stage: Usd.Stage, source_stage_path: str) -> None:
-    library = bpy.context.scene.usd_connect_libraries[0]
-    override_stage_path = library.export_path
+# Data blocks are identified by the bpy.data collection they live in and their name
+DatablockKey = tuple[str, str]
+
+
+class LibraryExport(NamedTuple):
+    """Everything needed to generate the overrides of one library, read from Blender up front
+    so libraries can be diffed on worker threads, see get_library_export."""
+
+    name: str
+    source_stage_path: str
+    snapshot_file_path: str
+    override_path: str
+    diff_mode: str
+    diff_workers: int
+    layer_format: str
+    refresh: bool
+    # Source prim path of each data block imported from the library
+    source_paths: dict[DatablockKey, Sdf.Path]
+    # Blender prims this library's layer defines if they are new, None for all of them
+    owned_paths: set[Sdf.Path] | None = None
+    # Only prims with these source paths are diffed, None for all of them
+    dirty_prim_paths: set[Sdf.Path] | None = None
+    # Of the dirty prims, those whose changes can only affect properties with these prefixes
+    dirty_property_prefixes: dict[Sdf.Path, tuple[str, ...]] | None = None
+    # Parts of each mesh data block left unedited since import, keyed by mesh name
+    unchanged_mesh_parts: dict[str, frozenset[str]] | None = None
+    # Compiled property rules of the library
+    property_filter: PropertyFilter = DEFAULT_PROPERTY_FILTER
+    # Store the changes as a change set instead of writing the override layer, see preview_usd_layers
+    dry_run: bool = False
+    # Settings the overrides were generated with, see get_export_settings_key
+    settings_key: tuple = ()
+
+
+def get_library_export(
+    library: bpy.types.PropertyGroup,
+    source_paths: dict[DatablockKey, Sdf.Path] | None = None,
+    owned_paths: set[Sdf.Path] | None = None,
+    dirty_prim_paths: set[Sdf.Path] | None = None,
+    dirty_property_prefixes: dict[Sdf.Path, tuple[str, ...]] | None = None,
+) -> LibraryExport:
+    if source_paths is None:
+        source_paths = get_library_source_paths(library)
+
+    with instrumentation.span("fingerprint_meshes", library=library.name):
+        evaluated_mesh_names = mesh_fingerprint.get_evaluated_mesh_names(bpy.data.objects)
+        unchanged_mesh_parts = {}
+        for collection_name, name in source_paths:
+            mesh = bpy.data.meshes.get(name) if collection_name == "meshes" else None
+            if mesh:
+                unchanged_mesh_parts[name] = mesh_fingerprint.get_unchanged_parts(
+                    mesh, evaluated_mesh_names
+                )
+
+    return LibraryExport(
+        name=library.name,
+        source_stage_path=library.ref_file_path,
+        snapshot_file_path=library.snapshot_file_path,
+        override_path=library.export_path,
+        diff_mode=library.diff_mode,
+        diff_workers=library.diff_workers,
+        layer_format=library.layer_format,
+        refresh=get_usd_connect_session().refresh,
+        source_paths=source_paths,
+        owned_paths=owned_paths,
+        dirty_prim_paths=dirty_prim_paths,
+        dirty_property_prefixes=dirty_property_prefixes,
+        unchanged_mesh_parts=unchanged_mesh_parts,
+        property_filter=get_library_property_filter(library),
+        dry_run=get_usd_connect_session().dry_run,
+        settings_key=get_export_settings_key(library),
+    )
 
-    override_stage = Usd.Stage.CreateNew(override_stage_path)
 
-    # Add reference to source stage in override file
-    source_stage = Usd.Stage.Open(source_stage_path)
+def get_export_settings_key(library: bpy.types.PropertyGroup) -> tuple:
+    """Get the settings of a library that change its override layer without any edit to the scene."""
+    return (
+        library.export_path,
+        library.ref_file_path,
+        library.diff_mode,
+        library.layer_format,
+        library.skip_heavy_attributes,
+        tuple(
+            (rule.pattern, rule.syntax, rule.action, rule.tolerance)
+            for rule in library.property_rules
+        ),
+    )
 
-    override_stage.GetRootLayer().subLayerPaths.append(source_stage_path)
 
-    generate_usd_overrides_for_prims(
-        source_stage=source_stage,
-        override_stage=override_stage,
-        bl_stage=bl_stage,
+def get_library_property_filter(library: bpy.types.PropertyGroup) -> PropertyFilter:
+    """Compile the property rules of a library, raises ValueError if a pattern is invalid."""
+    return compile_rules(
+        [
+            PropertyRule(rule.pattern, rule.syntax, rule.action, rule.tolerance)
+            for rule in library.property_rules
+            if rule.pattern
+        ],
+        skip_heavy_attributes=library.skip_heavy_attributes,
     )
 
-    # TODO Improve error handling on scaling when prim isn't found
-    # BL_ROOT_PRIM = "/root"
 
-    # world_override = override_stage.OverridePrim(
-    #     "/" + library.root_prim_path.strip("/")
-    # )
-    # world_bl = bl_stage.GetPrimAtPath(BL_ROOT_PRIM + library.root_prim_path)
+def is_unchanged_kind_property(prefixes: tuple[str, ...], prop_name: str) -> bool:
+    """Check if a property can't be affected by the changes of its prim, see dirty_tracking.get_dirty_property_prefixes."""
+    return not prop_name.startswith(prefixes)
 
-    # if world_bl.IsValid() and world_override.IsValid():
-    #     apply_world_transform(world_bl, world_override)
 
-    # root_override = override_stage.OverridePrim(BL_ROOT_PRIM)
-    # root_bl = bl_stage.GetPrimAtPath(BL_ROOT_PRIM)
+def get_skip_property(
+    library: LibraryExport,
+    datablock_key: DatablockKey | None,
+    source_prim_path: Sdf.Path | None = None,
+) -> Callable[[str], bool] | None:
+    """Get the check for properties of a Blender prim that don't need to be compared, None to compare all."""
+    skip_checks: list[Callable[[str], bool]] = []
 
-    # if root_bl.IsValid() and root_override.IsValid():
-    #     apply_world_transform(root_bl, root_override)
+    # Incremental exports only compare the properties the prim's changes can affect
+    if library.dirty_property_prefixes and source_prim_path in library.dirty_property_prefixes:
+        skip_checks.append(
+            functools.partial(
+                is_unchanged_kind_property, library.dirty_property_prefixes[source_prim_path]
+            )
+        )
 
-    library.export_path = override_stage_path
+    if datablock_key and datablock_key[0] == "meshes" and library.unchanged_mesh_parts:
+        unchanged_parts = library.unchanged_mesh_parts.get(datablock_key[1])
+        if unchanged_parts:
+            skip_checks.append(
+                functools.partial(mesh_fingerprint.is_unchanged_property, unchanged_parts)
+            )
 
-    override_stage.Save()
-    override_stage.Unload()
+    if not skip_checks:
+        return None
+    if len(skip_checks) == 1:
+        return skip_checks[0]
+    return lambda prop_name: any(skip_check(prop_name) for skip_check in skip_checks)
 
 
-##############################################################################
-# Prim Compare
-##############################################################################
+# Key of the diff of a shared data block: data block, source prim content and Blender prim content
+DiffKey = Tuple[DatablockKey, str, str | None]
 
-IGNORE_PROPS = [
-    "userProperties:blender:object_name",
-    "userProperties:blender:data_name",
-]
 
-def get_datablock_from_prim(blender_prim: Usd.Prim) -> dict:
-    name = None
+def get_diff_key(
+    datablock_key: DatablockKey | None,
+    source_prim_path: Sdf.Path,
+    bl_prim_path: Sdf.Path,
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+) -> DiffKey | None:
+    """Get the key under which the diff of a prim is shared by all prims exported from its data block.
 
-    if blender_prim.HasProperty("userProperties:blender:object_name"):
-        name = blender_prim.GetProperty("userProperties:blender:object_name").Get()
+    Blender writes shared data blocks, eg. a mesh used by many objects, under every object using it.
+    All copies are diffed against the same source prim, so their overrides are the same unless the
+    copies differ, eg. due to modifiers, which the Blender prim's content hash tells apart if known.
+
+    Returns:
+        DiffKey | None: None if the data block isn't shared, so its prim is always diffed
+    """
+    if not datablock_key or datablock_key[0] not in constants.SHARED_DATABLOCK_COLLECTIONS:
+        return None
+    source_hash = source_hashes.get(str(source_prim_path)) if source_hashes else None
+    bl_hash = bl_hashes.get(str(bl_prim_path)) if bl_hashes else None
+    return (
+        datablock_key,
+        source_hash.prim if source_hash else str(source_prim_path),
+        bl_hash.prim if bl_hash else None,
+    )
+
+
+def hook_export_overrides(
+    bl_stage: Usd.Stage, libraries: List[bpy.types.PropertyGroup]
+) -> None:
+    """Generate the override layer of each library from a single Blender export.
+
+    Matched prims go to the layer of the library they were imported from, new prims to the
+    layer of their nearest imported ancestor, see build_prim_owner_index.
+    The libraries are diffed concurrently, each into its own layer.
+    """
+    for library in libraries:
+        wait_for_snapshot(library)
+
+    with instrumentation.span("partition_prims"):
+        source_paths_by_library = get_source_paths_by_library()
+        owners = None
+        if len(bpy.context.scene.usd_connect_libraries) > 1:
+            owners = build_prim_owner_index(
+                layer_diff.get_all_prim_specs(bl_stage.GetRootLayer()),
+                source_paths_by_library,
+                default_library_name=libraries[0].name,
+            )
 
-    if blender_prim.HasProperty("userProperties:blender:data_name"):
-        name = blender_prim.GetProperty("userProperties:blender:data_name").Get()
+    # Incremental exports only diff the prims changed since the last export
+    incremental = get_usd_connect_session().incremental
+    library_exports = []
+    for library in libraries:
+        owned_paths = None
+        if owners is not None:
+            owned_paths = {path for path, owner in owners.items() if owner == library.name}
+        library_exports.append(
+            get_library_export(
+                library,
+                source_paths=source_paths_by_library.get(library.name, {}),
+                owned_paths=owned_paths,
+                dirty_prim_paths=(
+                    dirty_tracking.get_dirty_prim_paths(library.name) if incremental else None
+                ),
+                dirty_property_prefixes=(
+                    dirty_tracking.get_dirty_property_prefixes(library.name)
+                    if incremental
+                    else None
+                ),
+            )
+        )
 
-    if not name:
+    # Hashes of the snapshot taken at import are only valid while the source is unchanged
+    with instrumentation.span("hash_prims"):
+        source_hashes = {
+            library_export.name: prim_hash.load_prim_hashes(
+                prim_hash.get_hash_file_path(library_export.snapshot_file_path),
+                library_export.source_stage_path,
+            )
+            for library_export in library_exports
+        }
+        bl_hashes = None
+        if any(source_hashes.values()):
+            bl_hashes = prim_hash.compute_prim_hashes(bl_stage)
+
+    # Source files changed on disk are reloaded up front, the export workers share
+    # cached stages and layers and must not reload them while others compose
+    with instrumentation.span("refresh_stages"):
+        stage_cache.refresh_all()
+
+    if len(library_exports) == 1:
+        library_export = library_exports[0]
+        hook_export_library_overrides(
+            bl_stage, library_export, bl_hashes, source_hashes[library_export.name]
+        )
         return
 
-    data_block_type = constants.get_datablock_type(blender_prim.GetTypeName())
-    if data_block_type:
-        return data_block_type.get(name)
+    with ThreadPoolExecutor(
+        max_workers=min(len(library_exports), os.cpu_count() or 1),
+        thread_name_prefix="usd_connect_export",
+    ) as executor:
+        futures = [
+            executor.submit(
+                hook_export_library_overrides,
+                bl_stage,
+                library_export,
+                bl_hashes,
+                source_hashes[library_export.name],
+            )
+            for library_export in library_exports
+        ]
+        # Raise the first failure after all libraries are done
+        for future in futures:
+            future.result()
+
+
+def hook_export_library_overrides(
+    bl_stage: Usd.Stage,
+    library: LibraryExport,
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+) -> None:
+    """Generate and save the override layer of one library, or its change set on a dry run.
+
+    NOTE: Runs on an export worker thread when several libraries are exported, so it must
+    not access any Blender data
+    """
+    if not source_hashes:
+        bl_hashes = None
+
+    if library.diff_mode == "LAYER":
+        hook_export = hook_export_layer_overrides
+    else:
+        hook_export = hook_export_stage_overrides
+
+    with instrumentation.span("library_overrides", library=library.name):
+        change_set = hook_export(
+            bl_stage,
+            library.source_stage_path,
+            library,
+            bl_hashes=bl_hashes,
+            source_hashes=source_hashes,
+            dirty_prim_paths=library.dirty_prim_paths,
+        )
+        if library.dry_run:
+            store_change_set(library, change_set)
+        else:
+            write_override_layer(
+                library.override_path,
+                library.source_stage_path,
+                library.layer_format,
+                change_set,
+                dirty_prim_paths=library.dirty_prim_paths,
+                dirty_property_prefixes=library.dirty_property_prefixes,
+            )
+
+
+def hook_export_stage_overrides(
+    bl_stage: Usd.Stage,
+    source_stage_path: str,
+    library: LibraryExport,
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    dirty_prim_paths: set[Sdf.Path] | None = None,
+) -> ChangeSet:
+    """Get the changes of a library by diffing the composed Blender and source stages."""
+    # Payloads loaded for diffing are unloaded when the cached source stage is returned
+    with contextlib.ExitStack() as exit_stack:
+        with instrumentation.span("open_stages", filepath=source_stage_path):
+            source_stage = exit_stack.enter_context(
+                open_masked_source_stage(source_stage_path, library.source_paths.values())
+            )
 
+        # TODO Improve error handling on scaling when prim isn't found
+        # BL_ROOT_PRIM = "/root"
 
-def has_source_prim(blender_prim: Usd.Prim, source_stage: Usd.Stage) -> bool:
-    """Check if the given Blender prim has a corresponding source prim in the source stage.
+        # world_override = override_stage.OverridePrim(
+        #     "/" + library.root_prim_path.strip("/")
+        # )
+        # world_bl = bl_stage.GetPrimAtPath(BL_ROOT_PRIM + library.root_prim_path)
+
+        # if world_bl.IsValid() and world_override.IsValid():
+        #     apply_world_transform(world_bl, world_override)
+
+        # root_override = override_stage.OverridePrim(BL_ROOT_PRIM)
+        # root_bl = bl_stage.GetPrimAtPath(BL_ROOT_PRIM)
+
+        # if root_bl.IsValid() and root_override.IsValid():
+        #     apply_world_transform(root_bl, root_override)
+
+        return generate_usd_overrides_for_prims(
+            source_stage=source_stage,
+            bl_stage=bl_stage,
+            library=library,
+            bl_hashes=bl_hashes,
+            source_hashes=source_hashes,
+            only_source_paths=dirty_prim_paths,
+        )
+
+
+def hook_export_layer_overrides(
+    bl_stage: Usd.Stage,
+    source_stage_path: str,
+    library: LibraryExport,
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    dirty_prim_paths: set[Sdf.Path] | None = None,
+) -> ChangeSet:
+    """Get the changes of a library by diffing Sdf specs directly, without composing either stage.
+
+    Blender's export is a single flat layer, so its root layer is diffed against a
+    flattened copy of the source. Produces the same overrides as the "STAGE" diff mode.
+    """
+    with instrumentation.span("open_stages", filepath=source_stage_path):
+        source_layer = layer_diff.open_flattened_layer(source_stage_path, refresh=False)
+
+    return generate_usd_overrides_for_prim_specs(
+        source_layer=source_layer,
+        bl_layer=bl_stage.GetRootLayer(),
+        library=library,
+        bl_hashes=bl_hashes,
+        source_hashes=source_hashes,
+        only_source_paths=dirty_prim_paths,
+    )
+
+
+def write_override_layer(
+    override_layer_path: str,
+    source_stage_path: str,
+    file_format: str,
+    change_set: ChangeSet,
+    dirty_prim_paths: set[Sdf.Path] | None = None,
+    dirty_property_prefixes: dict[Sdf.Path, tuple[str, ...]] | None = None,
+) -> None:
+    """Author a change set into the override layer of its library and save it.
 
     Args:
-        blender_prim (Usd.Prim): Prim Exported by Blender
-        source_stage (Usd.Stage): Source USD Stage
+        override_layer_path (str): Layer to write, with the source file as its sublayer
+        source_stage_path (str): Source file of the library
+        file_format (str): Format of the layer, see layer_format.LAYER_FORMAT_ITEMS
+        change_set (ChangeSet): Overrides and new prims to author
+        dirty_prim_paths (set[Sdf.Path] | None): If given, the change set is merged into the layer of
+            the last export, replacing the overrides of these prims
+        dirty_property_prefixes (dict[Sdf.Path, tuple[str, ...]] | None): Dirty prims of which only
+            the overrides of properties with these prefixes are replaced, as only those were diffed
+    """
+    with instrumentation.span("open_override_layer", filepath=override_layer_path):
+        if dirty_prim_paths is not None:
+            override_layer = Sdf.Layer.FindOrOpen(override_layer_path)
+            clear_property_overrides(override_layer, dirty_prim_paths, dirty_property_prefixes)
+        else:
+            override_layer = Sdf.Layer.CreateNew(override_layer_path)
+
+            # Add reference to source stage in override file
+            override_layer.subLayerPaths.append(source_stage_path)
+
+    # New prims are defined along with their ancestors missing in the source, the stage is
+    # opened without payloads and never loads any, so it can be shared through the cache
+    source_stage = None
+    if change_set.new_prims:
+        with instrumentation.span("open_stages", filepath=source_stage_path):
+            source_stage = stage_cache.open_stage(
+                source_stage_path, load=Usd.Stage.LoadNone, refresh=False
+            )
+
+    with instrumentation.span("author_overrides"):
+        change_set.author_into(override_layer, source_stage)
+
+    with instrumentation.span("save_overrides", filepath=override_layer_path):
+        written_format = layer_format.save_layer(
+            override_layer, override_layer_path, file_format
+        )
+    logger.info("Wrote '%s' as %s", override_layer_path, written_format)
+    instrumentation.count_file_bytes(override_layer_path)
+
+
+##############################################################
+# Change Sets
+##############################################################
+
+class PendingChangeSet(NamedTuple):
+    change_set: ChangeSet
+    # File the change set was saved to for review
+    file_path: str
+    # dirty_tracking.get_update_count() when the scene was exported for the preview
+    update_count: int
+    # Signature of the library's source file the change set was diffed against
+    source_signature: stage_cache.FileSignature | None
+    # Settings of the library when it was previewed, see get_export_settings_key
+    settings_key: tuple
+
+
+# Change sets of the last preview, keyed by library name
+_pending_change_sets: dict[str, PendingChangeSet] = {}
+
+
+def get_change_set_path(override_path: str) -> str:
+    """Get the file a library's change set is saved to, next to its override layer."""
+    override_pathlib = Path(override_path)
+    return override_pathlib.with_name(
+        layer_format.get_layer_file_name(override_pathlib.stem + ".changes")
+    ).as_posix()
+
+
+def store_change_set(library: LibraryExport, change_set: ChangeSet) -> None:
+    """Save the change set of a dry run for review and keep it for the next export of the library.
+
+    NOTE: Runs on an export worker thread when several libraries are previewed, so it must
+    not access any Blender data
+    """
+    file_path = get_change_set_path(library.override_path)
+    with instrumentation.span("save_change_set", filepath=file_path):
+        change_set.save(file_path)
+        # The saved set no longer references Blender's export, which is deleted after the preview
+        _pending_change_sets[library.name] = PendingChangeSet(
+            ChangeSet.load(file_path),
+            file_path,
+            dirty_tracking.get_update_count(),
+            stage_cache.get_file_signature(library.source_stage_path),
+            library.settings_key,
+        )
+    logger.info("Saved the changes of library '%s' to '%s'", library.name, file_path)
+
+
+def preview_usd_layers(
+    libraries: List[bpy.types.PropertyGroup],
+) -> dict[str, PendingChangeSet]:
+    """Diff the libraries like export_usd_layers, saving their change sets instead of their override layers.
+
+    Until the scene or a source file changes, the next export of the libraries writes these
+    change sets as they are, without exporting and diffing again.
+
+    NOTE: Must be called with hook registered, similar to direct operator call
 
     Returns:
-        bool: True if the source prim exists, False otherwise
+        dict[str, PendingChangeSet]: Change set of each library keyed by library name
     """
-    bl_data_block = get_datablock_from_prim(blender_prim)
-    if bl_data_block and hasattr(bl_data_block, "usd_connect_props"):
-        source_prim_path = bl_data_block.usd_connect_props.prim_path
-        source_prim = source_stage.GetPrimAtPath(source_prim_path)
-        if source_prim and source_prim.IsValid():
-            return source_prim
-    return False
+    for library in libraries:
+        _pending_change_sets.pop(library.name, None)
 
-def get_all_prims(stage:Usd.Stage) -> List[Usd.Prim]:
-    """Get all prims in the stage, except for those autogenerated by Blender like "root".
+    export_usd_layers(libraries, session_dry_run=True)
+    return {
+        library.name: _pending_change_sets[library.name]
+        for library in libraries
+        if library.name in _pending_change_sets
+    }
 
-    Args:
-        stage (Usd.Stage): The USD stage to traverse.
+
+def take_pending_change_sets(
+    libraries: List[bpy.types.PropertyGroup],
+) -> List[ChangeSet] | None:
+    """Take the previewed change sets of the libraries, None unless all are still up to date.
+
+    Change sets are outdated once the scene, a source file or a library's export settings changed.
+    """
+    pending = [_pending_change_sets.get(library.name) for library in libraries]
+    for library, pending_change_set in zip(libraries, pending):
+        if (
+            pending_change_set is None
+            or pending_change_set.update_count != dirty_tracking.get_update_count()
+            or pending_change_set.source_signature
+            != stage_cache.get_file_signature(library.ref_file_path)
+            or pending_change_set.settings_key != get_export_settings_key(library)
+        ):
+            return None
+
+    for library in libraries:
+        del _pending_change_sets[library.name]
+    return [pending_change_set.change_set for pending_change_set in pending]
+
+
+def publish_change_sets(
+    libraries: List[bpy.types.PropertyGroup], change_sets: List[ChangeSet]
+) -> None:
+    """Write the override layer of each library from its previewed change set."""
+    for library, change_set in zip(libraries, change_sets):
+        with instrumentation.span("library_overrides", library=library.name):
+            write_override_layer(
+                library.export_path, library.ref_file_path, library.layer_format, change_set
+            )
+        logger.info("Published the previewed changes of library '%s'", library.name)
+
+
+##############################################################################
+# Source Prim Index
+##############################################################################
+
+def get_datablock_key(prim_type: str, name: str | None) -> DatablockKey | None:
+    """Get the key of the data block Blender exported a prim from, without looking it up in bpy.data."""
+    collection_name = constants.PRIM_TO_DATABLOCK_COLLECTION.get(prim_type)
+    if collection_name and name:
+        return (collection_name, name)
+    return None
+
+
+def get_datablock_key_from_prim(blender_prim: Usd.Prim) -> DatablockKey | None:
+    name = None
+
+    object_name = blender_prim.GetAttribute("userProperties:blender:object_name")
+    if object_name:
+        name = object_name.Get()
+
+    data_name = blender_prim.GetAttribute("userProperties:blender:data_name")
+    if data_name:
+        name = data_name.Get()
+
+    return get_datablock_key(blender_prim.GetTypeName(), name)
+
+
+def get_datablock_key_from_prim_spec(blender_spec: Sdf.PrimSpec) -> DatablockKey | None:
+    name = None
+
+    object_name = blender_spec.attributes.get("userProperties:blender:object_name")
+    if object_name:
+        name = object_name.default
+
+    data_name = blender_spec.attributes.get("userProperties:blender:data_name")
+    if data_name:
+        name = data_name.default
+
+    return get_datablock_key(blender_spec.typeName, name)
+
+
+def get_source_paths_by_library() -> dict[str, dict[DatablockKey, Sdf.Path]]:
+    """Read the source prim path of every data block imported from any library in one pass.
 
     Returns:
-        List[Usd.Prim]: A list of all non-generated prims in the stage.
+        dict[str, dict[DatablockKey, Sdf.Path]]: Per library name, the source prim path keyed by
+            (bpy.data collection name, data block name)
     """
-     # Filter out prims autogenerated by Blender like "root"
-    all_prims : List[Usd.Prim] = []
-    for bl_prim in stage.Traverse():
-        if bl_prim.HasCustomDataKey("Blender"):
-            if bl_prim.GetCustomDataByKey("Blender")["generated"] == True:
-                continue
-        all_prims.append(bl_prim)
-    return all_prims
+    source_paths_by_library: dict[str, dict[DatablockKey, Sdf.Path]] = {}
+    for collection_name in set(constants.PRIM_TO_DATABLOCK_COLLECTION.values()):
+        for data_block in getattr(bpy.data, collection_name):
+            usdprops = data_block.usd_connect_props
+            if usdprops.prim_path and usdprops.library_name:
+                source_paths = source_paths_by_library.setdefault(usdprops.library_name, {})
+                source_paths[(collection_name, data_block.name)] = Sdf.Path(
+                    usdprops.prim_path
+                )
+    return source_paths_by_library
+
+
+def get_library_source_paths(
+    library: bpy.types.PropertyGroup,
+) -> dict[DatablockKey, Sdf.Path]:
+    """Read the source prim path of every data block imported from a library, see get_source_paths_by_library."""
+    return get_source_paths_by_library().get(library.name, {})
+
+
+def build_prim_owner_index(
+    blender_specs: List[Sdf.PrimSpec],
+    source_paths_by_library: dict[str, dict[DatablockKey, Sdf.Path]],
+    default_library_name: str,
+) -> dict[Sdf.Path, str]:
+    """Assign each prim exported by Blender to the library whose layer it belongs to.
+
+    Prims of imported data blocks belong to the library they were imported from. New prims belong
+    to the library of their nearest ancestor, or to the default library if none of them was imported.
 
+    Args:
+        blender_specs (List[Sdf.PrimSpec]): Blender exported prims in traversal order
+        source_paths_by_library (dict[str, dict[DatablockKey, Sdf.Path]]): See get_source_paths_by_library
+        default_library_name (str): Library of new prims without an imported ancestor
 
-def get_matching_prims(source_stage:Usd.Stage, blender_prims:List[Usd.Prim]) -> dict[Usd.Prim, Usd.Prim]:
-    """Get a mapping of matching prims between the source stage and Blender exported prims.
+    Returns:
+        dict[Sdf.Path, str]: Library name keyed by Blender export prim path
+    """
+    datablock_owners = {
+        key: library_name
+        for library_name, source_paths in source_paths_by_library.items()
+        for key in source_paths
+    }
+    owners: dict[Sdf.Path, str] = {}
+    for bl_spec in blender_specs:
+        owner = datablock_owners.get(get_datablock_key_from_prim_spec(bl_spec))
+        if owner is None:
+            # Parents come first in traversal order
+            owner = owners.get(bl_spec.path.GetParentPath(), default_library_name)
+        owners[bl_spec.path] = owner
+    return owners
+
+
+def build_source_prim_spec_index(
+    source_paths: dict[DatablockKey, Sdf.Path], blender_specs: List[Sdf.PrimSpec]
+) -> dict[Sdf.Path, Sdf.Path]:
+    """Map the path of each prim spec exported by Blender to the path of its source prim.
+
+    Built once per export, so matching prim specs doesn't need to look up data blocks per spec.
 
     Args:
-        source_stage (Usd.Stage): The source USD stage to compare against.
-        blender_prims (List[Usd.Prim]): The list of Blender exported prims.
+        source_paths (dict[DatablockKey, Sdf.Path]): Source prim paths of the library's data blocks,
+            see get_library_source_paths
+        blender_specs (List[Sdf.PrimSpec]): Blender exported prim specs
 
     Returns:
-        dict[Usd.Prim, Usd.Prim]: A mapping of matching prims between the source stage and Blender exported prims.
+        dict[Sdf.Path, Sdf.Path]: Source prim path keyed by Blender export prim path
     """
-    # Find all prims that match a path in the source stage
-    matched_blender_prims: dict[Usd.Prim, Usd.Prim] = {}
+    source_prim_index: dict[Sdf.Path, Sdf.Path] = {}
+    for bl_spec in blender_specs:
+        source_path = source_paths.get(get_datablock_key_from_prim_spec(bl_spec))
+        if source_path:
+            source_prim_index[bl_spec.path] = source_path
+    return source_prim_index
 
-    for bl_prim in blender_prims:
-        # Find matching prim in source stage
-        source_prim = has_source_prim(bl_prim, source_stage)
-        if source_prim:
-            matched_blender_prims[bl_prim] = source_prim
 
-    return matched_blender_prims    
+##############################################################################
+# Override Generation
+##############################################################################
 
+# Number of matched prims whose source payloads are loaded and diffed together
+DIFF_CHUNK_SIZE = 1024
 
-def get_unmatched_prims(blender_prims:List[Usd.Prim], matched_blender_prims:dict[Usd.Prim, Usd.Prim]) -> List[Usd.Prim]:
-    """Get a list of unmatched Blender prims.
+
+def iter_prims_to_diff(
+    bl_stage: Usd.Stage,
+    library: LibraryExport,
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    only_source_paths: set[Sdf.Path] | None = None,
+) -> Iterator[Tuple[Usd.Prim, Sdf.Path | None]]:
+    """Traverse the prims exported by Blender, yielding them as soon as they are matched.
+
+    Prims autogenerated by Blender like "root" are skipped, but not their children. Subtrees whose
+    content hash matches their source are pruned from the traversal, so none of their descendants
+    are visited, matched or copied.
 
     Args:
-        blender_prims (List[Usd.Prim]): List of Blender exported prims.
-        matched_blender_prims (dict[Usd.Prim, Usd.Prim]): A mapping of matching prims between Blender exported prims as keys and source prim as values.
+        bl_stage (Usd.Stage): Stage exported by Blender
+        library (LibraryExport): Library whose source prims are matched
+        bl_hashes (dict[str, prim_hash.PrimHash] | None): Hashes of the Blender export stage
+        source_hashes (dict[str, prim_hash.PrimHash] | None): Hashes of every source prim. If given, source prims
+            are looked up in them instead of the stage, so their payloads don't have to be loaded
+        only_source_paths (set[Sdf.Path] | None): Only diff prims matched to these source prims
+
+    Yields:
+        Tuple[Usd.Prim, Sdf.Path | None]: Each prim to diff with the path of its source prim, which is only
+            known to exist if source_hashes are given. Prims without a source prim are yielded with None
+    """
+    prim_iterator = iter(Usd.PrimRange.Stage(bl_stage))
+    num_traversed = 0
+    num_matched = 0
+    for bl_prim in prim_iterator:
+        blender_data = bl_prim.GetCustomDataByKey("Blender")
+        if blender_data and blender_data.get("generated"):
+            continue
+        num_traversed += 1
+
+        source_prim_path = library.source_paths.get(get_datablock_key_from_prim(bl_prim))
+        if source_prim_path and source_hashes and str(source_prim_path) not in source_hashes:
+            source_prim_path = None
+
+        if not source_prim_path:
+            yield bl_prim, None
+            continue
+        # Unchanged prims of an incremental export, with or without hashes
+        if only_source_paths is not None and source_prim_path not in only_source_paths:
+            continue
+        if not source_hashes:
+            # Matched once the source prim is composed, see diff_matched_prims
+            yield bl_prim, source_prim_path
+            continue
+
+        num_matched += 1
+        # Skip prims and subtrees whose content hash matches their source
+        if bl_hashes:
+            bl_hash = bl_hashes.get(str(bl_prim.GetPath()))
+            src_hash = source_hashes.get(str(source_prim_path))
+            if bl_hash and src_hash:
+                if bl_hash.subtree == src_hash.subtree:
+                    prim_iterator.PruneChildren()
+                    continue
+                if bl_hash.prim == src_hash.prim:
+                    continue
+        yield bl_prim, source_prim_path
+
+    instrumentation.count(instrumentation.PRIMS_TRAVERSED, num_traversed)
+    instrumentation.count(instrumentation.PRIMS_MATCHED, num_matched)
+
+
+def is_new_prim(bl_prim: Usd.Prim, library: LibraryExport) -> bool:
+    """Check if a Blender prim without a source prim is copied into the library's override layer."""
+    # Prims of other libraries or new prims belonging to another library's layer
+    if library.owned_paths is not None and bl_prim.GetPath() not in library.owned_paths:
+        return False
+
+    # During Refresh Skip anything that doesn't have a source prim set
+    if library.refresh:
+        if not bl_prim.GetAttribute("userProperties:source_prm"):
+            return False
+        logger.debug("Refreshing new prim %s", bl_prim.GetPath())
+    return True
 
-    Returns:
-        List[Usd.Prim]: A list of unmatched Blender prims.
+
+
+@contextlib.contextmanager
+def open_masked_source_stage(
+    source_stage_path: str, prim_paths: Iterable[Sdf.Path]
+) -> Iterator[Usd.Stage]:
+    """Open the source stage composing only the given prims, with all payloads unloaded.
+
+    The given prims, their ancestors and descendants are populated. Payloads are loaded
+    on demand for the prims that get diffed, see load_source_payloads, and unloaded again
+    once the stage is no longer used, see stage_cache.borrow_unloaded_stage.
+
+    Args:
+        source_stage_path (str): Source file of the library
+        prim_paths (Iterable[Sdf.Path]): Source prims Blender data blocks were imported from
+
+    Yields:
+        Usd.Stage: The masked source stage
+    """
+    population_mask = Usd.StagePopulationMask()
+    for prim_path in prim_paths:
+        population_mask.Add(prim_path)
+    with stage_cache.borrow_unloaded_stage(source_stage_path, population_mask) as source_stage:
+        yield source_stage
+
+
+def load_source_payloads(source_stage: Usd.Stage, prim_paths: Iterable[Sdf.Path]) -> None:
+    """Load the payloads needed to compose the given prims, leaving payloads below them unloaded."""
+    unloaded = set()
+    for prim_path in prim_paths:
+        prim = source_stage.GetPrimAtPath(prim_path)
+        # Prims inside an unloaded payload don't exist until it's loaded
+        if not prim or not prim.IsLoaded():
+            unloaded.add(prim_path)
+    if unloaded:
+        source_stage.LoadAndUnload(unloaded, set(), Usd.LoadWithoutDescendants)
+
+
+def diff_matched_prims(
+    source_stage: Usd.Stage,
+    matched_prims: List[Tuple[Usd.Prim, Sdf.Path]],
+    library: LibraryExport,
+    change_set: ChangeSet,
+    diffed_keys: set[DiffKey],
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+) -> None:
+    """Diff a chunk of matched prims against their source prims, queueing the overrides on the change set.
+
+    Args:
+        source_stage (Usd.Stage): Masked source stage, see open_masked_source_stage
+        matched_prims (List[Tuple[Usd.Prim, Sdf.Path]]): Blender prims with the path of their source prim
+        library (LibraryExport): Library the overrides are generated for
+        change_set (ChangeSet): Change set the overrides and new prims are queued on
+        diffed_keys (set[DiffKey]): Shared data blocks diffed in earlier chunks, see get_diff_key
+        bl_hashes (dict[str, prim_hash.PrimHash] | None): Hashes of the Blender export stage
+        source_hashes (dict[str, prim_hash.PrimHash] | None): Hashes of every source prim, if the source
+            prims were matched with them, see iter_prims_to_diff
     """
-    return list(set(blender_prims) - set(matched_blender_prims.keys()))
+    has_source_hashes = bool(source_hashes)
+    # Only the prims that get diffed need their payloads loaded
+    with instrumentation.span("load_payloads"):
+        load_source_payloads(source_stage, [src_path for _, src_path in matched_prims])
+
+    transfers = []
+    num_matched = 0
+    num_reused = 0
+    for bl_prim, src_path in matched_prims:
+        src_prim = source_stage.GetPrimAtPath(src_path)
+        if not src_prim:
+            # Source prims that only exist in the hashes, eg. outside of the population mask, are skipped
+            if not has_source_hashes and is_new_prim(bl_prim, library):
+                change_set.add_new_prim(bl_prim.GetStage().GetRootLayer(), bl_prim.GetPath())
+            continue
+        num_matched += 1
+
+        # Copies of a shared data block already diffed have their overrides queued
+        datablock_key = get_datablock_key_from_prim(bl_prim)
+        diff_key = get_diff_key(
+            datablock_key, src_path, bl_prim.GetPath(), bl_hashes, source_hashes
+        )
+        if diff_key is not None:
+            if diff_key in diffed_keys:
+                num_reused += 1
+                continue
+            diffed_keys.add(diff_key)
+
+        transfers.append(
+            PrimTransfer(
+                bl_prim,
+                src_prim,
+                change_set,
+                skip_property=get_skip_property(library, datablock_key, src_path),
+                property_filter=library.property_filter,
+            )
+        )
+    if not has_source_hashes:
+        instrumentation.count(instrumentation.PRIMS_MATCHED, num_matched)
+
+    for transfer, differences in parallel_diff.compute_changes(
+        transfers, library.diff_workers
+    ):
+        transfer.apply_changes(differences)
+    instrumentation.count(instrumentation.PRIMS_DIFFED, len(transfers))
+    instrumentation.count(instrumentation.DIFFS_REUSED, num_reused)
+
+
+
+def generate_usd_overrides_for_prims(
+    source_stage: Usd.Stage,
+    bl_stage: Usd.Stage,
+    library: Union[bpy.types.PropertyGroup, LibraryExport],
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    only_source_paths: set[Sdf.Path] | None = None,
+) -> ChangeSet:
+    """Get the overrides and new prims of a library by diffing the composed Blender and source stages.
+
+    Traversal, matching and diffing are streamed, prims are diffed in chunks of DIFF_CHUNK_SIZE
+    as soon as they are matched, so only one chunk of prims is held at a time.
+    """
+    if not isinstance(library, LibraryExport):
+        library = get_library_export(library)
+
+    change_set = ChangeSet(library.name)
+    bl_layer = bl_stage.GetRootLayer()
+    diffed_keys: set[DiffKey] = set()
+    with instrumentation.span("diff", workers=library.diff_workers):
+        matched_prims: List[Tuple[Usd.Prim, Sdf.Path]] = []
+        for bl_prim, src_path in iter_prims_to_diff(
+            bl_stage, library, bl_hashes, source_hashes, only_source_paths
+        ):
+            if src_path is None:
+                if is_new_prim(bl_prim, library):
+                    change_set.add_new_prim(bl_layer, bl_prim.GetPath())
+                continue
 
+            matched_prims.append((bl_prim, src_path))
+            if len(matched_prims) >= DIFF_CHUNK_SIZE:
+                diff_matched_prims(
+                    source_stage,
+                    matched_prims,
+                    library,
+                    change_set,
+                    diffed_keys,
+                    bl_hashes,
+                    source_hashes,
+                )
+                matched_prims = []
+
+        if matched_prims:
+            diff_matched_prims(
+                source_stage,
+                matched_prims,
+                library,
+                change_set,
+                diffed_keys,
+                bl_hashes,
+                source_hashes,
+            )
+    return change_set
+
+
+def generate_usd_overrides_for_prim_specs(
+    source_layer: Sdf.Layer,
+    bl_layer: Sdf.Layer,
+    library: Union[bpy.types.PropertyGroup, LibraryExport],
+    bl_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    source_hashes: dict[str, prim_hash.PrimHash] | None = None,
+    only_source_paths: set[Sdf.Path] | None = None,
+) -> ChangeSet:
+    """Layer level version of generate_usd_overrides_for_prims, see layer_diff.PrimSpecTransfer."""
+    if not isinstance(library, LibraryExport):
+        library = get_library_export(library)
 
-def generate_usd_overrides_for_prims(source_stage:Usd.Stage, override_stage:Usd.Stage, bl_stage:Usd.Stage) -> None:
     # Filter out prims autogenerated by Blender like "root"
-    blender_prims = get_all_prims(bl_stage)
+    with instrumentation.span("traverse"):
+        blender_specs = layer_diff.get_all_prim_specs(bl_layer)
+    instrumentation.count(instrumentation.PRIMS_TRAVERSED, len(blender_specs))
 
     # Collect all the relevant prims
-    matched_prims = get_matching_prims(source_stage, blender_prims)
-    unmatched_prims = get_unmatched_prims(blender_prims, matched_prims)
+    with instrumentation.span("match"):
+        source_prim_index = build_source_prim_spec_index(library.source_paths, blender_specs)
+        matched_specs = []
+        unmatched_specs = []
+        num_matched = 0
+        for bl_spec in blender_specs:
+            source_prim_path = source_prim_index.get(bl_spec.path)
+            src_spec = source_layer.GetPrimAtPath(source_prim_path) if source_prim_path else None
+            if not src_spec:
+                # Prims of other libraries or new prims belonging to another library's layer
+                if library.owned_paths is None or bl_spec.path in library.owned_paths:
+                    unmatched_specs.append(bl_spec)
+                continue
+            num_matched += 1
+            if only_source_paths is None or src_spec.path in only_source_paths:
+                matched_specs.append((bl_spec, src_spec))
+    instrumentation.count(instrumentation.PRIMS_MATCHED, num_matched)
+
+    # Skip prims and subtrees whose content hash matches their source
+    if bl_hashes and source_hashes:
+        matched_specs = prim_hash.filter_changed_prims(
+            matched_specs, bl_hashes, source_hashes
+        )
 
     # Figure out if prims have been modified
-    for bl_prim, src_prim in matched_prims.items():
-        PrimTransfer(bl_prim, src_prim, override_stage).generate_overrides()
+    change_set = ChangeSet(library.name)
+    with instrumentation.span("diff", workers=library.diff_workers):
+        transfers = []
+        diffed_keys: set[DiffKey] = set()
+        num_reused = 0
+        for bl_spec, src_spec in matched_specs:
+            # Copies of a shared data block already diffed have their overrides queued
+            datablock_key = get_datablock_key_from_prim_spec(bl_spec)
+            diff_key = get_diff_key(
+                datablock_key, src_spec.path, bl_spec.path, bl_hashes, source_hashes
+            )
+            if diff_key is not None:
+                if diff_key in diffed_keys:
+                    num_reused += 1
+                    continue
+                diffed_keys.add(diff_key)
+
+            transfers.append(
+                layer_diff.PrimSpecTransfer(
+                    bl_spec,
+                    src_spec,
+                    change_set,
+                    skip_property=get_skip_property(library, datablock_key, src_spec.path),
+                    property_filter=library.property_filter,
+                )
+            )
+        for transfer, differences in parallel_diff.compute_changes(
+            transfers, library.diff_workers
+        ):
+            transfer.apply_changes(differences)
+    instrumentation.count(instrumentation.PRIMS_DIFFED, len(transfers))
+    instrumentation.count(instrumentation.DIFFS_REUSED, num_reused)
 
-    usd_connect_session = get_usd_connect_session()
-    for unmatched in unmatched_prims:
+    with instrumentation.span("copy_new_prims"):
+        for unmatched in unmatched_specs:
 
-        # During Refresh Skip anything that doesn't have a source prim set
-        if usd_connect_session.refresh:
-            if not unmatched.GetAttribute("userProperties:source_prm"):
-                continue
-            print(unmatched.GetPath())
+            # During Refresh Skip anything that doesn't have a source prim set
+            if library.refresh:
+                if not unmatched.attributes.get("userProperties:source_prm"):
+                    continue
+                logger.debug("Refreshing new prim %s", unmatched.path)
 
-        new_prim = override_stage.DefinePrim(
-            unmatched.GetPath(), unmatched.GetTypeName()
-        )
-        try:
-            Sdf.CopySpec(
-                bl_stage.GetRootLayer(),
-                unmatched.GetPath(),
-                override_stage.GetRootLayer(),
-                new_prim.GetPath(),
-            )
-            print(f"PRIM: Created New Prim: {new_prim.GetPath()}")
-        except Exception as e:
-            print(f"Error copying spec for new prim {unmatched.GetPath()}: {e}")
+            change_set.add_new_prim(bl_layer, unmatched.path)
+    return change_set
 
 
 def apply_world_transform(source_prim: Usd.Prim, target_prim: Usd.Prim) -> None:
@@ -394,19 +1603,152 @@ def apply_world_transform(source_prim: Usd.Prim, target_prim: Usd.Prim) -> None:
 ##############################################################
 
 
-def get_library_objects(library: bpy.types.Object) -> List[bpy.types.Object]:
-    """Get all objects associated with a specific USD library."""
+def get_library_objects(library: bpy.types.PropertyGroup) -> List[bpy.types.Object]:
+    """Get all objects associated with a specific USD library, see library_index."""
+    return library_index.get_library_objects(bpy.context.scene, library.name)
+
+
+def get_default_library() -> bpy.types.PropertyGroup:
+    """Get the only library of the scene, for calls that don't name a library."""
+    libraries = bpy.context.scene.usd_connect_libraries
+    if len(libraries) != 1:
+        raise ValueError(
+            f"Scene has {len(libraries)} USD libraries, a library has to be specified"
+        )
+    return libraries[0]
+
+
+def get_session_libraries() -> List[bpy.types.PropertyGroup]:
+    """Get the libraries the running import or export is for, see override_usd_session_state."""
+    libraries = bpy.context.scene.usd_connect_libraries
     return [
-        obj
-        for obj in bpy.context.scene.objects
-        if obj.usd_connect_props.library_get() == library
+        libraries[name]
+        for name in get_usd_connect_session().library_names.splitlines()
+        if name in libraries
     ]
 
 
+def get_library_datablocks(
+    library: bpy.types.PropertyGroup, collection_name: str
+) -> List[bpy.types.ID]:
+    """Get the data blocks imported from a library in one bpy.data collection, objects of the current scene only."""
+    if collection_name == "objects":
+        data_blocks = bpy.context.scene.objects
+    else:
+        data_blocks = getattr(bpy.data, collection_name)
+    return [
+        data_block
+        for data_block in data_blocks
+        if data_block.usd_connect_props.library_name == library.name
+    ]
+
+
+def get_upstream_changes(library: bpy.types.PropertyGroup) -> List[Sdf.Path] | None:
+    """Get the roots of the subtrees changed in the library's source file since its snapshot was taken.
+
+    Returns:
+        List[Sdf.Path] | None: Changed subtrees, None if the snapshot's hashes are missing or outdated
+    """
+    snapshot_hashes = prim_hash.load_prim_hashes(
+        prim_hash.get_hash_file_path(library.snapshot_file_path),
+        library.snapshot_file_path,
+    )
+    if snapshot_hashes is None:
+        return None
+
+    # Snapshots are named after the digest of the source they were taken from
+    source_digest = snapshot_store.get_source_digest(library.ref_file_path)
+    if source_digest == Path(library.snapshot_file_path).stem:
+        return []
+
+    # Hash the source flattened like the snapshot, eg. with asset paths anchored the same way
+    source_stage = Usd.Stage.Open(stage_cache.open_stage(library.ref_file_path).Flatten())
+    source_hashes = prim_hash.compute_prim_hashes(source_stage)
+    return prim_hash.get_changed_subtrees(snapshot_hashes, source_hashes)
+
+
+def is_in_subtrees(prim_path: str, roots: set[Sdf.Path]) -> bool:
+    """Check if a prim path is one of the given roots or a descendant of them."""
+    if not prim_path:
+        return False
+    return any(prefix in roots for prefix in Sdf.Path(prim_path).GetPrefixes())
+
+
+def get_objects_in_subtrees(
+    objects: List[Object], roots: set[Sdf.Path]
+) -> List[Object]:
+    """Get the objects whose prim, data or materials are part of the given subtrees."""
+    subtree_objects = []
+    for obj in objects:
+        data_blocks = [obj, obj.data] + [slot.material for slot in obj.material_slots]
+        if any(
+            data_block and is_in_subtrees(data_block.usd_connect_props.prim_path, roots)
+            for data_block in data_blocks
+        ):
+            subtree_objects.append(obj)
+    return subtree_objects
+
+
+def get_refresh_prim_mask(stage: Usd.Stage, roots: List[Sdf.Path]) -> List[Sdf.Path]:
+    """Get the prims to reimport for the given subtrees, including materials bound inside them.
+
+    Bound materials outside of the subtrees have to be imported as well, else the
+    reimported meshes would lose them. Their duplicates are merged into the existing materials.
+    """
+    mask = list(roots)
+    mask_set = set(roots)
+    for root in roots:
+        root_prim = stage.GetPrimAtPath(root)
+        if not root_prim:
+            # Prims removed upstream only need their data blocks removed
+            continue
+        for prim in Usd.PrimRange(root_prim):
+            binding = prim.GetRelationship("material:binding")
+            if not binding:
+                continue
+            for target in binding.GetTargets():
+                if target not in mask_set and not is_in_subtrees(str(target), mask_set):
+                    mask.append(target)
+                    mask_set.add(target)
+    return mask
+
+
 def get_usd_connect_session() -> bpy.types.PropertyGroup:
     return bpy.context.window_manager.usd_connect_session
 
 
+def get_memory_temp_dir() -> str:
+    """Get a RAM backed directory for intermediate files, /dev/shm where available."""
+    shm_dir = Path("/dev/shm")
+    if shm_dir.is_dir() and os.access(shm_dir, os.W_OK):
+        return shm_dir.as_posix()
+    return tempfile.gettempdir()
+
+
+def get_directory_size(directory: Path) -> int:
+    """Get the total size in bytes of all files in a directory."""
+    return sum(file.stat().st_size for file in directory.rglob("*") if file.is_file())
+
+
+def clear_property_overrides(
+    layer: Sdf.Layer,
+    prim_paths: set[Sdf.Path],
+    property_prefixes: dict[Sdf.Path, tuple[str, ...]] | None = None,
+) -> None:
+    """Remove the property opinions authored on the given prims, keeping opinions on their children.
+
+    Prims in property_prefixes only lose the opinions of properties starting with their prefixes.
+    """
+    for prim_path in prim_paths:
+        prim_spec = layer.GetPrimAtPath(prim_path)
+        if not prim_spec:
+            continue
+        prefixes = property_prefixes.get(prim_path) if property_prefixes else None
+        for prop_spec in list(prim_spec.properties):
+            if prefixes is None or prop_spec.name.startswith(prefixes):
+                prim_spec.RemoveProperty(prop_spec)
+
+
 ##############################################################
 # Context Managers
 ##############################################################
@@ -428,18 +1770,37 @@ def override_object_selection(objects: List[Object], view_layer: ViewLayer):
 
 
 @contextlib.contextmanager
-def override_usd_session_state(active: bool, refresh: bool = False):
+def override_usd_session_state(
+    active: bool,
+    refresh: bool = False,
+    incremental: bool = False,
+    libraries: List[bpy.types.PropertyGroup] | None = None,
+    dry_run: bool = False,
+):
+    """Set the session state read by the USD hooks, libraries are kept as they are if None."""
     usd_connect_session = bpy.context.window_manager.usd_connect_session
     org_active = usd_connect_session.active
     org_refresh = usd_connect_session.refresh
+    org_incremental = usd_connect_session.incremental
+    org_dry_run = usd_connect_session.dry_run
+    org_library_names = usd_connect_session.library_names
 
     try:
         usd_connect_session.active = active
         usd_connect_session.refresh = refresh
+        usd_connect_session.incremental = incremental
+        usd_connect_session.dry_run = dry_run
+        if libraries is not None:
+            usd_connect_session.library_names = "\n".join(
+                library.name for library in libraries
+            )
         yield
     finally:
         usd_connect_session.active = org_active
         usd_connect_session.refresh = org_refresh
+        usd_connect_session.incremental = org_incremental
+        usd_connect_session.dry_run = org_dry_run
+        usd_connect_session.library_names = org_library_names
 
 
 @contextlib.contextmanager
@@ -0,0 +1,251 @@
+import bpy
+from bpy.app.handlers import persistent
+from pathlib import Path
+from pxr import Sdf
+from typing import AbstractSet, Dict, List, Set, Tuple
+
+# Records which library tracked data blocks changed since the last import or export,
+# so export can re-export and re-diff only those instead of the whole library.
+
+TRANSFORM = "TRANSFORM"
+GEOMETRY = "GEOMETRY"
+MATERIAL = "MATERIAL"
+CUSTOM_PROPERTIES = "CUSTOM_PROPERTIES"
+
+# Prefixes of the prim properties each kind of change can affect. Changes of other kinds,
+# eg. property edits like a light's power, may affect any property of their prim
+KIND_PROPERTY_PREFIXES = {
+    TRANSFORM: ("xformOp",),
+}
+
+# Data blocks are identified by the bpy.data collection they live in and their name
+DatablockKey = Tuple[str, str]
+
+# bpy.types.ID.id_type of tracked data blocks mapped to the name of their bpy.data collection
+ID_TYPE_TO_COLLECTION = {
+    "OBJECT": "objects",
+    "MESH": "meshes",
+    "CAMERA": "cameras",
+    "LIGHT": "lights",
+    "CURVE": "curves",
+    "POINTCLOUD": "pointclouds",
+    "VOLUME": "volumes",
+    "MATERIAL": "materials",
+}
+
+
+class DirtyState:
+    """Changes made to the data blocks of a single library."""
+
+    def __init__(self) -> None:
+        # False until the library was imported or exported in this session,
+        # without a known baseline every data block has to be considered changed
+        self.tracking: bool = False
+        # Change kinds (TRANSFORM, GEOMETRY, ...) keyed by usd_connect_props.prim_path
+        self.prims: Dict[str, Set[str]] = {}
+        # Data block each dirty prim was imported as
+        self.datablocks: Dict[str, DatablockKey] = {}
+        # Objects created in Blender which don't have a source prim
+        self.new_objects: Set[str] = set()
+        # Objects of the library and local objects in the scene when tracking started,
+        # deleting any of them can't be exported incrementally
+        self.objects: Set[str] = set()
+        # Override layer written by the last export, which incremental exports merge into
+        self.export_path: str | None = None
+
+
+_dirty_states: Dict[str, DirtyState] = {}
+
+# Number of user edits this session, tells whether anything changed since a given point
+_num_updates = 0
+
+
+def get_dirty_state(library_name: str) -> DirtyState:
+    if library_name not in _dirty_states:
+        _dirty_states[library_name] = DirtyState()
+    return _dirty_states[library_name]
+
+
+def reset(library_name: str, export_path: str | None = None) -> None:
+    """Start tracking changes from a clean state, after a library was imported or exported.
+
+    Args:
+        library_name (str): Name of the library to track
+        export_path (str | None): Override layer written by the export, None after an import
+    """
+    state = DirtyState()
+    state.tracking = True
+    state.export_path = export_path
+    state.objects = get_tracked_object_names(library_name, bpy.context.scene)
+    _dirty_states[library_name] = state
+
+
+def get_tracked_object_names(library_name: str, scene: bpy.types.Scene) -> Set[str]:
+    """Get the names of the library's objects and the local objects in the scene."""
+    return {
+        obj.name
+        for obj in scene.objects
+        if not obj.usd_connect_props.prim_path
+        or obj.usd_connect_props.library_name == library_name
+    }
+
+
+def can_export_incremental(library_name: str, export_path: str) -> bool:
+    """Check if all changes since the last export to the given override layer are known.
+
+    Deleted objects aren't reported as depsgraph updates, their overrides and new prims would
+    be left behind in the layer, so a full export is required once any of them went missing.
+    """
+    state = get_dirty_state(library_name)
+    return (
+        state.tracking
+        and state.export_path == export_path
+        and Path(export_path).exists()
+        and state.objects <= get_tracked_object_names(library_name, bpy.context.scene)
+    )
+
+
+def get_dirty_prim_paths(library_name: str) -> Set[Sdf.Path]:
+    """Get the source prim paths of all data blocks changed since the last import or export."""
+    return {Sdf.Path(prim_path) for prim_path in get_dirty_state(library_name).prims}
+
+
+def get_changed_property_prefixes(kinds: AbstractSet[str]) -> Tuple[str, ...] | None:
+    """Get the prefixes of all properties the kinds of changes can affect, None if they may affect any."""
+    prefixes: Tuple[str, ...] = ()
+    for kind in sorted(kinds):
+        if kind not in KIND_PROPERTY_PREFIXES:
+            return None
+        prefixes += KIND_PROPERTY_PREFIXES[kind]
+    return prefixes
+
+
+def get_dirty_property_prefixes(library_name: str) -> Dict[Sdf.Path, Tuple[str, ...]]:
+    """Get the prefixes of the properties that can have changed on each dirty prim since the last export.
+
+    Prims whose changes may affect any of their properties are left out, see KIND_PROPERTY_PREFIXES.
+    """
+    dirty_prefixes = {}
+    for prim_path, kinds in get_dirty_state(library_name).prims.items():
+        prefixes = get_changed_property_prefixes(kinds)
+        if prefixes is not None:
+            dirty_prefixes[Sdf.Path(prim_path)] = prefixes
+    return dirty_prefixes
+
+
+def get_update_count() -> int:
+    """Get the number of depsgraph updates caused by edits so far, unchanged while nothing is edited."""
+    return _num_updates
+
+
+def get_datablock_key(data_block: bpy.types.ID) -> DatablockKey:
+    return (ID_TYPE_TO_COLLECTION.get(data_block.id_type, ""), data_block.name)
+
+
+def get_dirty_objects(
+    library_name: str, scene: bpy.types.Scene
+) -> List[bpy.types.Object]:
+    """Get the objects that need to be exported to cover all changes of a library.
+
+    Changed object data (meshes, lights, materials, etc.) is exported through the objects using it.
+    """
+    state = get_dirty_state(library_name)
+    dirty_keys = set(state.datablocks.values())
+
+    dirty_objects = []
+    for obj in scene.objects:
+        if obj.name in state.new_objects or ("objects", obj.name) in dirty_keys:
+            dirty_objects.append(obj)
+            continue
+
+        if obj.data and get_datablock_key(obj.data) in dirty_keys:
+            dirty_objects.append(obj)
+            continue
+
+        for slot in obj.material_slots:
+            if slot.material and ("materials", slot.material.name) in dirty_keys:
+                dirty_objects.append(obj)
+                break
+
+    return dirty_objects
+
+
+def get_change_kinds(update: bpy.types.DepsgraphUpdate) -> Set[str]:
+    """Classify a depsgraph update into the kinds of changes it represents."""
+    kinds = set()
+    if isinstance(update.id, bpy.types.Material) or update.is_updated_shading:
+        kinds.add(MATERIAL)
+    if update.is_updated_transform:
+        kinds.add(TRANSFORM)
+    if update.is_updated_geometry:
+        kinds.add(GEOMETRY)
+    if not kinds:
+        # Updates without any other flag are caused by property edits, eg. custom properties
+        kinds.add(CUSTOM_PROPERTIES)
+    return kinds
+
+
+def record_update(update: bpy.types.DepsgraphUpdate) -> None:
+    data_block = update.id.original
+    key = get_datablock_key(data_block)
+    if not key[0]:
+        return
+
+    usdprops = data_block.usd_connect_props
+    if not usdprops.prim_path:
+        # Local objects, which are exported as new prims
+        if isinstance(data_block, bpy.types.Object):
+            for state in _dirty_states.values():
+                if state.tracking:
+                    state.new_objects.add(data_block.name)
+        return
+
+    state = _dirty_states.get(usdprops.library_name)
+    if not state or not state.tracking:
+        return
+
+    kinds = get_change_kinds(update)
+
+    # Geometry changes on objects (eg. modifiers) are authored on their data's prim
+    if GEOMETRY in kinds and isinstance(data_block, bpy.types.Object):
+        obj_data = data_block.data
+        if obj_data and obj_data.usd_connect_props.prim_path:
+            data_prim_path = obj_data.usd_connect_props.prim_path
+            state.prims.setdefault(data_prim_path, set()).add(GEOMETRY)
+            state.datablocks[data_prim_path] = get_datablock_key(obj_data)
+            kinds.discard(GEOMETRY)
+            if not kinds:
+                return
+
+    state.prims.setdefault(usdprops.prim_path, set()).update(kinds)
+    state.datablocks[usdprops.prim_path] = key
+
+
+@persistent
+def track_depsgraph_updates(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph) -> None:
+    # Ignore updates caused by USD Connect's own import and export
+    if bpy.context.window_manager.usd_connect_session.active:
+        return
+
+    global _num_updates
+    _num_updates += 1
+    for update in depsgraph.updates:
+        record_update(update)
+
+
+@persistent
+def clear_dirty_states(*args) -> None:
+    # Changes made before the file was loaded are unknown, require a full export
+    _dirty_states.clear()
+    global _num_updates
+    _num_updates += 1
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(track_depsgraph_updates)
+    bpy.app.handlers.load_post.append(clear_dirty_states)
+
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(track_depsgraph_updates)
+    bpy.app.handlers.load_post.remove(clear_dirty_states)
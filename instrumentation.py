@@ -0,0 +1,183 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple
+
+# Timed spans around the phases of import, export and refresh, plus counters of the work
+# done in them. Recorded spans can be written as a JSON summary or as a Chrome trace,
+# which can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+LOG_LEVEL_ITEMS = [
+    ("ERROR", "Error", "Only report errors"),
+    ("WARNING", "Warning", "Report errors and warnings"),
+    ("INFO", "Info", "Also report created prims and the progress of each phase"),
+    ("DEBUG", "Debug", "Also report every overridden prim and property"),
+]
+
+PRIMS_TRAVERSED = "prims_traversed"
+PRIMS_MATCHED = "prims_matched"
+PRIMS_DIFFED = "prims_diffed"
+DIFFS_REUSED = "diffs_reused"
+PROPERTIES_COMPARED = "properties_compared"
+PROPERTIES_SKIPPED = "properties_skipped"
+OVERRIDES_AUTHORED = "overrides_authored"
+PRIMS_CREATED = "prims_created"
+BYTES_WRITTEN = "bytes_written"
+
+logger = logging.getLogger(__package__)
+
+
+class Span(NamedTuple):
+    """A timed phase, times are nanoseconds of time.perf_counter_ns()."""
+
+    name: str
+    start: int
+    end: int
+    thread_id: int
+    depth: int
+    args: Dict[str, Any]
+
+
+class Trace:
+    """Spans and counters recorded since the last reset, safe to record to from worker threads."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+
+_trace = Trace()
+
+
+def reset() -> None:
+    """Discard all recorded spans and counters, eg. at the start of an operation."""
+    with _trace.lock:
+        _trace.spans.clear()
+        _trace.counters.clear()
+
+
+def set_log_level(level: str) -> None:
+    """Set which messages of the add-on are printed, see LOG_LEVEL_ITEMS."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+@contextlib.contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Time the code run inside this context as a phase with the given name.
+
+    Args:
+        name (str): Name of the phase, eg. "blender_export"
+        **args (Any): JSON serializable details stored with the span, eg. file paths
+    """
+    depth = getattr(_trace.local, "depth", 0)
+    _trace.local.depth = depth + 1
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _trace.local.depth = depth
+        with _trace.lock:
+            _trace.spans.append(
+                Span(name, start, end, threading.get_ident(), depth, args)
+            )
+        logger.info("%s took %.3fs", name, (end - start) / 1e9)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a counter, eg. count(PRIMS_MATCHED, len(matched_prims))."""
+    with _trace.lock:
+        _trace.counters[name] = _trace.counters.get(name, 0) + amount
+
+
+def count_file_bytes(file_path: str | Path) -> None:
+    """Count the size of a written file towards BYTES_WRITTEN."""
+    if os.path.exists(file_path):
+        count(BYTES_WRITTEN, os.path.getsize(file_path))
+
+
+def get_phase_summary() -> Dict[str, Dict[str, float]]:
+    """Sum up the recorded spans by name.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per phase name the number of spans, their total seconds and
+            their self seconds, which excludes the time spent in nested spans of the same thread
+    """
+    with _trace.lock:
+        spans = sorted(_trace.spans, key=lambda span: (span.thread_id, span.start))
+
+    summary: Dict[str, Dict[str, float]] = {}
+    for index, current in enumerate(spans):
+        children = 0
+        for other in spans[index + 1 :]:
+            if other.thread_id != current.thread_id or other.start >= current.end:
+                break
+            if other.depth == current.depth + 1:
+                children += other.end - other.start
+
+        phase = summary.setdefault(current.name, {"count": 0, "seconds": 0.0, "self_seconds": 0.0})
+        phase["count"] += 1
+        phase["seconds"] += (current.end - current.start) / 1e9
+        phase["self_seconds"] += (current.end - current.start - children) / 1e9
+    return summary
+
+
+def to_dict() -> Dict[str, Any]:
+    """Get the recorded phases and counters as JSON serializable data."""
+    with _trace.lock:
+        counters = dict(_trace.counters)
+    return {"phases": get_phase_summary(), "counters": counters}
+
+
+def save_json(file_path: str | Path) -> None:
+    """Write the phase summary and counters to a JSON file, see to_dict."""
+    with open(file_path, "w") as json_file:
+        json.dump(to_dict(), json_file, indent=2)
+
+
+def save_chrome_trace(file_path: str | Path) -> None:
+    """Write the recorded spans and counters in the Chrome Trace Event format."""
+    with _trace.lock:
+        spans = list(_trace.spans)
+        counters = dict(_trace.counters)
+
+    origin = min((span.start for span in spans), default=0)
+    end = max((span.end for span in spans), default=0)
+    pid = os.getpid()
+    events = [
+        {
+            "name": span.name,
+            "cat": "usd_connector",
+            "ph": "X",
+            "ts": (span.start - origin) / 1e3,
+            "dur": (span.end - span.start) / 1e3,
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": span.args,
+        }
+        for span in spans
+    ]
+    events.extend(
+        {
+            "name": name,
+            "cat": "usd_connector",
+            "ph": "C",
+            "ts": (end - origin) / 1e3,
+            "pid": pid,
+            "args": {name: value},
+        }
+        for name, value in counters.items()
+    )
+
+    with open(file_path, "w") as trace_file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
@@ -0,0 +1,238 @@
+from pxr import Sdf, Usd
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from . import instrumentation
+from . import stage_cache
+from .change_set import ChangeSet, PropertyOverride, TimeSampledValue, compare_property_values
+from .property_filter import DEFAULT_PROPERTY_FILTER, PropertyFilter
+
+# Layer level counterpart to PrimTransfer. Instead of composing both stages and walking
+# Usd.Prim properties, this works directly on the Sdf specs of Blender's flat export layer
+# and a flattened source layer, authoring the same overrides straight into the override layer.
+
+logger = logging.getLogger(__name__)
+
+
+def open_flattened_layer(layer_path: str, refresh: bool = True) -> Sdf.Layer:
+    """Open a layer for spec level diffing.
+
+    Layers without sublayers, references or payloads to other files are already flat and
+    are returned as is, otherwise the composed stage is flattened into an anonymous layer.
+
+    Args:
+        layer_path (str): Path to the layer to open
+        refresh (bool): Reload the layer if it changed on disk, see stage_cache.refresh_all
+
+    Returns:
+        Sdf.Layer: A single layer holding all opinions of the given file
+    """
+    layer = stage_cache.open_layer(layer_path, refresh=refresh)
+    if not layer.externalReferences:
+        return layer
+    return stage_cache.open_stage(layer_path, refresh=refresh).Flatten()
+
+
+def is_generated_prim_spec(prim_spec: Sdf.PrimSpec) -> bool:
+    """Check if a prim spec was autogenerated by Blender like "root"."""
+    blender_data = prim_spec.customData.get("Blender")
+    return bool(blender_data and blender_data.get("generated"))
+
+
+def get_all_prim_specs(layer: Sdf.Layer) -> List[Sdf.PrimSpec]:
+    """Get all defined prim specs in a layer, except for those autogenerated by Blender like "root".
+
+    Mirrors `Usd.Stage.Traverse()`, inactive, undefined and abstract prims are skipped
+    along with their descendants.
+
+    Args:
+        layer (Sdf.Layer): The layer to traverse.
+
+    Returns:
+        List[Sdf.PrimSpec]: A list of all non-generated prim specs in the layer.
+    """
+    all_specs: List[Sdf.PrimSpec] = []
+    stack = list(reversed(layer.rootPrims))
+    while stack:
+        prim_spec = stack.pop()
+        if prim_spec.specifier != Sdf.SpecifierDef or not prim_spec.active:
+            continue
+        if not is_generated_prim_spec(prim_spec):
+            all_specs.append(prim_spec)
+        stack.extend(reversed(prim_spec.nameChildren))
+    return all_specs
+
+
+def get_schema_property_spec(
+    type_name: str, prop_name: str
+) -> Optional[Sdf.PropertySpec]:
+    """Get the built-in property definition of a schema type, eg. 'doubleSided' on 'Mesh'."""
+    prim_definition = Usd.SchemaRegistry().FindConcretePrimDefinition(type_name)
+    if not prim_definition:
+        return None
+    return prim_definition.GetSchemaPropertySpec(prop_name)
+
+
+class PrimSpecTransfer:
+    """
+    NOTE: This class assumes, bl_spec and source_spec live in flat layers (see open_flattened_layer).
+    Overrides are queued on the change set, which authors them into a layer with the source as a sublayer.
+    """
+
+    def __init__(
+        self,
+        bl_spec: Sdf.PrimSpec,
+        source_spec: Sdf.PrimSpec,
+        change_set: ChangeSet,
+        skip_property: Optional[Callable[[str], bool]] = None,
+        property_filter: PropertyFilter = DEFAULT_PROPERTY_FILTER,
+    ) -> None:
+        self.bl_spec: Sdf.PrimSpec = bl_spec
+        self.source_spec: Sdf.PrimSpec = source_spec
+        self.change_set: ChangeSet = change_set
+        # Properties known to be unchanged without comparing them, see PrimTransfer
+        self.skip_property: Optional[Callable[[str], bool]] = skip_property
+        self.property_filter: PropertyFilter = property_filter
+
+    def get_property_spec(
+        self, prim_spec: Sdf.PrimSpec, prop_name: str
+    ) -> Optional[Sdf.PropertySpec]:
+        """Get a property authored on the spec, falling back to the schema definition like a composed prim would."""
+        prop_spec = prim_spec.properties.get(prop_name)
+        if prop_spec:
+            return prop_spec
+        return get_schema_property_spec(prim_spec.typeName, prop_name)
+
+    def get_property_value(
+        self, prim_spec: Sdf.PrimSpec, prop_spec: Sdf.PropertySpec
+    ) -> Optional[Any]:
+        """Get the value from a property spec, handling both attributes and relationships."""
+        if isinstance(prop_spec, Sdf.RelationshipSpec):
+            return list(prop_spec.targetPathList.GetAddedOrExplicitItems())
+
+        default = prop_spec.default
+        if default is None:
+            # Match Usd.Attribute.Get() which returns the schema fallback if no value is authored
+            schema_spec = get_schema_property_spec(prim_spec.typeName, prop_spec.name)
+            if schema_spec and not isinstance(schema_spec, Sdf.RelationshipSpec):
+                default = schema_spec.default
+
+        # Animated attributes are compared by their default along with every time sample
+        if prop_spec.HasInfo("timeSamples"):
+            return TimeSampledValue(default, dict(prop_spec.GetInfo("timeSamples")))
+        return default
+
+    def get_property_override(
+        self, src_prop: Sdf.PropertySpec, value: Any
+    ) -> PropertyOverride:
+        """Describe an override of the property with the source's type, handling both attributes and relationships."""
+        if isinstance(src_prop, Sdf.RelationshipSpec):
+            return PropertyOverride(src_prop.name, value, None, custom=src_prop.custom)
+        time_samples = None
+        if isinstance(value, TimeSampledValue):
+            value, time_samples = value.default, value.time_samples
+        return PropertyOverride(
+            src_prop.name,
+            value,
+            src_prop.typeName,
+            src_prop.variability,
+            src_prop.custom,
+            time_samples,
+        )
+
+    def compare_prim_properties(
+        self, src_spec: Sdf.PrimSpec, trg_spec: Sdf.PrimSpec
+    ) -> Dict[str, Any]:
+        """Compare properties between two prim specs and return dictionary of differences."""
+        differences = {}
+        num_compared = 0
+        num_skipped = 0
+
+        for trg_prop in trg_spec.properties:
+            if self.property_filter.is_ignored(trg_prop.name):
+                num_skipped += 1
+                continue
+            if self.skip_property and self.skip_property(trg_prop.name):
+                num_skipped += 1
+                continue
+
+            trg_value = self.get_property_value(trg_spec, trg_prop)
+            if trg_value is None:
+                continue
+
+            src_prop = self.get_property_spec(src_spec, trg_prop.name)
+            if not src_prop:
+                # Property missing in source, add it
+                differences[trg_prop.name] = trg_value
+                continue
+
+            # Compare existing properties
+            src_value = self.get_property_value(src_spec, src_prop)
+            num_compared += 1
+            if not compare_property_values(
+                src_value, trg_value, tolerance=self.property_filter.get_tolerance(trg_prop.name)
+            ):
+                differences[trg_prop.name] = trg_value
+
+        # Built-in properties left unauthored by Blender compose to their schema fallback
+        for src_prop in src_spec.properties:
+            if src_prop.name in trg_spec.properties:
+                continue
+            if self.property_filter.is_ignored(src_prop.name):
+                continue
+            if self.skip_property and self.skip_property(src_prop.name):
+                continue
+
+            schema_spec = get_schema_property_spec(trg_spec.typeName, src_prop.name)
+            if not schema_spec:
+                continue
+
+            trg_value = self.get_property_value(trg_spec, schema_spec)
+            if trg_value is None:
+                continue
+
+            src_value = self.get_property_value(src_spec, src_prop)
+            num_compared += 1
+            if not compare_property_values(
+                src_value, trg_value, tolerance=self.property_filter.get_tolerance(src_prop.name)
+            ):
+                differences[src_prop.name] = trg_value
+
+        instrumentation.count(instrumentation.PROPERTIES_COMPARED, num_compared)
+        instrumentation.count(instrumentation.PROPERTIES_SKIPPED, num_skipped)
+        return differences
+
+    def apply_property_overrides(
+        self,
+        src_spec: Sdf.PrimSpec,
+        change_set: ChangeSet,
+        property_differences: Dict[str, Any],
+    ) -> None:
+        """Queue property differences as overrides of the source spec on the change set."""
+        logger.debug("PRIM: Overriding Prim: %s", src_spec.path)
+
+        overrides = []
+        for prop_name, prop_value in property_differences.items():
+            # Like Usd.Stage, only properties known to the source prim can be overridden
+            src_prop = self.get_property_spec(src_spec, prop_name)
+            if not src_prop:
+                continue
+            overrides.append(self.get_property_override(src_prop, prop_value))
+            logger.debug("PROP: Overrided '%s' on '%s'", prop_name, src_spec.path)
+        change_set.add_overrides(src_spec.path, overrides)
+
+    def generate_overrides(self) -> None:
+        """Queue overrides on the change set for differences between bl_spec and source_spec."""
+        differences = self.compare_prim_properties(self.source_spec, self.bl_spec)
+        self.apply_property_overrides(self.source_spec, self.change_set, differences)
+
+    def get_changes(self) -> Dict[str, Any]:
+        """Get the property differences between bl_spec and source_spec."""
+        return self.compare_prim_properties(self.source_spec, self.bl_spec)
+
+    def apply_changes(self, differences: Dict[str, Any]) -> None:
+        """Queue differences previously returned by get_changes on the change set."""
+        self.apply_property_overrides(self.source_spec, self.change_set, differences)
+
+    def get_path(self) -> Sdf.Path:
+        return self.bl_spec.path
+
@@ -0,0 +1,129 @@
+from pxr import Sdf
+from pathlib import Path
+from typing import Any, Dict, List
+import logging
+import os
+import tempfile
+import time
+
+# File format of written override layers. Layers carrying large arrays, eg. new meshes,
+# parse much faster downstream as binary crate files, small layers stay readable as ASCII.
+# The format of ".usd" files can be chosen freely, ".usda" and ".usdc" files keep theirs.
+
+LAYER_FORMAT_ITEMS = [
+    (
+        "AUTO",
+        "Automatic",
+        "Binary crate if the layer's arrays add up to more than a megabyte, ASCII otherwise",
+    ),
+    ("USDC", "Binary Crate", "Always write binary crate files"),
+    ("USDA", "ASCII", "Always write human readable text files"),
+]
+
+# Estimated bytes of array data above which AUTO writes binary crate files
+AUTO_CRATE_THRESHOLD = 1024**2
+
+GENERIC_SUFFIX = ".usd"
+FORMAT_SUFFIXES = {".usda": "usda", ".usdc": "usdc"}
+
+logger = logging.getLogger(__name__)
+
+
+def get_layer_file_name(stem: str) -> str:
+    """Get the file name of a new override layer, with an extension that allows any format."""
+    return stem + GENERIC_SUFFIX
+
+
+def _get_value_size(value: Any) -> int:
+    try:
+        return memoryview(value).nbytes
+    except TypeError:
+        return 0
+
+
+def estimate_payload_size(layer: Sdf.Layer) -> int:
+    """Estimate the bytes of numeric data authored in a layer, defaults and time samples included."""
+    size = 0
+    stack: List[Sdf.PrimSpec] = list(layer.rootPrims)
+    while stack:
+        prim_spec = stack.pop()
+        for attribute in prim_spec.attributes:
+            size += _get_value_size(attribute.default)
+            num_samples = layer.GetNumTimeSamplesForPath(attribute.path)
+            if num_samples:
+                first_time = min(layer.ListTimeSamplesForPath(attribute.path))
+                sample = layer.QueryTimeSample(attribute.path, first_time)
+                size += _get_value_size(sample) * num_samples
+        stack.extend(prim_spec.nameChildren)
+    return size
+
+
+def resolve_file_format(file_path: str, layer_format: str, layer: Sdf.Layer) -> str:
+    """Get the file format a layer is written with, "usda" or "usdc".
+
+    Args:
+        file_path (str): Path the layer is written to, ".usda" and ".usdc" files keep their format
+        layer_format (str): One of LAYER_FORMAT_ITEMS
+        layer (Sdf.Layer): Layer to write, its arrays are measured for AUTO
+
+    Returns:
+        str: File format argument for Sdf.Layer.Export
+    """
+    extension_format = FORMAT_SUFFIXES.get(Path(file_path).suffix)
+    if extension_format:
+        if layer_format != "AUTO" and layer_format.lower() != extension_format:
+            logger.warning(
+                "Writing '%s' as %s, its extension doesn't allow %s",
+                file_path,
+                extension_format,
+                layer_format.lower(),
+            )
+        return extension_format
+
+    if layer_format == "AUTO":
+        return "usdc" if estimate_payload_size(layer) > AUTO_CRATE_THRESHOLD else "usda"
+    return layer_format.lower()
+
+
+def save_layer(layer: Sdf.Layer, file_path: str, layer_format: str) -> str:
+    """Write a layer to its file in the chosen format.
+
+    Returns:
+        str: The file format written, see resolve_file_format
+    """
+    file_format = resolve_file_format(file_path, layer_format, layer)
+    if Path(file_path).suffix not in FORMAT_SUFFIXES:
+        layer.Export(file_path, args={"format": file_format})
+    elif layer.anonymous:
+        # Anonymous layers, eg. saved change sets, have no file of their own to save to
+        layer.Export(file_path)
+    else:
+        layer.Save()
+    return file_format
+
+
+def compare_layer_formats(layer: Sdf.Layer) -> Dict[str, Dict[str, float]]:
+    """Write a layer in each format to a temporary directory and measure it.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per file format the "write_seconds", "read_seconds" and "bytes"
+    """
+    report: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="usd_layer_formats_") as tmp_dir:
+        for file_format in ("usda", "usdc"):
+            tmp_path = os.path.join(tmp_dir, f"layer.{file_format}")
+
+            start = time.perf_counter()
+            layer.Export(tmp_path)
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            Sdf.Layer.OpenAsAnonymous(tmp_path)
+            read_seconds = time.perf_counter() - start
+
+            report[file_format] = {
+                "write_seconds": write_seconds,
+                "read_seconds": read_seconds,
+                "bytes": os.path.getsize(tmp_path),
+            }
+    return report
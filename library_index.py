@@ -0,0 +1,86 @@
+import bpy
+from bpy.app.handlers import persistent
+from typing import Dict, List, NamedTuple
+
+# Partitions the objects of each scene by the USD library they were imported from. The index is
+# built in a single pass over the scene's objects when first needed and reused until objects are
+# added, removed or renamed, instead of scanning all objects once per library.
+
+
+class SceneIndex(NamedTuple):
+    # Hash of the scene's object names when the index was built, to detect added, removed or
+    # renamed objects, even when as many objects were added as removed
+    objects_key: int
+    # Object names keyed by library name
+    library_objects: Dict[str, List[str]]
+
+
+# Indices keyed by scene name
+_indices: Dict[str, SceneIndex] = {}
+
+
+def invalidate() -> None:
+    """Rebuild the index on next use, eg. after importing or removing library objects."""
+    _indices.clear()
+
+
+def get_objects_key(scene: bpy.types.Scene) -> int:
+    """Get a key of the scene's objects which changes when any of them is added, removed or renamed."""
+    return hash(tuple(scene.objects.keys()))
+
+
+def build_index(scene: bpy.types.Scene) -> SceneIndex:
+    library_objects: Dict[str, List[str]] = {}
+    for obj in scene.objects:
+        library_name = obj.usd_connect_props.library_name
+        if library_name:
+            library_objects.setdefault(library_name, []).append(obj.name)
+    index = SceneIndex(get_objects_key(scene), library_objects)
+    _indices[scene.name] = index
+    return index
+
+
+def resolve_objects(
+    scene: bpy.types.Scene, index: SceneIndex, library_name: str
+) -> List[bpy.types.Object] | None:
+    """Look up the indexed objects of a library, None if any of them was renamed or removed."""
+    objects = []
+    for name in index.library_objects.get(library_name, []):
+        obj = scene.objects.get(name)
+        if not obj or obj.usd_connect_props.library_name != library_name:
+            return None
+        objects.append(obj)
+    return objects
+
+
+def get_library_objects(
+    scene: bpy.types.Scene, library_name: str
+) -> List[bpy.types.Object]:
+    """Get the objects of a scene imported from the given library.
+
+    Args:
+        scene (bpy.types.Scene): Scene the objects are linked to
+        library_name (str): Name of the library, see USDConnectLibraries.name
+
+    Returns:
+        List[bpy.types.Object]: Objects of the library
+    """
+    index = _indices.get(scene.name)
+    if index and index.objects_key == get_objects_key(scene):
+        objects = resolve_objects(scene, index, library_name)
+        if objects is not None:
+            return objects
+    return resolve_objects(scene, build_index(scene), library_name)
+
+
+@persistent
+def invalidate_on_load(*args) -> None:
+    invalidate()
+
+
+def register():
+    bpy.app.handlers.load_post.append(invalidate_on_load)
+
+
+def unregister():
+    bpy.app.handlers.load_post.remove(invalidate_on_load)
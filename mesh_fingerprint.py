@@ -0,0 +1,172 @@
+import bpy
+from typing import AbstractSet, FrozenSet, Iterable, NamedTuple, Set, Tuple
+import hashlib
+import json
+import numpy
+
+# Fingerprints of mesh data blocks taken when they are imported. On export a mesh's current
+# fingerprint is compared against the imported one, so the arrays of parts that weren't
+# edited are skipped instead of being compared value by value against the source prim.
+
+POSITIONS = "positions"
+TOPOLOGY = "topology"
+ATTRIBUTES = "attributes"
+
+# Mesh prim properties exported from each part of the mesh data block
+POSITION_PROPS = frozenset({"points", "extent"})
+TOPOLOGY_PROPS = frozenset({"faceVertexIndices", "faceVertexCounts"})
+# Normals are derived from positions and topology as well, see get_unchanged_parts
+ATTRIBUTE_PROPS = frozenset({"normals"})
+ATTRIBUTE_PREFIXES = ("primvars:",)
+
+# foreach_get key, number of components and buffer type of each attribute data type
+ATTRIBUTE_BUFFERS = {
+    "FLOAT": ("value", 1, numpy.float32),
+    "INT": ("value", 1, numpy.int32),
+    "INT8": ("value", 1, numpy.int32),
+    "BOOLEAN": ("value", 1, numpy.bool_),
+    "FLOAT2": ("vector", 2, numpy.float32),
+    "INT32_2D": ("value", 2, numpy.int32),
+    "FLOAT_VECTOR": ("vector", 3, numpy.float32),
+    "FLOAT_COLOR": ("color", 4, numpy.float32),
+    "BYTE_COLOR": ("color", 4, numpy.float32),
+    "QUATERNION": ("value", 4, numpy.float32),
+}
+
+
+class MeshFingerprint(NamedTuple):
+    vertex_count: int
+    # Bounding box min and max
+    extent: Tuple[float, ...]
+    positions: str
+    topology: str
+    # Empty if the attributes can't be fingerprinted, eg. custom normals, so they are always compared
+    attributes: str
+
+
+def _get_buffer(collection: bpy.types.bpy_prop_collection, key: str, components: int, dtype) -> numpy.ndarray:
+    buffer = numpy.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(key, buffer)
+    return buffer
+
+
+def _hash_buffers(*buffers: numpy.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for buffer in buffers:
+        digest.update(len(buffer).to_bytes(8, "little"))
+        digest.update(buffer.tobytes())
+    return digest.hexdigest()
+
+
+def get_attributes_hash(mesh: bpy.types.Mesh) -> str:
+    if mesh.has_custom_normals:
+        return ""
+
+    digest = hashlib.blake2b(digest_size=16)
+    # Smooth shading is an attribute only in newer versions of Blender
+    digest.update(_get_buffer(mesh.polygons, "use_smooth", 1, numpy.bool_).tobytes())
+    for attribute in sorted(mesh.attributes, key=lambda attribute: attribute.name):
+        # Positions are fingerprinted separately, internal attributes like selection aren't exported
+        if attribute.name == "position" or attribute.name.startswith("."):
+            continue
+        buffer_info = ATTRIBUTE_BUFFERS.get(attribute.data_type)
+        if not buffer_info:
+            return ""
+        digest.update(f"\0{attribute.name}\0{attribute.domain}\0".encode())
+        digest.update(_get_buffer(attribute.data, *buffer_info).tobytes())
+    return digest.hexdigest()
+
+
+def compute_mesh_fingerprint(mesh: bpy.types.Mesh) -> MeshFingerprint:
+    """Fingerprint the positions, topology and attributes of a mesh, reading each array in bulk."""
+    positions = _get_buffer(mesh.vertices, "co", 3, numpy.float32)
+    if len(positions):
+        points = positions.reshape(-1, 3)
+        extent = tuple(float(value) for value in (*points.min(axis=0), *points.max(axis=0)))
+    else:
+        extent = ()
+
+    loop_vertices = _get_buffer(mesh.loops, "vertex_index", 1, numpy.int32)
+    loop_totals = _get_buffer(mesh.polygons, "loop_total", 1, numpy.int32)
+
+    return MeshFingerprint(
+        vertex_count=len(mesh.vertices),
+        extent=extent,
+        positions=_hash_buffers(positions),
+        topology=_hash_buffers(loop_vertices, loop_totals),
+        attributes=get_attributes_hash(mesh),
+    )
+
+
+def store_mesh_fingerprint(mesh: bpy.types.Mesh) -> None:
+    """Store the mesh's current fingerprint as the one to compare exports against."""
+    mesh.usd_connect_props.mesh_fingerprint = json.dumps(
+        compute_mesh_fingerprint(mesh)._asdict()
+    )
+
+
+def load_mesh_fingerprint(mesh: bpy.types.Mesh) -> MeshFingerprint | None:
+    """Get the fingerprint stored at import, None if the mesh wasn't fingerprinted."""
+    if not mesh.usd_connect_props.mesh_fingerprint:
+        return None
+    data = json.loads(mesh.usd_connect_props.mesh_fingerprint)
+    data["extent"] = tuple(data["extent"])
+    return MeshFingerprint(**data)
+
+
+def get_evaluated_mesh_names(objects: Iterable[bpy.types.Object]) -> Set[str]:
+    """Get the names of meshes used by objects with modifiers, which are exported as evaluated by them."""
+    return {obj.data.name for obj in objects if obj.type == "MESH" and obj.data and obj.modifiers}
+
+
+def get_unchanged_parts(
+    mesh: bpy.types.Mesh, evaluated_mesh_names: AbstractSet[str] = frozenset()
+) -> FrozenSet[str]:
+    """Get the parts of a mesh that weren't edited since it was imported.
+
+    The export writes the evaluated mesh, so meshes with shape keys or used by objects with
+    modifiers have no unchanged parts, their fingerprint doesn't describe what is exported.
+
+    Args:
+        mesh (bpy.types.Mesh): Mesh data block to check
+        evaluated_mesh_names (AbstractSet[str]): Meshes used by objects with modifiers, see get_evaluated_mesh_names
+
+    Returns:
+        FrozenSet[str]: Any of POSITIONS, TOPOLOGY and ATTRIBUTES
+    """
+    if mesh.shape_keys or mesh.name in evaluated_mesh_names:
+        return frozenset()
+
+    imported = load_mesh_fingerprint(mesh)
+    if imported is None:
+        return frozenset()
+
+    current = compute_mesh_fingerprint(mesh)
+    unchanged = set()
+    if (current.vertex_count, current.extent, current.positions) == (
+        imported.vertex_count,
+        imported.extent,
+        imported.positions,
+    ):
+        unchanged.add(POSITIONS)
+    if current.topology == imported.topology:
+        unchanged.add(TOPOLOGY)
+    # Normals depend on all parts, so attributes only count as unchanged along with the others
+    if (
+        current.attributes
+        and current.attributes == imported.attributes
+        and unchanged == {POSITIONS, TOPOLOGY}
+    ):
+        unchanged.add(ATTRIBUTES)
+    return frozenset(unchanged)
+
+
+def is_unchanged_property(unchanged_parts: FrozenSet[str], prop_name: str) -> bool:
+    """Check if a mesh prim property is exported from one of the unchanged parts, see get_unchanged_parts."""
+    if POSITIONS in unchanged_parts and prop_name in POSITION_PROPS:
+        return True
+    if TOPOLOGY in unchanged_parts and prop_name in TOPOLOGY_PROPS:
+        return True
+    if ATTRIBUTES in unchanged_parts:
+        return prop_name in ATTRIBUTE_PROPS or prop_name.startswith(ATTRIBUTE_PREFIXES)
+    return False
@@ -1,7 +1,14 @@
 import bpy
 import os
 from . import core
+from . import instrumentation
+from . import stage_cache
+from .props import DIFF_MODE_ITEMS, EXPORT_STAGING_ITEMS
+from .property_filter import ACTION_ITEMS, SYNTAX_ITEMS
+from .layer_format import LAYER_FORMAT_ITEMS
+from . import layer_format
 from pathlib import Path
+from pxr import Sdf
 import shutil
 
 ###########################################################
@@ -21,7 +28,9 @@ class USDConnectorAddReference(bpy.types.Operator):
         layout.prop(self, "filepath", text="USD File Path")
 
     def execute(self, context) -> {'FINISHED'}:
-        core.import_usd_reference(self.filepath)
+        instrumentation.reset()
+        with instrumentation.span("import_usd_reference", filepath=self.filepath):
+            core.import_usd_reference(self.filepath)
         return {'FINISHED'}
 
     def invoke(self, context, event) -> {'RUNNING_MODAL'}:
@@ -40,19 +49,153 @@ class USDConnectorExportLayer(bpy.types.Operator):
 
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")  # type: ignore
 
+    library_name: bpy.props.StringProperty(  # type: ignore
+        name="Library",
+        description="USD library to export the overrides of, may be empty if the scene has only one",
+        default="",
+    )
+
+    diff_mode: bpy.props.EnumProperty(  # type: ignore
+        name="Diff Mode",
+        description="How the Blender export is compared against the source to generate overrides",
+        items=DIFF_MODE_ITEMS,
+        default="STAGE",
+    )
+
+    layer_format: bpy.props.EnumProperty(  # type: ignore
+        name="Layer Format",
+        description="File format of the override layer, if its extension is .usd",
+        items=LAYER_FORMAT_ITEMS,
+        default="AUTO",
+    )
+
+    export_staging: bpy.props.EnumProperty(  # type: ignore
+        name="Export Staging",
+        description="Where Blender's full USD export is written before overrides are generated from it",
+        items=EXPORT_STAGING_ITEMS,
+        default="TARGET_DIR",
+    )
+
+    incremental: bpy.props.BoolProperty(  # type: ignore
+        name="Incremental",
+        description=(
+            "Only export data changed since the last export to this file and merge it into "
+            "the existing layer. Falls back to a full export if changes weren't tracked"
+        ),
+        default=False,
+    )
+
+    def get_library(self, context) -> bpy.types.PropertyGroup | None:
+        libraries = context.scene.usd_connect_libraries
+        if self.library_name:
+            return libraries.get(self.library_name)
+        if len(libraries) == 1:
+            return libraries[0]
+        return None
+
+    def draw(self, context) -> None:
+        layout = self.layout
+        layout.prop_search(self, "library_name", context.scene, "usd_connect_libraries")
+        layout.prop(self, "diff_mode")
+        layout.prop(self, "layer_format")
+        layout.prop(self, "export_staging")
+        layout.prop(self, "incremental")
+
     def execute(self, context) -> {'FINISHED'}:
-        if len(context.scene.usd_connect_libraries) != 1:
+        library = self.get_library(context)
+        if not library:
             self.report({'ERROR'}, "USD Library not found.")
             return {'CANCELLED'}
 
-        core.export_usd_layer(Path(self.filepath))
+        if self.properties.is_property_set("diff_mode"):
+            library.diff_mode = self.diff_mode
+        if self.properties.is_property_set("layer_format"):
+            library.layer_format = self.layer_format
+        if self.properties.is_property_set("export_staging"):
+            library.export_staging = self.export_staging
+        instrumentation.reset()
+        with instrumentation.span("export_usd_layer", filepath=self.filepath):
+            if self.incremental:
+                bytes_saved = core.export_usd_layer_incremental(
+                    Path(self.filepath), library=library
+                )
+            else:
+                bytes_saved = core.export_usd_layer(Path(self.filepath), library=library)
+
+        if bytes_saved:
+            self.report(
+                {'INFO'},
+                f"Staged export in memory, saved {bytes_saved / 1024**2:.1f} MB of I/O",
+            )
         return {'FINISHED'}
 
     def invoke(self, context, event) -> {'RUNNING_MODAL'}:
+        libraries = context.scene.usd_connect_libraries
+        if not self.library_name and libraries:
+            self.library_name = libraries[0].name
+        library = self.get_library(context)
+        if library:
+            self.diff_mode = library.diff_mode
+            self.layer_format = library.layer_format
+            self.export_staging = library.export_staging
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
 
+class USDConnectorExportAllLayers(bpy.types.Operator):
+    bl_idname = "usd.connector_export_all_layers"
+    bl_label = "Export All USD Layers"
+    bl_description = (
+        "Export the overrides of every USD library to its export path, "
+        "from a single export of the scene"
+    )
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context) -> {'FINISHED'}:
+        libraries = list(context.scene.usd_connect_libraries)
+        if not libraries:
+            self.report({'ERROR'}, "USD Library not found.")
+            return {'CANCELLED'}
+
+        instrumentation.reset()
+        with instrumentation.span("export_usd_layers", libraries=len(libraries)):
+            core.export_usd_layers(libraries)
+        self.report({'INFO'}, f"Exported {len(libraries)} USD layers")
+        return {'FINISHED'}
+
+
+class USDConnectPreviewOverrides(bpy.types.Operator):
+    bl_idname = "usd.connector_preview_overrides"
+    bl_label = "Preview USD Overrides"
+    bl_description = (
+        "Diff every USD library without writing its layer, saving the changes next to its "
+        "export path for review. The next export writes them as they are, unless the scene changed"
+    )
+    bl_options = {'REGISTER'}
+
+    def execute(self, context) -> {'FINISHED'}:
+        libraries = list(context.scene.usd_connect_libraries)
+        if not libraries:
+            self.report({'ERROR'}, "USD Library not found.")
+            return {'CANCELLED'}
+        if any(not library.export_path for library in libraries):
+            self.report({'ERROR'}, "Export each USD library once to set its export path.")
+            return {'CANCELLED'}
+
+        instrumentation.reset()
+        with instrumentation.span("preview_usd_layers", libraries=len(libraries)):
+            pending_change_sets = core.preview_usd_layers(libraries)
+        for library_name, pending_change_set in pending_change_sets.items():
+            summary = pending_change_set.change_set.get_summary()
+            self.report(
+                {'INFO'},
+                f"{library_name}: {summary['changed_properties']} properties on "
+                f"{summary['changed_prims']} prims changed, {summary['new_prims']} new prims, "
+                f"saved to '{pending_change_set.file_path}'",
+            )
+        return {'FINISHED'}
+
+
 ############################################################
 # Refresh Library
 ############################################################
@@ -62,20 +205,263 @@ class USDConnectLibraryRefresh(bpy.types.Operator):
     bl_description = "Export current USD library overrides to the export path"
     bl_options = {'REGISTER', 'UNDO'}
 
+    incremental: bpy.props.BoolProperty(  # type: ignore
+        name="Incremental",
+        description=(
+            "Only reimport prims whose content changed upstream since the last import or refresh. "
+            "Falls back to a full refresh if the library's snapshot is missing"
+        ),
+        default=True,
+    )
+
+    def execute(self, context) -> {'FINISHED'}:
+        if not context.scene.usd_connect_libraries:
+            self.report({'ERROR'}, "USD Library not found.")
+            return {'CANCELLED'}
+
+        # Export the current overrides of every library
+        instrumentation.reset()
+        with instrumentation.span("refresh_usd_library"):
+            core.refresh_usd_library(incremental=self.incremental)
+        return {'FINISHED'}
+
+
+############################################################
+# Property Rules
+############################################################
+class USDConnectAddPropertyRule(bpy.types.Operator):
+    bl_idname = "usd.connector_add_property_rule"
+    bl_label = "Add USD Property Rule"
+    bl_description = (
+        "Ignore properties of a USD library when generating overrides, "
+        "or compare them with a custom tolerance"
+    )
+    bl_options = {'REGISTER', 'UNDO'}
+
+    library_name: bpy.props.StringProperty(name="Library", default="")  # type: ignore
+
+    pattern: bpy.props.StringProperty(  # type: ignore
+        name="Pattern",
+        description="Property names the rule applies to, eg. 'primvars:*'",
+        default="",
+    )
+
+    syntax: bpy.props.EnumProperty(name="Syntax", items=SYNTAX_ITEMS, default="GLOB")  # type: ignore
+
+    action: bpy.props.EnumProperty(name="Action", items=ACTION_ITEMS, default="IGNORE")  # type: ignore
+
+    tolerance: bpy.props.FloatProperty(name="Tolerance", default=0.01, min=0.0, precision=6)  # type: ignore
+
+    def draw(self, context) -> None:
+        layout = self.layout
+        layout.prop_search(self, "library_name", context.scene, "usd_connect_libraries")
+        layout.prop(self, "pattern")
+        layout.prop(self, "syntax")
+        layout.prop(self, "action")
+        if self.action == "TOLERANCE":
+            layout.prop(self, "tolerance")
+
     def execute(self, context) -> {'FINISHED'}:
-        if len(context.scene.usd_connect_libraries) != 1:
+        library = context.scene.usd_connect_libraries.get(self.library_name)
+        if not library:
             self.report({'ERROR'}, "USD Library not found.")
             return {'CANCELLED'}
 
-        # Export the current overrides
-        core.refresh_usd_library()
+        rule = library.property_rules.add()
+        rule.pattern = self.pattern
+        rule.syntax = self.syntax
+        rule.action = self.action
+        rule.tolerance = self.tolerance
+        try:
+            core.get_library_property_filter(library)
+        except ValueError as e:
+            library.property_rules.remove(len(library.property_rules) - 1)
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+    def invoke(self, context, event) -> {'RUNNING_MODAL'}:
+        libraries = context.scene.usd_connect_libraries
+        if not self.library_name and libraries:
+            self.library_name = libraries[0].name
+        return context.window_manager.invoke_props_dialog(self)
+
+
+class USDConnectRemovePropertyRule(bpy.types.Operator):
+    bl_idname = "usd.connector_remove_property_rule"
+    bl_label = "Remove USD Property Rule"
+    bl_description = "Remove a property rule of a USD library"
+    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+
+    library_name: bpy.props.StringProperty(name="Library", default="")  # type: ignore
+
+    index: bpy.props.IntProperty(name="Index", default=0, min=0)  # type: ignore
+
+    def execute(self, context) -> {'FINISHED'}:
+        library = context.scene.usd_connect_libraries.get(self.library_name)
+        if not library or self.index >= len(library.property_rules):
+            self.report({'ERROR'}, "USD Property Rule not found.")
+            return {'CANCELLED'}
+
+        library.property_rules.remove(self.index)
+        return {'FINISHED'}
+
+
+class USDConnectEditPropertyRules(bpy.types.Operator):
+    bl_idname = "usd.connector_edit_property_rules"
+    bl_label = "Edit USD Property Rules"
+    bl_description = (
+        "Edit or remove the property rules of a USD library, "
+        "and choose whether heavy attributes are skipped"
+    )
+    bl_options = {'REGISTER', 'UNDO'}
+
+    library_name: bpy.props.StringProperty(name="Library", default="")  # type: ignore
+
+    def draw(self, context) -> None:
+        layout = self.layout
+        layout.prop_search(self, "library_name", context.scene, "usd_connect_libraries")
+        library = context.scene.usd_connect_libraries.get(self.library_name)
+        if not library:
+            return
+
+        layout.prop(library, "skip_heavy_attributes")
+        if not library.property_rules:
+            layout.label(text="No property rules, add them with Add USD Property Rule")
+        for index, rule in enumerate(library.property_rules):
+            row = layout.row(align=True)
+            row.prop(rule, "pattern", text="")
+            row.prop(rule, "syntax", text="")
+            row.prop(rule, "action", text="")
+            if rule.action == "TOLERANCE":
+                row.prop(rule, "tolerance", text="")
+            remove = row.operator(USDConnectRemovePropertyRule.bl_idname, text="", icon='X')
+            remove.library_name = library.name
+            remove.index = index
+
+    def execute(self, context) -> {'FINISHED'}:
+        library = context.scene.usd_connect_libraries.get(self.library_name)
+        if not library:
+            self.report({'ERROR'}, "USD Library not found.")
+            return {'CANCELLED'}
+
+        # Rules are edited in place, an invalid pattern is reported but kept so it can be fixed
+        try:
+            core.get_library_property_filter(library)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+    def invoke(self, context, event) -> {'RUNNING_MODAL'}:
+        libraries = context.scene.usd_connect_libraries
+        if not self.library_name and libraries:
+            self.library_name = libraries[0].name
+        return context.window_manager.invoke_props_dialog(self, width=500)
+
+
+class USDConnectCompareLayerFormats(bpy.types.Operator):
+    bl_idname = "usd.connector_compare_layer_formats"
+    bl_label = "Compare USD Layer Formats"
+    bl_description = (
+        "Measure write time, read time and file size of each library's exported layer "
+        "as ASCII and as binary crate"
+    )
+
+    def execute(self, context) -> {'FINISHED'}:
+        num_compared = 0
+        for library in context.scene.usd_connect_libraries:
+            if not os.path.exists(library.export_path):
+                continue
+            report = layer_format.compare_layer_formats(
+                Sdf.Layer.OpenAsAnonymous(library.export_path)
+            )
+            self.report(
+                {'INFO'},
+                f"{library.name}: "
+                + ", ".join(
+                    f"{file_format} {stats['bytes'] / 1024**2:.2f} MB, "
+                    f"written in {stats['write_seconds']:.3f}s, read in {stats['read_seconds']:.3f}s"
+                    for file_format, stats in report.items()
+                ),
+            )
+            num_compared += 1
+
+        if not num_compared:
+            self.report({'ERROR'}, "No exported USD layers found.")
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+
+############################################################
+# Instrumentation
+############################################################
+class USDConnectSaveTrace(bpy.types.Operator):
+    bl_idname = "usd.connector_save_trace"
+    bl_label = "Save USD Connect Trace"
+    bl_description = (
+        "Save the timed phases and counters of the last import, export or refresh"
+    )
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")  # type: ignore
+
+    trace_format: bpy.props.EnumProperty(  # type: ignore
+        name="Format",
+        items=[
+            ("CHROME", "Chrome Trace", "Trace Event file for chrome://tracing or Perfetto"),
+            ("JSON", "JSON Summary", "Total and self time per phase, along with all counters"),
+        ],
+        default="CHROME",
+    )
+
+    def execute(self, context) -> {'FINISHED'}:
+        if self.trace_format == "CHROME":
+            instrumentation.save_chrome_trace(self.filepath)
+        else:
+            instrumentation.save_json(self.filepath)
+        self.report({'INFO'}, f"Saved trace to '{self.filepath}'")
+        return {'FINISHED'}
+
+    def invoke(self, context, event) -> {'RUNNING_MODAL'}:
+        if not self.filepath:
+            self.filepath = "usd_connect_trace.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+class USDConnectClearStageCache(bpy.types.Operator):
+    bl_idname = "usd.connector_clear_stage_cache"
+    bl_label = "Clear USD Stage Cache"
+    bl_description = (
+        "Release the USD stages kept open between exports and refreshes, "
+        "reporting the cache's hits and misses of this session"
+    )
+
+    def execute(self, context) -> {'FINISHED'}:
+        stats = stage_cache.get_stats()
+        stage_cache.clear()
+        self.report(
+            {'INFO'},
+            f"Released {stats['stages']} stages ({stats['bytes'] / 1024**2:.1f} MB), "
+            f"{stats[stage_cache.STAGE_CACHE_HITS]} hits, "
+            f"{stats[stage_cache.STAGE_CACHE_MISSES]} misses, "
+            f"{stats[stage_cache.STAGE_CACHE_RELOADS]} reloads",
+        )
         return {'FINISHED'}
 
 
 classes = [
     USDConnectorAddReference,
     USDConnectorExportLayer,
+    USDConnectorExportAllLayers,
     USDConnectLibraryRefresh,
+    USDConnectAddPropertyRule,
+    USDConnectRemovePropertyRule,
+    USDConnectEditPropertyRules,
+    USDConnectCompareLayerFormats,
+    USDConnectPreviewOverrides,
+    USDConnectSaveTrace,
+    USDConnectClearStageCache,
 ]
 
 def register():
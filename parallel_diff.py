@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from pxr import Sdf
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Computes property differences of many prims on a thread pool. Only reading from the
+# stages/layers happens in the workers, authoring overrides is left to the caller on the
+# main thread, in the original prim order, so the output matches a serial diff exactly.
+
+
+def get_subtree_key(prim_path: Sdf.Path) -> Sdf.Path:
+    """Get the path of the subtree a prim is partitioned into, eg. '/root/Cube_A' for '/root/Cube_A/Cube_A'.
+
+    The first level below Blender's generated root prim is used, so a whole asset ends up in one partition.
+    """
+    prefixes = prim_path.GetPrefixes()
+    return prefixes[min(1, len(prefixes) - 1)]
+
+
+def partition_by_subtree(
+    prim_paths: Sequence[Sdf.Path], num_partitions: int
+) -> List[List[int]]:
+    """Split prims into partitions of roughly equal size, keeping subtrees together.
+
+    Args:
+        prim_paths (Sequence[Sdf.Path]): Paths of the prims to partition
+        num_partitions (int): Maximum number of partitions to create
+
+    Returns:
+        List[List[int]]: Indices into prim_paths for each non-empty partition
+    """
+    subtrees: Dict[Sdf.Path, List[int]] = {}
+    for index, prim_path in enumerate(prim_paths):
+        subtrees.setdefault(get_subtree_key(prim_path), []).append(index)
+
+    # Assign the largest subtrees first, each to the currently smallest partition
+    partitions: List[List[int]] = [[] for _ in range(num_partitions)]
+    for indices in sorted(subtrees.values(), key=len, reverse=True):
+        min(partitions, key=len).extend(indices)
+    return [partition for partition in partitions if partition]
+
+
+def _get_partition_changes(
+    transfers: Sequence[Any], partition: List[int]
+) -> List[Tuple[int, Dict[str, Any]]]:
+    return [(index, transfers[index].get_changes()) for index in partition]
+
+
+def compute_changes(
+    transfers: Sequence[Any], workers: int
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Compute the changes of PrimTransfer or PrimSpecTransfer objects across worker threads.
+
+    Args:
+        transfers (Sequence[Any]): Transfers to compute changes for, in traversal order
+        workers (int): Number of worker threads, 1 computes changes serially
+
+    Yields:
+        Tuple[Any, Dict[str, Any]]: Each transfer with its property differences, in the original order
+    """
+    if workers <= 1:
+        for transfer in transfers:
+            yield transfer, transfer.get_changes()
+        return
+
+    prim_paths = [transfer.get_path() for transfer in transfers]
+    # Smaller partitions than workers balance the load when subtree sizes vary
+    partitions = partition_by_subtree(prim_paths, workers * 4)
+
+    changes: List[Dict[str, Any] | None] = [None] * len(transfers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_get_partition_changes, transfers, partition)
+            for partition in partitions
+        ]
+        for future in futures:
+            for index, differences in future.result():
+                changes[index] = differences
+
+    for transfer, differences in zip(transfers, changes):
+        yield transfer, differences
@@ -0,0 +1,227 @@
+from pxr import Sdf, Usd, UsdUtils
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import os
+from .property_filter import BUILTIN_IGNORE_PROPS
+
+# Merkle style content hashes of prims and their subtrees. A prim exported by Blender whose
+# hash matches its source prim can't produce any overrides, so it doesn't need to be diffed.
+
+# Connector bookkeeping written on every imported prim, it never exists on the source prim
+HASH_IGNORE_PROPS = BUILTIN_IGNORE_PROPS + ["userProperties:source_prm"]
+
+HASH_FILE_SUFFIX = ".hashes.json"
+
+
+class PrimHash(NamedTuple):
+    """Hash of a prim's own content and of the prim including all its descendants."""
+
+    prim: str
+    subtree: str
+
+
+def _update_with_value(digest: Any, value: Any) -> None:
+    # Numeric Vt arrays and Gf types are hashed straight from their buffer
+    try:
+        buffer = memoryview(value)
+    except TypeError:
+        digest.update(repr(value).encode())
+        return
+    digest.update(type(value).__name__.encode())
+    digest.update(buffer)
+
+
+def get_prim_content_hash(prim: Usd.Prim) -> str:
+    """Hash the type, authored property values and time samples of a prim, the same data PrimTransfer compares.
+
+    Values are hashed exactly, so prims with equal hashes are always equal within any tolerance.
+
+    Args:
+        prim (Usd.Prim): Prim to hash
+
+    Returns:
+        str: Hex digest of the prim's content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(prim.GetTypeName().encode())
+    for prop in prim.GetAuthoredProperties():
+        name = prop.GetName()
+        if name in HASH_IGNORE_PROPS:
+            continue
+        digest.update(b"\0" + name.encode() + b"\0")
+        if isinstance(prop, Usd.Relationship):
+            _update_with_value(digest, prop.GetTargets())
+            continue
+        _update_with_value(digest, prop.Get())
+        # Animation is part of the content, prims differing only in time samples must not match
+        for time in prop.GetTimeSamples():
+            digest.update(b"\0" + repr(time).encode() + b"\0")
+            _update_with_value(digest, prop.Get(time))
+    return digest.hexdigest()
+
+
+def compute_prim_hashes(stage: Usd.Stage) -> Dict[str, PrimHash]:
+    """Compute the content and subtree hash of every prim in a stage.
+
+    Args:
+        stage (Usd.Stage): Stage to hash
+
+    Returns:
+        Dict[str, PrimHash]: Hashes keyed by prim path
+    """
+    hashes: Dict[str, PrimHash] = {}
+
+    def visit(prim: Usd.Prim) -> str:
+        prim_hash = get_prim_content_hash(prim)
+        subtree = hashlib.blake2b(prim_hash.encode(), digest_size=16)
+        for child in prim.GetChildren():
+            subtree.update(b"\0" + child.GetName().encode() + b"\0")
+            subtree.update(visit(child).encode())
+        subtree_hash = subtree.hexdigest()
+        hashes[str(prim.GetPath())] = PrimHash(prim_hash, subtree_hash)
+        return subtree_hash
+
+    for root_prim in stage.GetPseudoRoot().GetChildren():
+        visit(root_prim)
+    return hashes
+
+
+def get_hash_file_path(snapshot_file_path: str) -> Path:
+    """Get the path the prim hashes of a snapshot are stored at, next to the snapshot itself."""
+    return Path(snapshot_file_path + HASH_FILE_SUFFIX)
+
+
+def get_validity_key(file_path: str) -> str:
+    """Identify a USD file and every layer it composes by their paths, sizes and modification times.
+
+    Like snapshot_store.get_source_digest, sublayers, references and payloads are included, so
+    editing any of them invalidates hashes stored for the root file.
+
+    Args:
+        file_path (str): Root layer of the file
+
+    Returns:
+        str: Hex digest, changes whenever the root layer or one of its dependencies is modified
+    """
+    layers, _assets, _unresolved = UsdUtils.ComputeAllDependencies(file_path)
+    digest = hashlib.blake2b(Path(file_path).resolve().as_posix().encode(), digest_size=16)
+    for layer_path in sorted(layer.realPath for layer in layers if layer.realPath):
+        stat = os.stat(layer_path)
+        digest.update(f"\0{layer_path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def save_prim_hashes(
+    hashes: Dict[str, PrimHash], hash_file_path: Path, valid_for: Iterable[str]
+) -> None:
+    """Store prim hashes on disk.
+
+    Args:
+        hashes (Dict[str, PrimHash]): Hashes to store, see compute_prim_hashes
+        hash_file_path (Path): File to write the hashes to
+        valid_for (Iterable[str]): Files holding the hashed content, eg. the source file and its snapshot.
+            The hashes are only used while these files and the layers they compose are unmodified.
+    """
+    data = {
+        "valid_for": [get_validity_key(file_path) for file_path in valid_for],
+        "prims": {path: list(prim_hash) for path, prim_hash in hashes.items()},
+    }
+    with open(hash_file_path, "w") as hash_file:
+        json.dump(data, hash_file)
+
+
+def load_prim_hashes(
+    hash_file_path: Path, source_file_path: str
+) -> Optional[Dict[str, PrimHash]]:
+    """Load stored prim hashes, if they still describe the given source file.
+
+    Args:
+        hash_file_path (Path): File the hashes were written to, see save_prim_hashes
+        source_file_path (str): File the Blender export will be compared against
+
+    Returns:
+        Optional[Dict[str, PrimHash]]: Hashes keyed by prim path, None if missing or outdated
+    """
+    if not hash_file_path.exists() or not os.path.exists(source_file_path):
+        return None
+
+    with open(hash_file_path) as hash_file:
+        data = json.load(hash_file)
+
+    if get_validity_key(source_file_path) not in data["valid_for"]:
+        return None
+
+    return {path: PrimHash(*prim_hash) for path, prim_hash in data["prims"].items()}
+
+
+def _get_path(prim: Usd.Prim | Sdf.PrimSpec | Sdf.Path) -> Sdf.Path:
+    if isinstance(prim, Sdf.Path):
+        return prim
+    if isinstance(prim, Sdf.PrimSpec):
+        return prim.path
+    return prim.GetPath()
+
+
+def filter_changed_prims(
+    matched_prims: Iterable[Tuple[Any, Any]],
+    bl_hashes: Dict[str, PrimHash],
+    source_hashes: Dict[str, PrimHash],
+) -> Iterator[Tuple[Any, Any]]:
+    """Yield only the matched prims that may differ from their source prim.
+
+    Matched prims must be given in traversal order, so once a subtree's hash matches
+    its source, all prims below it are skipped without looking up their hashes.
+
+    Args:
+        matched_prims (Iterable[Tuple[Any, Any]]): Pairs of Blender and source Usd.Prim, Sdf.PrimSpec
+            or Sdf.Path
+        bl_hashes (Dict[str, PrimHash]): Hashes of the Blender export stage
+        source_hashes (Dict[str, PrimHash]): Hashes of the source stage
+
+    Yields:
+        Tuple[Any, Any]: Pairs of Blender and source prims that need to be diffed
+    """
+    pruned_root: Optional[Sdf.Path] = None
+    for bl_prim, src_prim in matched_prims:
+        bl_path = _get_path(bl_prim)
+        if pruned_root and bl_path.HasPrefix(pruned_root):
+            continue
+
+        bl_hash = bl_hashes.get(str(bl_path))
+        src_hash = source_hashes.get(str(_get_path(src_prim)))
+        if bl_hash and src_hash:
+            if bl_hash.subtree == src_hash.subtree:
+                pruned_root = bl_path
+                continue
+            if bl_hash.prim == src_hash.prim:
+                continue
+
+        yield bl_prim, src_prim
+
+
+def get_changed_subtrees(
+    old_hashes: Dict[str, PrimHash], new_hashes: Dict[str, PrimHash]
+) -> List[Sdf.Path]:
+    """Get the topmost prims whose own content was changed, added or removed between two versions of a stage.
+
+    Args:
+        old_hashes (Dict[str, PrimHash]): Hashes of the previous version, eg. the snapshot
+        new_hashes (Dict[str, PrimHash]): Hashes of the current version
+
+    Returns:
+        List[Sdf.Path]: Sorted roots of the changed subtrees, none of them is a descendant of another
+    """
+    changed = set()
+    for path in old_hashes.keys() | new_hashes.keys():
+        old_hash = old_hashes.get(path)
+        new_hash = new_hashes.get(path)
+        if not old_hash or not new_hash or old_hash.prim != new_hash.prim:
+            changed.add(Sdf.Path(path))
+
+    return sorted(
+        path
+        for path in changed
+        if not any(prefix in changed for prefix in path.GetPrefixes()[:-1])
+    )
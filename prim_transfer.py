@@ -1,52 +1,81 @@
-from pxr import Usd
-from typing import Dict, Any, Optional
-from .utils import compare_usd_values
+from pxr import Sdf, Usd
+from typing import Callable, Dict, Any, Optional
+import logging
+from . import instrumentation
+from .change_set import ChangeSet, PropertyOverride, TimeSampledValue, compare_property_values
+from .property_filter import DEFAULT_PROPERTY_FILTER, PropertyFilter
 
-IGNORE_PROPS = [
-    "userProperties:blender:object_name",
-    "userProperties:blender:data_name",
-]
+logger = logging.getLogger(__name__)
 
 
 class PrimTransfer:
     """
-    NOTE: This class assumes, bl_stage, source_stage and target_stage are all active in memory.
-    It also assumes that target_stage has the source_stage as a sublayer.
+    NOTE: This class assumes, bl_stage and source_stage are both active in memory.
+    Overrides are queued on the change set, which authors them into a layer with the source as a sublayer.
     """
 
     def __init__(
-        self, bl_prim: Usd.Prim, source_prim: Usd.Prim, target_stage: Usd.Stage
+        self,
+        bl_prim: Usd.Prim,
+        source_prim: Usd.Prim,
+        change_set: ChangeSet,
+        skip_property: Optional[Callable[[str], bool]] = None,
+        property_filter: PropertyFilter = DEFAULT_PROPERTY_FILTER,
     ) -> None:
         self.bl_prim: Usd.Prim = bl_prim
         self.source_prim: Usd.Prim = source_prim
-        self.target_stage: Usd.Stage = target_stage
+        self.change_set: ChangeSet = change_set
+        # Properties known to be unchanged without comparing them, eg. arrays of unedited meshes
+        self.skip_property: Optional[Callable[[str], bool]] = skip_property
+        # Properties ignored by the library's rules and their tolerances, see property_filter
+        self.property_filter: PropertyFilter = property_filter
 
     def get_property_value(self, prop: Usd.Property) -> Optional[Any]:
         """Get the value from a property, handling both Get() and GetTargets() methods."""
         if hasattr(prop, "GetTargets"):
             return prop.GetTargets()
         elif hasattr(prop, "Get"):
+            # Animated attributes are compared by their default along with every time sample
+            times = prop.GetTimeSamples()
+            if times:
+                return TimeSampledValue(prop.Get(), {time: prop.Get(time) for time in times})
             return prop.Get()
         return None
 
-    def set_property_value(self, prop: Usd.Property, value: Any) -> None:
-        """Set the value on a property, handling both Set() and SetTargets() methods."""
-        if hasattr(prop, "SetTargets"):
-            prop.SetTargets(value)
-        elif hasattr(prop, "Set"):
-            prop.Set(value)
+    def get_property_override(self, prop: Usd.Property, value: Any) -> PropertyOverride:
+        """Describe an override of the property, handling both attributes and relationships."""
+        if isinstance(prop, Usd.Relationship):
+            return PropertyOverride(prop.GetName(), value, None, custom=prop.IsCustom())
+        time_samples = None
+        if isinstance(value, TimeSampledValue):
+            value, time_samples = value.default, value.time_samples
+        return PropertyOverride(
+            prop.GetName(),
+            value,
+            prop.GetTypeName(),
+            prop.GetVariability(),
+            prop.IsCustom(),
+            time_samples,
+        )
 
     def compare_prim_properties(
         self, src_prim: Usd.Prim, trg_prim: Usd.Prim
     ) -> Dict[str, Any]:
         """Compare properties between two prims and return dictionary of differences."""
         differences = {}
+        num_compared = 0
+        num_skipped = 0
 
         for trg_prop in trg_prim.GetProperties():
-            if trg_prop.GetName() in IGNORE_PROPS:
+            prop_name = trg_prop.GetName()
+            if self.property_filter.is_ignored(prop_name):
+                num_skipped += 1
+                continue
+            if self.skip_property and self.skip_property(prop_name):
+                num_skipped += 1
                 continue
 
-            src_prop = src_prim.GetProperty(trg_prop.GetName())
+            src_prop = src_prim.GetProperty(prop_name)
             trg_value = self.get_property_value(trg_prop)
             
             if trg_value is None:
@@ -54,47 +83,53 @@ class PrimTransfer:
 
             if not src_prop:
                 # Property missing in source, add it
-                differences[trg_prop.GetName()] = trg_value
+                differences[prop_name] = trg_value
                 continue
 
             # Compare existing properties
             src_value = self.get_property_value(src_prop)
-            if not compare_usd_values(src_value, trg_value):
-                differences[trg_prop.GetName()] = trg_value
-
+            num_compared += 1
+            if not compare_property_values(
+                src_value, trg_value, tolerance=self.property_filter.get_tolerance(prop_name)
+            ):
+                differences[prop_name] = trg_value
+
+        instrumentation.count(instrumentation.PROPERTIES_COMPARED, num_compared)
+        instrumentation.count(instrumentation.PROPERTIES_SKIPPED, num_skipped)
         return differences
 
     def apply_property_overrides(
         self,
         src_prim: Usd.Prim,
-        override_stage: Usd.Stage,
+        change_set: ChangeSet,
         property_differences: Dict[str, Any],
     ) -> None:
-        """Apply property differences as overrides to the override stage."""
-        override_prim = self.get_override_prim(src_prim, override_stage)
-        if not override_prim:
-            return
+        """Queue property differences as overrides of the source prim on the change set."""
+        logger.debug("PRIM: Overriding Prim: %s", src_prim.GetPath())
 
+        overrides = []
         for prop_name, prop_value in property_differences.items():
-            override_prop = override_prim.GetProperty(prop_name)
-            self.set_property_value(override_prop, prop_value)
-            print(f"PROP: Overrided '{prop_name}' on '{src_prim.GetPath()}'")
+            # Like Usd.Stage, only properties known to the source prim can be overridden
+            src_prop = src_prim.GetProperty(prop_name)
+            if not src_prop:
+                continue
+            overrides.append(self.get_property_override(src_prop, prop_value))
+            logger.debug("PROP: Overrided '%s' on '%s'", prop_name, src_prim.GetPath())
+        change_set.add_overrides(src_prim.GetPath(), overrides)
 
     def generate_overrides(self) -> None:
-        """Generate overrides on the target stage for differences between bl_prim and source_prim."""
+        """Queue overrides on the change set for differences between bl_prim and source_prim."""
         differences = self.compare_prim_properties(self.source_prim, self.bl_prim)
-        self.apply_property_overrides(self.source_prim, self.target_stage, differences)
+        self.apply_property_overrides(self.source_prim, self.change_set, differences)
 
     def get_changes(self) -> Dict[str, Any]:
         """Get the property differences between bl_prim and source_prim."""
         return self.compare_prim_properties(self.source_prim, self.bl_prim)
-    
-    def get_override_prim(self, src_prim: Usd.Prim, override_stage: Usd.Stage) -> Usd.Prim:
-        try:
-            override_prim = override_stage.OverridePrim(src_prim.GetPath())
-        except Exception as e:
-            print(f"Error getting override prim: {e}")
-            return
-        print(f"PRIM: Overriding Prim: {src_prim.GetPath()}")
-        return override_prim
+
+    def apply_changes(self, differences: Dict[str, Any]) -> None:
+        """Queue differences previously returned by get_changes on the change set."""
+        self.apply_property_overrides(self.source_prim, self.change_set, differences)
+
+    def get_path(self) -> Sdf.Path:
+        return self.bl_prim.GetPath()
 
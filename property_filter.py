@@ -0,0 +1,108 @@
+import fnmatch
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+# Rules deciding which properties are compared when generating overrides and with which
+# tolerance. Rules are compiled once per export into regular expressions and the result
+# for each property name is memoized, since the same names repeat on every prim.
+
+# Connector bookkeeping Blender writes on exported prims, it never becomes an override
+BUILTIN_IGNORE_PROPS = [
+    "userProperties:blender:object_name",
+    "userProperties:blender:data_name",
+]
+
+# Large arrays pipelines often never override, skipped with a library's skip_heavy_attributes
+HEAVY_ATTRIBUTE_PATTERNS = ["primvars:*", "normals"]
+
+SYNTAX_ITEMS = [
+    ("GLOB", "Glob", "Shell style pattern, eg. 'primvars:*'"),
+    ("REGEX", "Regular Expression", "Python regular expression matching the whole property name"),
+]
+
+ACTION_ITEMS = [
+    ("IGNORE", "Ignore", "Never compare or override matching properties"),
+    ("TOLERANCE", "Tolerance", "Compare matching properties with the rule's absolute tolerance"),
+]
+
+
+class PropertyRule(NamedTuple):
+    pattern: str
+    syntax: str = "GLOB"
+    action: str = "IGNORE"
+    # Absolute tolerance of TOLERANCE rules
+    tolerance: float = 0.0
+
+
+def compile_pattern(rule: PropertyRule) -> str:
+    """Get the regular expression of a rule's pattern, raising ValueError if it is invalid."""
+    if rule.syntax == "GLOB":
+        return fnmatch.translate(rule.pattern)
+    try:
+        re.compile(rule.pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid property rule pattern '{rule.pattern}': {e}") from e
+    return rule.pattern
+
+
+class PropertyFilter:
+    """Compiled property rules. Ignore rules always win, of the tolerance rules the first match applies."""
+
+    def __init__(self, rules: List[PropertyRule]) -> None:
+        ignore_patterns = [compile_pattern(rule) for rule in rules if rule.action == "IGNORE"]
+        self.ignore_expression = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in ignore_patterns))
+            if ignore_patterns
+            else None
+        )
+        self.tolerance_expressions = [
+            (re.compile(compile_pattern(rule)), rule.tolerance)
+            for rule in rules
+            if rule.action == "TOLERANCE"
+        ]
+        self.ignored: Dict[str, bool] = {}
+        self.tolerances: Dict[str, Optional[float]] = {}
+
+    def is_ignored(self, prop_name: str) -> bool:
+        ignored = self.ignored.get(prop_name)
+        if ignored is None:
+            ignored = bool(
+                self.ignore_expression and self.ignore_expression.fullmatch(prop_name)
+            )
+            self.ignored[prop_name] = ignored
+        return ignored
+
+    def get_tolerance(self, prop_name: str) -> Optional[float]:
+        """Get the tolerance of a property's rule, None to use the tolerance of its value type."""
+        if prop_name in self.tolerances:
+            return self.tolerances[prop_name]
+        tolerance = None
+        for expression, rule_tolerance in self.tolerance_expressions:
+            if expression.fullmatch(prop_name):
+                tolerance = rule_tolerance
+                break
+        self.tolerances[prop_name] = tolerance
+        return tolerance
+
+
+def compile_rules(
+    rules: List[PropertyRule], skip_heavy_attributes: bool = False
+) -> PropertyFilter:
+    """Compile rules along with the built-in ones into a PropertyFilter.
+
+    Args:
+        rules (List[PropertyRule]): Rules of a library, in order of precedence
+        skip_heavy_attributes (bool): Also ignore HEAVY_ATTRIBUTE_PATTERNS
+
+    Returns:
+        PropertyFilter: Matcher consulted by PrimTransfer and PrimSpecTransfer
+    """
+    builtin_rules = [
+        PropertyRule(re.escape(name), syntax="REGEX") for name in BUILTIN_IGNORE_PROPS
+    ]
+    if skip_heavy_attributes:
+        builtin_rules += [PropertyRule(pattern) for pattern in HEAVY_ATTRIBUTE_PATTERNS]
+    return PropertyFilter(builtin_rules + list(rules))
+
+
+DEFAULT_PROPERTY_FILTER = compile_rules([])
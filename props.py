@@ -1,4 +1,65 @@
 import bpy
+from . import instrumentation
+from . import stage_cache
+from .property_filter import ACTION_ITEMS, SYNTAX_ITEMS
+from .layer_format import LAYER_FORMAT_ITEMS
+
+DIFF_MODE_ITEMS = [
+    ("STAGE", "Stage", "Compare composed prims of the Blender and source stages"),
+    (
+        "LAYER",
+        "Layer",
+        "Compare prim and attribute specs of the flat Blender layer and a flattened "
+        "source layer directly, skipping stage composition",
+    ),
+]
+
+EXPORT_STAGING_ITEMS = [
+    (
+        "TARGET_DIR",
+        "Next to Layer",
+        "Write the intermediate full Blender export next to the override layer",
+    ),
+    (
+        "MEMORY",
+        "Memory",
+        "Write the intermediate full Blender export to a RAM backed temporary directory, "
+        "so no full copy of the scene touches the publish directory. "
+        "Asset paths are written absolute",
+    ),
+]
+
+
+class USDConnectPropertyRule(bpy.types.PropertyGroup):
+    """Which properties are compared when generating overrides, see property_filter."""
+
+    pattern: bpy.props.StringProperty(  # type: ignore
+        name="Pattern",
+        description="Property names the rule applies to, eg. 'primvars:*'",
+        default="",
+    )
+
+    syntax: bpy.props.EnumProperty(  # type: ignore
+        name="Syntax",
+        description="How the pattern is matched against property names",
+        items=SYNTAX_ITEMS,
+        default="GLOB",
+    )
+
+    action: bpy.props.EnumProperty(  # type: ignore
+        name="Action",
+        description="What happens to matching properties",
+        items=ACTION_ITEMS,
+        default="IGNORE",
+    )
+
+    tolerance: bpy.props.FloatProperty(  # type: ignore
+        name="Tolerance",
+        description="Absolute tolerance matching properties are compared with, for the Tolerance action",
+        default=0.01,
+        min=0.0,
+        precision=6,
+    )
 
 
 class USDConnectLibraries(bpy.types.PropertyGroup):
@@ -38,6 +99,53 @@ class USDConnectLibraries(bpy.types.PropertyGroup):
         subtype="FILE_PATH",
     )
 
+    diff_mode: bpy.props.EnumProperty(  # type: ignore
+        name="Diff Mode",
+        description="How the Blender export is compared against the source to generate overrides",
+        items=DIFF_MODE_ITEMS,
+        default="STAGE",
+    )
+
+    diff_workers: bpy.props.IntProperty(  # type: ignore
+        name="Diff Workers",
+        description=(
+            "Number of threads comparing prim properties during export, "
+            "1 compares all prims serially"
+        ),
+        default=1,
+        min=1,
+        max=256,
+    )
+
+    export_staging: bpy.props.EnumProperty(  # type: ignore
+        name="Export Staging",
+        description="Where Blender's full USD export is written before overrides are generated from it",
+        items=EXPORT_STAGING_ITEMS,
+        default="TARGET_DIR",
+    )
+
+    layer_format: bpy.props.EnumProperty(  # type: ignore
+        name="Layer Format",
+        description=(
+            "File format of the override and refresh layers, "
+            "layers with a .usda or .usdc extension always keep their format"
+        ),
+        items=LAYER_FORMAT_ITEMS,
+        default="AUTO",
+    )
+
+    property_rules: bpy.props.CollectionProperty(  # type: ignore
+        name="Property Rules",
+        description="Properties to ignore or compare with a custom tolerance when generating overrides",
+        type=USDConnectPropertyRule,
+    )
+
+    skip_heavy_attributes: bpy.props.BoolProperty(  # type: ignore
+        name="Skip Heavy Attributes",
+        description="Never compare or override primvars and normals, for pipelines that don't edit them",
+        default=False,
+    )
+
 
 class USDConnectIDProps(bpy.types.PropertyGroup):
     """Information specific to each Prim is stored here."""
@@ -62,6 +170,13 @@ class USDConnectIDProps(bpy.types.PropertyGroup):
         description="Scene that contains the library this prim came from",
     )
 
+    mesh_fingerprint : bpy.props.StringProperty(  # type: ignore
+        name="Mesh Fingerprint",
+        description="Hashes of the mesh's positions, topology and attributes at import, see mesh_fingerprint",
+        default="",
+        options={'HIDDEN'},
+    )
+
     def library_get(self) -> USDConnectLibraries | None:
         """Get the library object this prim came from."""
         if self.library_scene:
@@ -83,10 +198,54 @@ class USDConnectSessionState(bpy.types.PropertyGroup):
         default=False,
     )
 
+    incremental: bpy.props.BoolProperty(  # type: ignore
+        name="Incremental",
+        description="Whether only data changed since the last export is being exported",
+        default=False,
+    )
+
+    dry_run: bpy.props.BoolProperty(  # type: ignore
+        name="Dry Run",
+        description=(
+            "Whether an export is only previewed, its changes are saved as change sets "
+            "instead of being written to the override layers"
+        ),
+        default=False,
+    )
+
+    library_names: bpy.props.StringProperty(  # type: ignore
+        name="Library Names",
+        description=(
+            "Newline separated names of the libraries the running import or export is for, "
+            "each library's overrides are written to its own layer"
+        ),
+        default="",
+    )
+
+    log_level: bpy.props.EnumProperty(  # type: ignore
+        name="Log Level",
+        description="Which messages USD Connect prints to the console",
+        items=instrumentation.LOG_LEVEL_ITEMS,
+        default="WARNING",
+        update=lambda self, context: instrumentation.set_log_level(self.log_level),
+    )
+
+    stage_cache_budget: bpy.props.IntProperty(  # type: ignore
+        name="Stage Cache Budget",
+        description=(
+            "Megabytes of USD files whose stages are kept open between exports and refreshes, "
+            "the least recently used stages are released first. 0 disables the cache"
+        ),
+        default=stage_cache.DEFAULT_BUDGET_MB,
+        min=0,
+        update=lambda self, context: stage_cache.set_budget(self.stage_cache_budget),
+    )
+
 
 # ----------------REGISTER--------------.
 
 classes = [
+    USDConnectPropertyRule,
     USDConnectLibraries,
     USDConnectIDProps, 
     USDConnectSessionState
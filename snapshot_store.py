@@ -0,0 +1,201 @@
+from pxr import UsdUtils
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from . import prim_hash
+from . import stage_cache
+
+# Content addressed store of flattened source snapshots. Each snapshot is named after a digest
+# of every layer the source composes, so importing an unchanged source reuses its snapshot.
+# Snapshots no longer referenced by any library are removed once they are superseded.
+
+SNAPSHOT_SUFFIX = ".usdc"
+REFERENCES_FILE = "references.json"
+LOCK_FILE = "references.lock"
+
+# Referrers of unsaved .blend files are named after the Blender process using the snapshot
+UNSAVED_REFERRER_PREFIX = "unsaved_"
+
+# Seconds to wait between attempts to lock the store, and after which a lock is considered
+# left behind by a crashed process. The lock is only held while the references are updated.
+_LOCK_POLL_INTERVAL = 0.05
+_LOCK_STALE_SECONDS = 60.0
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class StoredSnapshot(NamedTuple):
+    """A snapshot in the store and whether it already existed before it was requested."""
+
+    path: Path
+    reused: bool
+
+
+def get_source_digest(source_file_path: str) -> str:
+    """Hash the root layer path and contents of every layer a USD file composes.
+
+    Args:
+        source_file_path (str): Root layer of the source
+
+    Returns:
+        str: Hex digest, equal for sources whose flattened content can't differ
+    """
+    layers, _assets, _unresolved = UsdUtils.ComputeAllDependencies(source_file_path)
+    # Flattened asset paths are anchored to the source's location
+    digest = hashlib.blake2b(
+        Path(source_file_path).resolve().as_posix().encode(), digest_size=20
+    )
+    for layer_path in sorted(layer.realPath for layer in layers if layer.realPath):
+        digest.update(b"\0" + layer_path.encode() + b"\0")
+        with open(layer_path, "rb") as layer_file:
+            while chunk := layer_file.read(_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_snapshot_path(store_dir: Path, digest: str) -> Path:
+    return store_dir.joinpath(digest + SNAPSHOT_SUFFIX)
+
+
+def write_flattened_snapshot(source_file_path: str, snapshot_path: Path) -> None:
+    """Flatten the composed source into a single binary crate file."""
+    # Export next to the snapshot and rename, so no one reads a partially written snapshot
+    tmp_path = snapshot_path.with_name(
+        f"{snapshot_path.stem}.{uuid.uuid4().hex}.tmp{SNAPSHOT_SUFFIX}"
+    )
+    stage_cache.open_stage(source_file_path).Flatten().Export(tmp_path.as_posix())
+    os.replace(tmp_path, snapshot_path)
+
+
+def get_referrer(blend_file_path: str, library_name: str) -> str:
+    """Identify a library of a .blend file as a user of a snapshot, see store_snapshot."""
+    return f"{blend_file_path or f'{UNSAVED_REFERRER_PREFIX}{os.getpid()}'}:{library_name}"
+
+
+def _get_unsaved_referrer_pid(referrer: str) -> Optional[int]:
+    if not referrer.startswith(UNSAVED_REFERRER_PREFIX):
+        return None
+    pid = referrer[len(UNSAVED_REFERRER_PREFIX):].partition(":")[0]
+    return int(pid) if pid.isdigit() else None
+
+
+def _is_process_running(pid: int) -> bool:
+    if sys.platform == "win32":
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to another user
+        return True
+    return True
+
+
+@contextlib.contextmanager
+def _lock_store(store_dir: Path) -> Iterator[None]:
+    """Hold an exclusive lock on the store's references, shared by all Blender processes."""
+    lock_path = store_dir.joinpath(LOCK_FILE)
+    while True:
+        try:
+            lock_file = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > _LOCK_STALE_SECONDS:
+                    lock_path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(_LOCK_POLL_INTERVAL)
+    try:
+        os.close(lock_file)
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def _load_references(store_dir: Path) -> Dict[str, str]:
+    references_path = store_dir.joinpath(REFERENCES_FILE)
+    if not references_path.exists():
+        return {}
+    with open(references_path) as references_file:
+        return json.load(references_file)
+
+
+def _save_references(store_dir: Path, references: Dict[str, str]) -> None:
+    references_path = store_dir.joinpath(REFERENCES_FILE)
+    tmp_path = references_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w") as references_file:
+        json.dump(references, references_file, indent=2)
+    os.replace(tmp_path, references_path)
+
+
+def remove_snapshot(snapshot_path: Path) -> None:
+    """Delete a snapshot along with the prim hashes stored next to it."""
+    for file_path in (snapshot_path, prim_hash.get_hash_file_path(snapshot_path.as_posix())):
+        if file_path.exists():
+            file_path.unlink()
+
+
+def store_snapshot(source_file_path: str, store_dir: Path, referrer: str) -> StoredSnapshot:
+    """Get the snapshot of a source from the store, writing it only if its content isn't stored yet.
+
+    The snapshot the referrer used before is removed, unless another referrer still uses it.
+    Referrers of unsaved .blend files whose Blender process exited are released as well.
+
+    Args:
+        source_file_path (str): Root layer of the source to snapshot
+        store_dir (Path): Directory of the store, created if missing
+        referrer (str): Identifies the user of the snapshot, see get_referrer
+
+    Returns:
+        StoredSnapshot: Path of the snapshot and whether it was reused
+    """
+    store_dir.mkdir(parents=True, exist_ok=True)
+    digest = get_source_digest(source_file_path)
+    snapshot_path = get_snapshot_path(store_dir, digest)
+
+    # Flattening may take long, so it's done before locking the store
+    reused = snapshot_path.exists()
+    if not reused:
+        write_flattened_snapshot(source_file_path, snapshot_path)
+
+    with _lock_store(store_dir):
+        references = _load_references(store_dir)
+        released = {references.pop(referrer, None)}
+        for other_referrer in list(references):
+            pid = _get_unsaved_referrer_pid(other_referrer)
+            if pid is not None and not _is_process_running(pid):
+                released.add(references.pop(other_referrer))
+        references[referrer] = digest
+        _save_references(store_dir, references)
+
+        # Another process may have removed the snapshot before it was referenced
+        if not snapshot_path.exists():
+            write_flattened_snapshot(source_file_path, snapshot_path)
+
+        for released_digest in released - set(references.values()) - {None}:
+            remove_snapshot(get_snapshot_path(store_dir, released_digest))
+
+    return StoredSnapshot(snapshot_path, reused)
+
@@ -0,0 +1,274 @@
+from pxr import Sdf, Usd
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+import contextlib
+import logging
+import os
+import threading
+from . import instrumentation
+
+# Stages of source files kept open for the whole session, so repeated exports and refreshes
+# don't parse and compose the same files again. Cached stages and layers are reloaded
+# when any file they were read from changed on disk since it was last loaded.
+# Reloading edits layers in place, so it only happens on the main thread, worker threads
+# get their stages and layers without refreshing them, see refresh_all.
+
+STAGE_CACHE_HITS = "stage_cache_hits"
+STAGE_CACHE_MISSES = "stage_cache_misses"
+STAGE_CACHE_RELOADS = "stage_cache_reloads"
+STAGE_CACHE_EVICTIONS = "stage_cache_evictions"
+
+DEFAULT_BUDGET_MB = 2048
+
+logger = logging.getLogger(__name__)
+
+# Modification time in nanoseconds and size of a layer file
+FileSignature = Tuple[int, int]
+
+
+class CacheEntry(NamedTuple):
+    stage_id: Usd.StageCache.Id
+    # Estimated memory of the stage, the size of the files it was read from
+    size: int
+
+
+class StageCache:
+    """Usd.StageCache with least recently used eviction once the cached stages exceed a memory budget."""
+
+    def __init__(self, budget: int) -> None:
+        self.cache = Usd.StageCache()
+        self.budget = budget
+        # Most recently used last
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # Signature of each layer file at the time it was last loaded, keyed by real path
+        self.signatures: Dict[str, FileSignature] = {}
+        self.stats = {
+            STAGE_CACHE_HITS: 0,
+            STAGE_CACHE_MISSES: 0,
+            STAGE_CACHE_RELOADS: 0,
+            STAGE_CACHE_EVICTIONS: 0,
+        }
+        self.lock = threading.RLock()
+        # Held while a stage is borrowed to load payloads on it, keyed like entries
+        self.borrow_locks: Dict[str, threading.Lock] = {}
+
+
+_stage_cache = StageCache(DEFAULT_BUDGET_MB * 1024**2)
+
+
+def _count(name: str) -> None:
+    _stage_cache.stats[name] += 1
+    instrumentation.count(name)
+
+
+def get_file_signature(file_path: str) -> FileSignature | None:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def refresh_layers(layers: List[Sdf.Layer], reload: bool = True) -> bool:
+    """Reload the layers whose files changed since they were last loaded.
+
+    Args:
+        layers (List[Sdf.Layer]): Layers to check
+        reload (bool): If False, only the signatures of layers seen for the first time are
+            recorded, changed layers are left to be reloaded by the next refresh
+
+    Returns:
+        bool: True if any layer was reloaded
+    """
+    reloaded = False
+    for layer in layers:
+        if not layer.realPath:
+            continue
+        signature = get_file_signature(layer.realPath)
+        known_signature = _stage_cache.signatures.get(layer.realPath)
+        if known_signature is not None and signature != known_signature:
+            if not reload:
+                continue
+            logger.info("Reloading '%s', it changed on disk", layer.realPath)
+            layer.Reload(force=True)
+            reloaded = True
+        _stage_cache.signatures[layer.realPath] = signature
+    return reloaded
+
+
+def refresh_all() -> bool:
+    """Reload all layers opened through the cache whose files changed since they were loaded.
+
+    Must be called on the main thread before cached stages or layers are handed to worker
+    threads, as reloading a layer while another thread composes a stage using it isn't safe.
+    Workers then open them with refresh disabled, see open_stage and open_layer.
+
+    Returns:
+        bool: True if any layer was reloaded
+    """
+    with _stage_cache.lock:
+        layers = [
+            layer
+            for layer in map(Sdf.Layer.Find, list(_stage_cache.signatures))
+            if layer
+        ]
+        reloaded = refresh_layers(layers)
+        if reloaded:
+            _count(STAGE_CACHE_RELOADS)
+        return reloaded
+
+
+def get_cache_key(
+    file_path: str, population_mask: Usd.StagePopulationMask | None, load: int
+) -> str:
+    identifier = Path(file_path).resolve().as_posix()
+    mask = ",".join(str(path) for path in population_mask.GetPaths()) if population_mask else "*"
+    return f"{identifier}|{load}|{mask}"
+
+
+def open_stage(
+    file_path: str,
+    population_mask: Usd.StagePopulationMask | None = None,
+    load: int = Usd.Stage.LoadAll,
+    refresh: bool = True,
+) -> Usd.Stage:
+    """Get a cached stage of a file, opening it on the first request.
+
+    Stages are cached per file, population mask and initial load set. Cached stages whose
+    layers changed on disk are reloaded before they are returned, unless refresh is disabled.
+
+    NOTE: Cached stages are shared, so callers must not author opinions on them
+
+    Args:
+        file_path (str): Root layer of the stage
+        population_mask (Usd.StagePopulationMask | None): Only compose these prims, see Usd.Stage.OpenMasked
+        load (int): Usd.Stage.LoadAll or Usd.Stage.LoadNone to leave payloads unloaded
+        refresh (bool): Reload changed layers, disable on worker threads, see refresh_all
+
+    Returns:
+        Usd.Stage: The cached stage
+    """
+    key = get_cache_key(file_path, population_mask, load)
+    with _stage_cache.lock:
+        entry = _stage_cache.entries.get(key)
+        stage = _stage_cache.cache.Find(entry.stage_id) if entry else None
+        if stage:
+            _stage_cache.entries.move_to_end(key)
+            if refresh and refresh_layers(stage.GetUsedLayers()):
+                _count(STAGE_CACHE_RELOADS)
+            else:
+                _count(STAGE_CACHE_HITS)
+            return stage
+
+        _count(STAGE_CACHE_MISSES)
+        if population_mask is not None:
+            stage = Usd.Stage.OpenMasked(file_path, population_mask, load)
+        else:
+            stage = Usd.Stage.Open(file_path, load)
+        # Layers kept alive by other cached stages are reused when opening, they may be outdated
+        used_layers = stage.GetUsedLayers()
+        refresh_layers(used_layers, reload=refresh)
+
+        if _stage_cache.budget <= 0:
+            return stage
+
+        size = sum(
+            os.path.getsize(layer.realPath)
+            for layer in used_layers
+            if layer.realPath and os.path.exists(layer.realPath)
+        )
+        _stage_cache.entries[key] = CacheEntry(_stage_cache.cache.Insert(stage), size)
+        evict(_stage_cache.budget)
+        return stage
+
+
+@contextlib.contextmanager
+def borrow_unloaded_stage(
+    file_path: str, population_mask: Usd.StagePopulationMask | None = None
+) -> Iterator[Usd.Stage]:
+    """Borrow a cached stage opened with all payloads unloaded, to load payloads on it as needed.
+
+    The stage is borrowed by one caller at a time. Payloads loaded while it's borrowed are
+    unloaded again when it's returned, so it stays cached as it was opened and its size holds.
+    Its layers aren't reloaded, as other threads may be composing stages sharing them,
+    call refresh_all on the main thread beforehand.
+
+    Args:
+        file_path (str): Root layer of the stage
+        population_mask (Usd.StagePopulationMask | None): Only compose these prims, see Usd.Stage.OpenMasked
+
+    Yields:
+        Usd.Stage: The cached stage
+    """
+    key = get_cache_key(file_path, population_mask, Usd.Stage.LoadNone)
+    with _stage_cache.lock:
+        borrow_lock = _stage_cache.borrow_locks.setdefault(key, threading.Lock())
+
+    with borrow_lock:
+        stage = open_stage(file_path, population_mask, Usd.Stage.LoadNone, refresh=False)
+        try:
+            yield stage
+        finally:
+            loaded = stage.GetLoadSet()
+            if loaded:
+                stage.LoadAndUnload(set(), set(loaded))
+
+
+def open_layer(file_path: str, refresh: bool = True) -> Sdf.Layer:
+    """Find an already loaded layer or open it, reloading it if its file changed since it was loaded.
+
+    Disable refresh on worker threads, see refresh_all.
+    """
+    with _stage_cache.lock:
+        layer = Sdf.Layer.Find(file_path)
+        if layer:
+            if refresh and refresh_layers([layer]):
+                _count(STAGE_CACHE_RELOADS)
+            else:
+                _count(STAGE_CACHE_HITS)
+            return layer
+
+        _count(STAGE_CACHE_MISSES)
+        layer = Sdf.Layer.FindOrOpen(file_path)
+        refresh_layers([layer], reload=refresh)
+        return layer
+
+
+def evict(budget: int) -> None:
+    """Release the least recently used stages until the cached stages fit the budget in bytes."""
+    with _stage_cache.lock:
+        total = sum(entry.size for entry in _stage_cache.entries.values())
+        # The most recently used stage is kept, even if it exceeds the budget on its own
+        while total > budget and len(_stage_cache.entries) > 1:
+            key, entry = _stage_cache.entries.popitem(last=False)
+            _stage_cache.cache.Erase(entry.stage_id)
+            total -= entry.size
+            _count(STAGE_CACHE_EVICTIONS)
+            logger.info("Evicted '%s' from the stage cache", key)
+
+
+def set_budget(megabytes: int) -> None:
+    """Set the memory budget of the cached stages, 0 disables caching."""
+    with _stage_cache.lock:
+        _stage_cache.budget = megabytes * 1024**2
+        if megabytes <= 0:
+            clear()
+        else:
+            evict(_stage_cache.budget)
+
+
+def get_stats() -> Dict[str, int]:
+    """Get the hit, miss, reload and eviction counts of this session, along with the cache's size."""
+    with _stage_cache.lock:
+        stats = dict(_stage_cache.stats)
+        stats["stages"] = len(_stage_cache.entries)
+        stats["bytes"] = sum(entry.size for entry in _stage_cache.entries.values())
+    return stats
+
+
+def clear() -> None:
+    """Release all cached stages."""
+    with _stage_cache.lock:
+        _stage_cache.cache.Clear()
+        _stage_cache.entries.clear()
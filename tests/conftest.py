@@ -0,0 +1,26 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ADDON_DIR = Path(__file__).resolve().parents[1]
+
+# Package the add-on's modules are imported from without running its __init__, which registers it in Blender
+MODULES_PACKAGE = "usd_connector_modules"
+
+
+@pytest.fixture(scope="session")
+def import_addon_module():
+    """Import a module of the add-on that doesn't need bpy, eg. import_addon_module("prim_hash")."""
+    pytest.importorskip("pxr")
+    if MODULES_PACKAGE not in sys.modules:
+        package = types.ModuleType(MODULES_PACKAGE)
+        package.__path__ = [str(ADDON_DIR)]
+        sys.modules[MODULES_PACKAGE] = package
+
+    def import_module(name: str) -> types.ModuleType:
+        return importlib.import_module(f"{MODULES_PACKAGE}.{name}")
+
+    return import_module
@@ -0,0 +1,55 @@
+"""Tests of authoring change sets into override layers."""
+import pytest
+
+pytest.importorskip("pxr")
+from pxr import Sdf, Usd  # noqa: E402
+
+
+@pytest.fixture
+def source_path(tmp_path):
+    source_layer = Sdf.Layer.CreateNew(str(tmp_path / "source.usda"))
+    Sdf.PrimSpec(source_layer, "World", Sdf.SpecifierDef, "Xform")
+    source_layer.Save()
+    return source_layer.identifier
+
+
+@pytest.fixture
+def blender_layer():
+    layer = Sdf.Layer.CreateAnonymous()
+    root = Sdf.PrimSpec(layer, "root", Sdf.SpecifierDef, "Xform")
+    materials = Sdf.PrimSpec(root, "_materials", Sdf.SpecifierDef, "Scope")
+    Sdf.PrimSpec(materials, "M", Sdf.SpecifierDef, "Material")
+    world = Sdf.PrimSpec(layer, "World", Sdf.SpecifierDef, "Xform")
+    Sdf.PrimSpec(world, "NewObj", Sdf.SpecifierDef, "Xform")
+    return layer
+
+
+def author_new_prims(import_addon_module, source_path, blender_layer, prim_paths):
+    change_set_module = import_addon_module("change_set")
+    change_set = change_set_module.ChangeSet("library")
+    for prim_path in prim_paths:
+        change_set.add_new_prim(blender_layer, Sdf.Path(prim_path))
+
+    override_layer = Sdf.Layer.CreateAnonymous()
+    override_layer.subLayerPaths.append(source_path)
+    change_set.author_into(override_layer, Usd.Stage.Open(source_path))
+    return override_layer
+
+
+def test_new_prim_under_new_parent_is_traversed(import_addon_module, source_path, blender_layer):
+    override_layer = author_new_prims(
+        import_addon_module, source_path, blender_layer, ["/root/_materials/M"]
+    )
+    stage = Usd.Stage.Open(override_layer)
+    traversed = [prim.GetPath() for prim in stage.Traverse()]
+    assert Sdf.Path("/root/_materials/M") in traversed
+    assert stage.GetPrimAtPath("/root/_materials").IsDefined()
+
+
+def test_ancestors_defined_in_source_stay_overs(import_addon_module, source_path, blender_layer):
+    override_layer = author_new_prims(
+        import_addon_module, source_path, blender_layer, ["/World/NewObj"]
+    )
+    assert override_layer.GetPrimAtPath("/World").specifier == Sdf.SpecifierOver
+    stage = Usd.Stage.Open(override_layer)
+    assert Sdf.Path("/World/NewObj") in [prim.GetPath() for prim in stage.Traverse()]
@@ -0,0 +1,52 @@
+"""Tests that the STAGE and LAYER diff modes author the same overrides."""
+import pytest
+
+pytest.importorskip("pxr")
+from pxr import Gf, Sdf, Usd, UsdGeom  # noqa: E402
+
+
+def create_cube_stage(scales):
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, "/World")
+    cube = UsdGeom.Cube.Define(stage, "/World/Cube_B")
+    scale_op = cube.AddScaleOp()
+    scale_op.Set(Gf.Vec3f(1, 1, 1))
+    for time, scale in scales.items():
+        scale_op.Set(Gf.Vec3f(scale, scale, scale), time)
+    return stage
+
+
+def test_animated_input_has_equal_overrides_in_both_modes(import_addon_module):
+    change_set_module = import_addon_module("change_set")
+    prim_transfer = import_addon_module("prim_transfer")
+    layer_diff = import_addon_module("layer_diff")
+
+    source_stage = create_cube_stage({})
+    blender_stage = create_cube_stage({1: 1.0, 24: 2.0})
+    prim_path = Sdf.Path("/World/Cube_B")
+
+    stage_change_set = change_set_module.ChangeSet("library")
+    prim_transfer.PrimTransfer(
+        blender_stage.GetPrimAtPath(prim_path),
+        source_stage.GetPrimAtPath(prim_path),
+        stage_change_set,
+    ).generate_overrides()
+
+    layer_change_set = change_set_module.ChangeSet("library")
+    layer_diff.PrimSpecTransfer(
+        blender_stage.GetRootLayer().GetPrimAtPath(prim_path),
+        source_stage.GetRootLayer().GetPrimAtPath(prim_path),
+        layer_change_set,
+    ).generate_overrides()
+
+    stage_layer = Sdf.Layer.CreateAnonymous()
+    stage_change_set.author_into(stage_layer)
+    layer_layer = Sdf.Layer.CreateAnonymous()
+    layer_change_set.author_into(layer_layer)
+
+    scale_spec = stage_layer.GetAttributeAtPath(prim_path.AppendProperty("xformOp:scale"))
+    assert scale_spec and scale_spec.GetInfo("timeSamples") == {
+        1.0: Gf.Vec3f(1, 1, 1),
+        24.0: Gf.Vec3f(2, 2, 2),
+    }
+    assert stage_layer.ExportToString() == layer_layer.ExportToString()
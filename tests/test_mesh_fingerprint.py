@@ -0,0 +1,72 @@
+"""Tests of skipping unchanged mesh parts, they need the `bpy` PIP package to run.
+
+    cd tests && python -m pytest
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+ADDON_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def addon():
+    # Load the add-on as a package, so its modules can be imported without installing it
+    spec = importlib.util.spec_from_file_location(
+        "usd_connector", ADDON_DIR / "__init__.py", submodule_search_locations=[str(ADDON_DIR)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    module.register()
+    yield module
+    module.unregister()
+
+
+@pytest.fixture
+def mesh_object(addon):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    mesh = bpy.data.meshes.new("Plane")
+    mesh.from_pydata([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [], [(0, 1, 2, 3)])
+    obj = bpy.data.objects.new("Plane", mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    addon.mesh_fingerprint.store_mesh_fingerprint(mesh)
+    return obj
+
+
+def get_unchanged_parts(addon, mesh):
+    mesh_fingerprint = addon.mesh_fingerprint
+    return mesh_fingerprint.get_unchanged_parts(
+        mesh, mesh_fingerprint.get_evaluated_mesh_names(bpy.data.objects)
+    )
+
+
+def test_unedited_mesh_is_unchanged(addon, mesh_object):
+    mesh_fingerprint = addon.mesh_fingerprint
+    assert get_unchanged_parts(addon, mesh_object.data) == {
+        mesh_fingerprint.POSITIONS,
+        mesh_fingerprint.TOPOLOGY,
+        mesh_fingerprint.ATTRIBUTES,
+    }
+
+
+def test_moved_vertex_changes_positions(addon, mesh_object):
+    mesh_object.data.vertices[0].co.z = 1.0
+    assert addon.mesh_fingerprint.POSITIONS not in get_unchanged_parts(addon, mesh_object.data)
+
+
+def test_mesh_with_modifier_has_no_unchanged_parts(addon, mesh_object):
+    mesh_object.modifiers.new("Subdivision", "SUBSURF")
+    assert get_unchanged_parts(addon, mesh_object.data) == frozenset()
+
+
+def test_mesh_with_shape_keys_has_no_unchanged_parts(addon, mesh_object):
+    mesh_object.shape_key_add(name="Basis")
+    key = mesh_object.shape_key_add(name="Raised")
+    key.data[0].co.z = 1.0
+    key.value = 1.0
+    assert get_unchanged_parts(addon, mesh_object.data) == frozenset()
@@ -0,0 +1,33 @@
+"""Tests of the prim content hashes used to skip unchanged prims."""
+import pytest
+
+pytest.importorskip("pxr")
+from pxr import Gf, Usd, UsdGeom  # noqa: E402
+
+
+def create_cube_stage(scales):
+    stage = Usd.Stage.CreateInMemory()
+    cube = UsdGeom.Cube.Define(stage, "/World/Cube_B")
+    scale_op = cube.AddScaleOp()
+    scale_op.Set(Gf.Vec3f(1, 1, 1))
+    for time, scale in scales.items():
+        scale_op.Set(Gf.Vec3f(scale, scale, scale), time)
+    return stage
+
+
+def test_prims_differing_only_in_animation_have_different_hashes(import_addon_module):
+    prim_hash = import_addon_module("prim_hash")
+    source = create_cube_stage({1: 1.0, 24: 1.0})
+    animated = create_cube_stage({1: 1.0, 24: 2.0})
+
+    source_hashes = prim_hash.compute_prim_hashes(source)
+    animated_hashes = prim_hash.compute_prim_hashes(animated)
+    assert source_hashes["/World/Cube_B"].prim != animated_hashes["/World/Cube_B"].prim
+    assert source_hashes["/World"].subtree != animated_hashes["/World"].subtree
+
+
+def test_equal_animation_has_equal_hashes(import_addon_module):
+    prim_hash = import_addon_module("prim_hash")
+    source_hashes = prim_hash.compute_prim_hashes(create_cube_stage({1: 1.0, 24: 2.0}))
+    animated_hashes = prim_hash.compute_prim_hashes(create_cube_stage({1: 1.0, 24: 2.0}))
+    assert source_hashes == animated_hashes
@@ -0,0 +1,80 @@
+"""Tests of the value comparison helpers in utils.
+
+The add-on root is a package importing bpy, so run the tests from this directory:
+
+    cd tests && python -m pytest
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pxr")
+from pxr import Gf, Vt  # noqa: E402
+
+# Import utils directly so the add-on (and bpy) doesn't need to be registered
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import utils  # noqa: E402
+
+NAN = float("nan")
+
+
+def test_nan_in_both_arrays_is_equal():
+    assert utils.compare_usd_values(Vt.FloatArray([1, NAN]), Vt.FloatArray([1, NAN]))
+
+
+def test_nan_in_one_array_is_different():
+    assert not utils.compare_usd_values(Vt.FloatArray([1, NAN]), Vt.FloatArray([1, 2]))
+    assert not utils.compare_usd_values(Vt.FloatArray([1, 2]), Vt.FloatArray([1, NAN]))
+
+
+def test_nan_in_one_array_counts_as_difference():
+    comparison = utils.compare_usd_arrays(
+        Vt.Vec3fArray([(0, 0, 0), (NAN, 0, 0)]), Vt.Vec3fArray([(0, 0, 0), (1, 0, 0)])
+    )
+    assert not comparison.equal
+    assert comparison.num_different == 1
+
+
+def test_precision_is_an_absolute_tolerance():
+    # 1.004 and 1.006 round to different values but are within 10**-2 of each other
+    assert utils.compare_usd_values(1.004, 1.006, precision=2)
+    assert utils.compare_usd_values(1.0, 1.009, precision=2)
+    assert not utils.compare_usd_values(1.0, 1.02, precision=2)
+    assert not utils.compare_usd_values(1.0, 1.002, precision=3)
+
+
+def test_tolerance_overrides_precision():
+    assert utils.compare_usd_values(1.0, 1.5, precision=2, tolerance=0.5)
+    assert not utils.compare_usd_values(1.0, 1.005, precision=2, tolerance=0.001)
+
+
+@pytest.mark.parametrize("value_type", [Gf.Vec3f, Gf.Vec3d, Gf.Vec3h])
+def test_vectors_compare_each_component_within_precision(value_type):
+    assert utils.compare_usd_values(value_type(1, 2, 3), value_type(1, 2, 3.004), precision=2)
+    assert not utils.compare_usd_values(value_type(1, 2, 3), value_type(1, 2, 3.02), precision=2)
+
+
+def test_integer_vectors_compare_within_precision():
+    assert not utils.compare_usd_values(Gf.Vec2i(1, 2), Gf.Vec2i(1, 3), precision=2)
+    assert utils.compare_usd_values(Gf.Vec2i(1, 2), Gf.Vec2i(1, 3), precision=0)
+
+
+def test_matrices_compare_each_component_within_precision():
+    close = Gf.Matrix4d(1.0)
+    close[3, 2] = 0.004
+    far = Gf.Matrix4d(1.0)
+    far[3, 2] = 0.02
+    assert utils.compare_usd_values(Gf.Matrix4d(1.0), close, precision=2)
+    assert not utils.compare_usd_values(Gf.Matrix4d(1.0), far, precision=2)
+    assert utils.compare_usd_values(Gf.Matrix4d(1.0), far, precision=1)
+
+
+def test_quaternions_compare_real_and_imaginary_within_precision():
+    assert utils.compare_usd_values(Gf.Quatf(1, 0, 0, 0), Gf.Quatf(1.004, 0, 0.004, 0))
+    assert not utils.compare_usd_values(Gf.Quatf(1, 0, 0, 0), Gf.Quatf(1, 0, 0.02, 0))
+    assert not utils.compare_usd_values(Gf.Quatf(1, 0, 0, 0), Gf.Quatf(1.02, 0, 0, 0))
+
+
+def test_nan_component_is_different():
+    assert not utils.compare_usd_values(Gf.Vec3f(0, 0, 0), Gf.Vec3f(0, NAN, 0))
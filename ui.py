@@ -3,7 +3,14 @@ import bpy
 from .ops import (
     USDConnectorAddReference,
     USDConnectorExportLayer,
+    USDConnectorExportAllLayers,
+    USDConnectPreviewOverrides,
     USDConnectLibraryRefresh,
+    USDConnectAddPropertyRule,
+    USDConnectEditPropertyRules,
+    USDConnectCompareLayerFormats,
+    USDConnectSaveTrace,
+    USDConnectClearStageCache,
 )
 
 
@@ -16,6 +23,17 @@ class USDConnectMenu(bpy.types.Menu):
         layout.operator(USDConnectorAddReference.bl_idname, icon='IMPORT')
         layout.operator(USDConnectLibraryRefresh.bl_idname, icon='FILE_REFRESH')
         layout.operator(USDConnectorExportLayer.bl_idname, icon='EXPORT')
+        layout.operator(USDConnectorExportAllLayers.bl_idname, icon='EXPORT')
+        layout.operator(USDConnectPreviewOverrides.bl_idname, icon='HIDE_OFF')
+        layout.operator(USDConnectAddPropertyRule.bl_idname, icon='FILTER')
+        layout.operator(USDConnectEditPropertyRules.bl_idname, icon='PREFERENCES')
+        layout.separator()
+        layout.operator(USDConnectSaveTrace.bl_idname, icon='TIME')
+        layout.operator(USDConnectCompareLayerFormats.bl_idname, icon='FILE')
+        layout.prop(context.window_manager.usd_connect_session, "log_level")
+        layout.separator()
+        layout.operator(USDConnectClearStageCache.bl_idname, icon='TRASH')
+        layout.prop(context.window_manager.usd_connect_session, "stage_cache_budget")
 
 def append_menu(self, context) -> None:
     layout = self.layout
@@ -14,6 +14,8 @@ import bpy
 import bpy.types
 from pathlib import Path
 from . import core
+from . import instrumentation
+from . import mesh_fingerprint
 
 # Make `pxr` module available, for running as `bpy` PIP package.
 bpy.utils.expose_bundled_modules()
@@ -33,24 +35,30 @@ class USDConnectorMetadataSet(bpy.types.USDHook):
         if not usd_connect_session.active:
             return
 
-        prim_map: dict[Sdf.Path, list[bpy.types.ID]] = import_context.get_prim_map()
+        with instrumentation.span("import_hook"):
+            prim_map: dict[Sdf.Path, list[bpy.types.ID]] = import_context.get_prim_map()
 
-        stage: Usd.Stage = import_context.get_stage()
+            stage: Usd.Stage = import_context.get_stage()
 
-        library = bpy.context.scene.usd_connect_libraries[0]
-        library.root_prim_path = str(stage.GetDefaultPrim().GetPath())
+            # Imports run for a single library, see core.import_usd_reference
+            library = core.get_session_libraries()[0]
+            library.root_prim_path = str(stage.GetDefaultPrim().GetPath())
 
-        to_remove = []
-        # Store prim path as a string on each data block created
-        for prim_path, data_blocks in prim_map.items():
-            prim_path: Sdf.Path
-            data_blocks: list[bpy.types.ID]
-            for data_block in data_blocks:
-                usdprops = data_block.usd_connect_props
-                usdprops.prim_path = str(prim_path)
-                usdprops.library_name = library.name
-                usdprops.library_scene = library.id_data
-                data_block["source_prm"] = str(prim_path)
+            to_remove = []
+            # Store prim path as a string on each data block created
+            for prim_path, data_blocks in prim_map.items():
+                prim_path: Sdf.Path
+                data_blocks: list[bpy.types.ID]
+                for data_block in data_blocks:
+                    usdprops = data_block.usd_connect_props
+                    usdprops.prim_path = str(prim_path)
+                    usdprops.library_name = library.name
+                    usdprops.library_scene = library.id_data
+                    data_block["source_prm"] = str(prim_path)
+
+                    # Lets export skip comparing the arrays of meshes that weren't edited
+                    if isinstance(data_block, bpy.types.Mesh):
+                        mesh_fingerprint.store_mesh_fingerprint(data_block)
 
     @staticmethod
     def on_export(export_context) -> None:
@@ -60,8 +68,8 @@ class USDConnectorMetadataSet(bpy.types.USDHook):
 
         # Get Stage Generated by Blender
         bl_stage: Usd.Stage = export_context.get_stage()
-        library = bpy.context.scene.usd_connect_libraries[0]
-        core.hook_export_overrides(bl_stage, library.ref_file_path)
+        with instrumentation.span("export_hook"):
+            core.hook_export_overrides(bl_stage, core.get_session_libraries())
 
 
 class USDCOnnectGenerateOverrides(bpy.types.Operator):
@@ -71,10 +79,18 @@ class USDCOnnectGenerateOverrides(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context) -> {'FINISHED'}:
-        # Get Stage Generated by Blender
-        bl_stage: Usd.Stage = Usd.Stage.Open(library.export_path)
-        library = context.scene.usd_connect_libraries[0]
-        core.hook_export_overrides(bl_stage, library.ref_file_path)
+        libraries = list(context.scene.usd_connect_libraries)
+        if not libraries:
+            self.report({'ERROR'}, "USD Library not found.")
+            return {'CANCELLED'}
+        if any(not library.export_path for library in libraries):
+            self.report({'ERROR'}, "Export each USD library once to set its export path.")
+            return {'CANCELLED'}
+
+        # The override layers are generated from a fresh export of the scene, the layers
+        # written before are replaced and must not be read as Blender's stage
+        with instrumentation.span("export_usd_layers", libraries=len(libraries)):
+            core.export_usd_layers(libraries)
         return {'FINISHED'}
 
 
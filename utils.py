@@ -1,17 +1,265 @@
 
-from typing import Any
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
 
-def compare_usd_values(value1: Any, value2: Any, precision: int = 2) -> bool:
+import numpy
+
+
+class ArrayComparison(NamedTuple):
+    """Result of a vectorized comparison between two USD arrays."""
+
+    equal: bool
+    num_different: int
+    max_deviation: float
+
+
+def as_numpy_array(value: Any) -> Optional[numpy.ndarray]:
+    """View a numeric Vt array as a NumPy array without copying.
+
+    Vt arrays of numeric and Gf vector types expose the buffer protocol, so the
+    returned array shares memory with the original value. Arrays of strings, tokens,
+    asset paths and other non-numeric types return None.
+
+    Args:
+        value (Any): Value to view, usually a Vt array
+
+    Returns:
+        Optional[numpy.ndarray]: Read-only NumPy view of the value, or None if unsupported
+    """
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return None
+    array = numpy.asarray(view)
+    if array.dtype.kind not in "fiub":
+        return None
+    return array
+
+
+def compare_usd_arrays(
+    value1: Any, value2: Any, atol: float = 1e-2, rtol: float = 0.0
+) -> Optional[ArrayComparison]:
+    """Compare two numeric USD arrays in a single vectorized pass.
+
+    Elements are considered equal when ``abs(value1 - value2) <= atol + rtol * abs(value2)``,
+    matching the semantics of ``numpy.isclose``. For arrays of vectors (eg. Vec3fArray)
+    an element differs if any of its components differ.
+
+    Args:
+        value1 (Any): First array to compare
+        value2 (Any): Second array to compare
+        atol (float): Absolute tolerance for floating point comparisons
+        rtol (float): Relative tolerance for floating point comparisons
+
+    Returns:
+        Optional[ArrayComparison]: Comparison result, or None if either value cannot be viewed as a numeric array
+    """
+    array1 = as_numpy_array(value1)
+    array2 = as_numpy_array(value2)
+    if array1 is None or array2 is None:
+        return None
+
+    if array1.shape != array2.shape:
+        return ArrayComparison(False, max(len(array1), len(array2)), float("inf"))
+
+    if array1.size == 0:
+        return ArrayComparison(True, 0, 0.0)
+
+    if array1.dtype.kind == "f" or array2.dtype.kind == "f":
+        deviation = numpy.abs(
+            array1.astype(numpy.float64, copy=False)
+            - array2.astype(numpy.float64, copy=False)
+        )
+        different = deviation > atol + rtol * numpy.abs(array2)
+        # Treat NaN in both arrays at the same index as equal and NaN in only one as different
+        nan1 = numpy.isnan(array1)
+        nan2 = numpy.isnan(array2)
+        different &= ~(nan1 & nan2)
+        different |= nan1 ^ nan2
+        finite = ~numpy.isnan(deviation)
+        max_deviation = float(deviation[finite].max()) if finite.any() else 0.0
+    else:
+        different = array1 != array2
+        max_deviation = float(numpy.abs(array1.astype(numpy.float64) - array2).max())
+
+    if different.ndim > 1:
+        different = different.reshape(len(different), -1).any(axis=1)
+
+    num_different = int(numpy.count_nonzero(different))
+    return ArrayComparison(num_different == 0, num_different, max_deviation)
+
+
+##############################################################
+# Comparator Registry
+##############################################################
+
+# A comparator takes two values of the same type and an absolute tolerance
+Comparator = Callable[[Any, Any, float], bool]
+
+_COMPARATORS: Dict[type, Comparator] = {}
+_TOLERANCES: Dict[type, float] = {}
+
+# Comparator and tolerance resolved per value type, filled lazily on first use
+_RESOLVED: Dict[type, Tuple[Comparator, Optional[float]]] = {}
+
+
+def register_comparator(value_type: type, comparator: Comparator) -> None:
+    """Register a comparator used by compare_usd_values for a given type and its subclasses.
+
+    Args:
+        value_type (type): Type to register the comparator for, eg. Gf.Matrix4d
+        comparator (Comparator): Callable taking (value1, value2, tolerance) and returning True if equal
+    """
+    _COMPARATORS[value_type] = comparator
+    _RESOLVED.clear()
+
+
+def register_tolerance(value_type: type, tolerance: float) -> None:
+    """Register an absolute tolerance used when comparing values of a given type.
+
+    This allows studios to compare some types more strictly than others, for example
+    matrices with a tighter tolerance than colors.
+
+    Args:
+        value_type (type): Type to register the tolerance for, eg. Gf.Matrix4d
+        tolerance (float): Absolute tolerance for floating point components of this type
+    """
+    _TOLERANCES[value_type] = tolerance
+    _RESOLVED.clear()
+
+
+def _compare_exact(value1: Any, value2: Any, tolerance: float) -> bool:
+    return value1 == value2
+
+
+def _compare_scalars(value1: Any, value2: Any, tolerance: float) -> bool:
+    return abs(value1 - value2) <= tolerance
+
+
+def _get_components(value: Any) -> Any:
+    # Gf vectors and matrices expose the buffer protocol, a flat view unpacks their components
+    # much faster than indexing them. Setting up NumPy costs more than it saves for a few components
+    view = memoryview(value)
+    if view.format == "e":
+        # memoryview can't unpack half floats
+        return value
+    return view if view.ndim == 1 else view.cast("B").cast(view.format)
+
+
+def _compare_buffers(value1: Any, value2: Any, tolerance: float) -> bool:
+    # Subtract in C++, then only the deviations are unpacked. Written so NaN compares as different
+    for deviation in _get_components(value1 - value2):
+        if not -tolerance <= deviation <= tolerance:
+            return False
+    return True
+
+
+def _compare_quaternions(value1: Any, value2: Any, tolerance: float) -> bool:
+    if abs(value1.GetReal() - value2.GetReal()) > tolerance:
+        return False
+    return _compare_buffers(value1.GetImaginary(), value2.GetImaginary(), tolerance)
+
+
+def _compare_sequences(value1: Any, value2: Any, tolerance: float) -> bool:
+    if len(value1) != len(value2):
+        return False
+    for item1, item2 in zip(value1, value2):
+        if not _compare_with_tolerance(item1, item2, tolerance):
+            return False
+    return True
+
+
+def _compare_arrays(value1: Any, value2: Any, tolerance: float) -> bool:
+    # Numeric arrays are compared in one vectorized pass
+    result = compare_usd_arrays(value1, value2, atol=tolerance)
+    if result is not None:
+        return result.equal
+    return _compare_sequences(value1, value2, tolerance)
+
+
+def _resolve_comparator(value_type: type, value: Any) -> Comparator:
+    for base in value_type.__mro__:
+        if base in _COMPARATORS:
+            return _COMPARATORS[base]
+
+    if issubclass(value_type, (bool, str)):
+        return _compare_exact
+
+    if issubclass(value_type, (int, float)):
+        return _compare_scalars
+
+    if issubclass(value_type, (list, tuple)):
+        return _compare_sequences
+
+    # USD Array types (Vt.Vec3fArray, Vt.FloatArray, etc.)
+    if value_type.__name__.endswith("Array"):
+        return _compare_arrays
+
+    # Quaternion types
+    if hasattr(value_type, "GetReal") and hasattr(value_type, "GetImaginary"):
+        return _compare_quaternions
+
+    # Vector and Matrix types (Vec3d, Vec3f, Matrix4d, etc.)
+    if hasattr(value_type, "__len__") and hasattr(value_type, "__getitem__"):
+        try:
+            memoryview(value)
+            return _compare_buffers
+        except TypeError:
+            return _compare_sequences
+
+    # Fallback to direct comparison for other types (tokens, asset paths, etc.)
+    return _compare_exact
+
+
+def _resolve_tolerance(value_type: type) -> Optional[float]:
+    for base in value_type.__mro__:
+        if base in _TOLERANCES:
+            return _TOLERANCES[base]
+    return None
+
+
+def get_comparator(value: Any) -> Tuple[Comparator, Optional[float]]:
+    """Get the comparator and registered tolerance for the type of a value, resolving them once per type.
+
+    Args:
+        value (Any): Value to compare, used to resolve the comparator for its type
+
+    Returns:
+        Tuple[Comparator, Optional[float]]: Comparator and registered tolerance, None if no tolerance is registered
+    """
+    value_type = type(value)
+    resolved = _RESOLVED.get(value_type)
+    if resolved is None:
+        resolved = (
+            _resolve_comparator(value_type, value),
+            _resolve_tolerance(value_type),
+        )
+        _RESOLVED[value_type] = resolved
+    return resolved
+
+
+def _compare_with_tolerance(value1: Any, value2: Any, tolerance: float) -> bool:
+    if type(value1) is not type(value2):
+        return False
+    if value1 == value2:
+        return True
+    comparator, type_tolerance = get_comparator(value1)
+    return comparator(value1, value2, tolerance if type_tolerance is None else type_tolerance)
+
+
+def compare_usd_values(
+    value1: Any, value2: Any, precision: int = 2, tolerance: Optional[float] = None
+) -> bool:
     """Compare two USD values with customizable precision for floating point numbers.
 
     This function handles various USD types including Vec3d, Vec3f, Vec2d, Vec2f,
-    matrices, quaternions, and other numerical types, rounding them to the specified
-    precision before comparison.
+    matrices, quaternions, and other numerical types. The comparator for each type is
+    resolved once and cached, see `register_comparator` and `register_tolerance`.
 
     Args:
         value1 (Any): First value to compare
         value2 (Any): Second value to compare
-        precision (int): Number of decimal places to round to for floating point comparisons
+        precision (int): Number of decimal places used as the absolute tolerance, unless a tolerance is registered for the type
+        tolerance (Optional[float]): Absolute tolerance overriding both, eg. from a property rule
 
     Returns:
         bool: True if values are equal (within precision), False otherwise
@@ -22,72 +270,15 @@ def compare_usd_values(value1: Any, value2: Any, precision: int = 2) -> bool:
         return False
 
     # Handle different USD types
-    if type(value1) != type(value2):
+    if type(value1) is not type(value2):
         return False
 
     if value1 == value2:
         return True
 
-    # USD Array types (Vt.Vec3fArray, Vt.FloatArray, etc.)
-    if hasattr(value1, '__class__') and 'Array' in str(type(value1)):
-        try:
-            if len(value1) != len(value2):
-                return False
-            for i in range(len(value1)):
-                if not compare_usd_values(value1[i], value2[i], precision):
-                    return False
-            return True
-        except (TypeError, IndexError, AttributeError):
-            pass
-
-    # Vector types (Vec3d, Vec3f, Vec2d, Vec2f, etc.)
-    if hasattr(value1, '__len__') and hasattr(value1, '__getitem__'):
-        try:
-            if len(value1) != len(value2):
-                return False
-            for i in range(len(value1)):
-                if isinstance(value1[i], (float, int)):
-                    if round(float(value1[i]), precision) != round(
-                        float(value2[i]), precision
-                    ):
-                        return False
-                else:
-                    if value1[i] != value2[i]:
-                        return False
-            return True
-        except (TypeError, IndexError):
-            pass
-
-    # Matrix types (GfMatrix4d, GfMatrix3d, etc.)
-    if hasattr(value1, 'GetRow') and hasattr(value1, 'GetNumRows'):
-        try:
-            if value1.GetNumRows() != value2.GetNumRows():
-                return False
-            for row in range(value1.GetNumRows()):
-                if not compare_usd_values(
-                    value1.GetRow(row), value2.GetRow(row), precision
-                ):
-                    return False
-            return True
-        except (TypeError, AttributeError):
-            pass
-
-    # Quaternion types
-    if hasattr(value1, 'GetReal') and hasattr(value1, 'GetImaginary'):
-        try:
-            real_equal = round(float(value1.GetReal()), precision) == round(
-                float(value2.GetReal()), precision
-            )
-            imag_equal = compare_usd_values(
-                value1.GetImaginary(), value2.GetImaginary(), precision
-            )
-            return real_equal and imag_equal
-        except (TypeError, AttributeError):
-            pass
-
-    # Single floating point numbers
-    if isinstance(value1, (float, int)) and isinstance(value2, (float, int)):
-        return round(float(value1), precision) == round(float(value2), precision)
-
-    # Fallback to direct comparison for other types (strings, bools, etc.)
-    return value1 == value2
\ No newline at end of file
+    comparator, type_tolerance = get_comparator(value1)
+    if tolerance is None:
+        tolerance = type_tolerance
+    if tolerance is None:
+        tolerance = 10**-precision
+    return comparator(value1, value2, tolerance)